@@ -0,0 +1,45 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.core.database import Base
+import app.models  # noqa: F401  registers every table on Base.metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Deliberately not create_db_engine: index builds and table rewrites run
+    # far longer than the app's DB_STATEMENT_TIMEOUT_MS, so migrations turn the
+    # timeout off, overriding any role or database default as well
+    url = make_url(settings.DATABASE_URL)
+    connect_args = {"options": "-c statement_timeout=0"} if url.get_backend_name() == "postgresql" else {}
+    connectable = create_engine(url, poolclass=NullPool, connect_args=connect_args)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+    connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
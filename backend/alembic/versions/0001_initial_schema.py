@@ -0,0 +1,107 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+The schema as Base.metadata.create_all() used to create it at startup.
+Databases created that way already have it; mark them with
+`alembic stamp 0001` and then `alembic upgrade head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("role", sa.Enum("ADMIN", "STUDENT", name="userrole"), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "questions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("complexity", sa.String(), nullable=False),
+        sa.Column(
+            "type",
+            sa.Enum("SINGLE_CHOICE", "MULTI_CHOICE", "TEXT", "IMAGE_UPLOAD", name="questiontype"),
+            nullable=False,
+        ),
+        sa.Column("options", sa.JSON()),
+        sa.Column("correct_answers", sa.JSON()),
+        sa.Column("max_score", sa.Integer()),
+        sa.Column("tags", sa.JSON()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), nullable=False),
+    )
+
+    op.create_table(
+        "exams",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("end_time", sa.DateTime(), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column("is_published", sa.Boolean()),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "exam_questions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("exam_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("exams.id"), nullable=False),
+        sa.Column("question_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("questions.id"), nullable=False),
+        sa.Column("order", sa.Integer(), nullable=False),
+    )
+
+    op.create_table(
+        "exam_attempts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("exam_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("exams.id"), nullable=False),
+        sa.Column("student_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("end_time", sa.DateTime()),
+        sa.Column("status", sa.String()),
+        sa.Column("total_score", sa.Integer()),
+        sa.Column("auto_saved_answers", sa.JSON()),
+    )
+
+    op.create_table(
+        "answers",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("attempt_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("exam_attempts.id"), nullable=False),
+        sa.Column("question_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("questions.id"), nullable=False),
+        sa.Column("answer", sa.JSON()),
+        sa.Column("score", sa.Integer()),
+        sa.Column("is_correct", sa.Boolean()),
+        sa.Column("graded_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("answers")
+    op.drop_table("exam_attempts")
+    op.drop_table("exam_questions")
+    op.drop_table("exams")
+    op.drop_table("questions")
+    op.drop_table("users")
+    sa.Enum(name="questiontype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=True)
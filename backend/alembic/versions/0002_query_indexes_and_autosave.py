@@ -0,0 +1,85 @@
+"""Query indexes, question search and buffered auto-save columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+Everything the schema gained on top of the create_all() baseline:
+
+- keyset pagination indexes on exams and questions, and foreign key
+  indexes on exam_questions and answers
+- question tags as JSONB (JSON null becomes SQL NULL) with a GIN index
+  for containment filters
+- the generated search_vector column, and pg_trgm for typo-tolerant
+  title matching
+- auto_saved_at and auto_save_seq for the write-behind auto-save buffer
+
+Converting tags and adding search_vector rewrite the questions table.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.alter_column(
+        "questions", "tags",
+        type_=postgresql.JSONB(none_as_null=True),
+        postgresql_using="nullif(tags::jsonb, 'null'::jsonb)",
+    )
+    op.add_column("questions", sa.Column(
+        "search_vector",
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    ))
+    op.create_index("ix_questions_created_at_id", "questions", ["created_at", "id"])
+    op.create_index("ix_questions_type_created_at_id", "questions", ["type", "created_at", "id"])
+    op.create_index("ix_questions_complexity_created_at_id", "questions", ["complexity", "created_at", "id"])
+    op.create_index(
+        "ix_questions_tags", "questions", ["tags"],
+        postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"},
+    )
+    op.create_index("ix_questions_search_vector", "questions", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_questions_title_trgm", "questions", ["title"],
+        postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+    op.create_index("ix_exams_created_at_id", "exams", ["created_at", "id"])
+    op.create_index("ix_exam_questions_exam_id", "exam_questions", ["exam_id"])
+    op.create_index("ix_exam_questions_question_id", "exam_questions", ["question_id"])
+    op.create_index("ix_answers_attempt_id", "answers", ["attempt_id"])
+
+    op.add_column("exam_attempts", sa.Column("auto_saved_at", sa.DateTime()))
+    op.add_column("exam_attempts", sa.Column("auto_save_seq", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("exam_attempts", "auto_save_seq")
+    op.drop_column("exam_attempts", "auto_saved_at")
+
+    op.drop_index("ix_answers_attempt_id", table_name="answers")
+    op.drop_index("ix_exam_questions_question_id", table_name="exam_questions")
+    op.drop_index("ix_exam_questions_exam_id", table_name="exam_questions")
+    op.drop_index("ix_exams_created_at_id", table_name="exams")
+
+    op.drop_index("ix_questions_title_trgm", table_name="questions")
+    op.drop_index("ix_questions_search_vector", table_name="questions")
+    op.drop_index("ix_questions_tags", table_name="questions")
+    op.drop_index("ix_questions_complexity_created_at_id", table_name="questions")
+    op.drop_index("ix_questions_type_created_at_id", table_name="questions")
+    op.drop_index("ix_questions_created_at_id", table_name="questions")
+    op.drop_column("questions", "search_vector")
+    op.alter_column("questions", "tags", type_=sa.JSON(), postgresql_using="tags::json")
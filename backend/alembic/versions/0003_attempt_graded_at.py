@@ -0,0 +1,32 @@
+"""Record when each attempt was graded
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+Attempts graded before this revision take the time of their latest graded
+answer, or their end time when they have no answers.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("exam_attempts", sa.Column("graded_at", sa.DateTime()))
+    op.execute(
+        "UPDATE exam_attempts SET graded_at = coalesce("
+        "(SELECT max(answers.graded_at) FROM answers WHERE answers.attempt_id = exam_attempts.id), end_time"
+        ") WHERE status = 'graded'"
+    )
+    op.create_index("ix_exam_attempts_exam_id_graded_at", "exam_attempts", ["exam_id", "graded_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_exam_attempts_exam_id_graded_at", table_name="exam_attempts")
+    op.drop_column("exam_attempts", "graded_at")
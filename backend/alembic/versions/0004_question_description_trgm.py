@@ -0,0 +1,26 @@
+"""Trigram index on question descriptions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+Serves the substring (ILIKE) match on descriptions in the question search.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_questions_description_trgm", "questions", ["description"],
+        postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_questions_description_trgm", table_name="questions")
@@ -0,0 +1,41 @@
+"""At most one attempt in progress per student and exam
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+Admission could create duplicate in-progress attempts when the same
+student was admitted by two workers at once. Before the unique index is
+built, each (exam, student) pair keeps the in-progress attempt saved to
+most recently (then the earliest started); the others are submitted as
+they stand, so grading still scores them.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE exam_attempts SET status = 'submitted', end_time = coalesce(end_time, timezone('utc', now())) "
+        "WHERE id IN ("
+        "SELECT id FROM ("
+        "SELECT id, row_number() OVER ("
+        "PARTITION BY exam_id, student_id "
+        "ORDER BY auto_saved_at DESC NULLS LAST, start_time, id"
+        ") AS rank FROM exam_attempts WHERE status = 'in_progress'"
+        ") AS ranked WHERE rank > 1"
+        ")"
+    )
+    op.create_index(
+        "ux_exam_attempts_in_progress", "exam_attempts", ["exam_id", "student_id"],
+        unique=True, postgresql_where="status = 'in_progress'",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_exam_attempts_in_progress", table_name="exam_attempts")
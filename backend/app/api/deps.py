@@ -1,27 +1,95 @@
+import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import verify_token
-from app.crud.user import get_user_by_email
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_async_db, get_db
+from app.core.security import decode_token
+from app.crud.user import get_user_by_email, get_user_by_email_async
+from app.schemas.user import Principal, User
+from app.services.principal_cache import principal_cache
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    email = verify_token(credentials.credentials)
-    if email is None:
+_MISSING = object()
+
+def _token_payload(credentials: HTTPAuthorizationCredentials) -> dict:
+    payload = decode_token(credentials.credentials)
+    if payload is None or payload.get("sub") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = get_user_by_email(db, email=email)
+    return payload
+
+def _require_active(user):
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
+    return user
+
+def _found(user):
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    return user
\ No newline at end of file
+    return _require_active(user)
+
+def _snapshot(user):
+    # Cache a detached snapshot, never the session-bound ORM object
+    return User.model_validate(user) if user is not None else None
+
+def _load_user(db: Session, email: str):
+    return _found(principal_cache.get_or_load(email, lambda: _snapshot(get_user_by_email(db, email=email))))
+
+async def _load_user_async(db: AsyncSession, email: str):
+    user = principal_cache.get(email, _MISSING)
+    if user is _MISSING:
+        user = _snapshot(await get_user_by_email_async(db, email))
+        principal_cache.set(email, user)
+    return _found(user)
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    return _load_user(db, _token_payload(credentials)["sub"])
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Like get_current_user, but for hot endpoints that only need id and role.
+
+    Runs on the event loop, and authorizes from signed token claims when
+    it can. Tokens without claims, issued too long ago or before the user
+    last changed, go through the cache and the async session.
+    """
+    payload = _token_payload(credentials)
+    email = payload["sub"]
+    if (
+        settings.AUTH_TOKEN_CLAIMS
+        and {"uid", "role", "active"} <= payload.keys()
+        and principal_cache.claims_trusted(email, payload.get("iat"))
+    ):
+        return _require_active(Principal(
+            id=uuid.UUID(payload["uid"]),
+            email=email,
+            role=payload["role"],
+            is_active=payload["active"]
+        ))
+    return await _load_user_async(db, email)
+
+async def is_admin_token(token: str) -> bool:
+    """Whether a raw bearer token belongs to an active admin; for middleware"""
+    payload = decode_token(token)
+    if payload is None or payload.get("sub") is None:
+        return False
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await _load_user_async(db, payload["sub"])
+        except HTTPException:
+            return False
+    return user.role == "admin"
@@ -1,66 +1,182 @@
+import logging
+import math
+import uuid
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from datetime import datetime
-from app.core.database import get_db
-from app.api.deps import get_current_user
-from app.schemas.attempt import  ExamAttemptCreate,ExamAttemptSchema
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.api.deps import get_current_principal, get_current_user
+from app.schemas.attempt import  ExamAttemptCreate,ExamAttemptSchema, AutoSavePatch
 from app.schemas.user import User
-from app.crud.attempt import  get_attempt, update_attempt
+from app.crud.attempt import get_attempt_async, submit_attempt_async
+from app.models.attempt import AttemptStatus
+from app.core.cache import TTLCache
+from app.services.admission import AdmissionRejected, ExamNotFound, attempt_admission
+from app.services.autosave import StaleSequenceError, autosave_buffer
+from app.services.grading_queue import grading_queue
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+_attempt_owners = TTLCache(max_entries=100_000, ttl_seconds=3600)
+_MISSING = object()
+
+def validate_attempt_id(attempt_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(attempt_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid attempt ID format")
+
 @router.post("/", response_model=ExamAttemptSchema)
-def start_exam_attempt(
+async def start_exam_attempt(
     attempt: ExamAttemptCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_principal)
 ):
     if current_user.role != "student":
         raise HTTPException(403, "Only students can attempt exams")
     
-    # Import the SQLAlchemy model
-    from app.models.attempt import ExamAttempt as ExamAttemptModel
+    try:
+        db_attempt = await attempt_admission.start(attempt.exam_id, current_user.id)
+    except ExamNotFound:
+        raise HTTPException(404, "Exam not found")
+    except AdmissionRejected as e:
+        # Overloaded: tell the student where they stand instead of failing
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Exam is starting, please wait", "position": e.position, "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
-    db_attempt = ExamAttemptModel(
-        exam_id=attempt.exam_id,
-        student_id=current_user.id,
-        start_time=datetime.utcnow(),
-        status="in_progress",
-        total_score=0
-    )
-    
-    db.add(db_attempt)
-    db.commit()
-    db.refresh(db_attempt)
+    # The student's first auto-save then needs no ownership lookup
+    _attempt_owners.set(str(db_attempt.id), db_attempt.student_id)
     return db_attempt
 
 
+async def _attempt_owner(db: AsyncSession, attempt_id: str):
+    # Ownership never changes, so remember it rather than reading the attempt on every save
+    owner = _attempt_owners.get(attempt_id, _MISSING)
+    if owner is _MISSING:
+        attempt = await get_attempt_async(db, attempt_id)
+        owner = attempt.student_id if attempt else None
+        _attempt_owners.set(attempt_id, owner)
+    return owner
+
 @router.post("/{attempt_id}/auto-save")
-def auto_save_answers(
+async def auto_save_answers(
     attempt_id: str,
     answers: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_principal)
 ):
-    attempt = get_attempt(db, attempt_id)
-    if not attempt or attempt.student_id != current_user.id:
+    attempt_id = str(validate_attempt_id(attempt_id))
+    if await _attempt_owner(db, attempt_id) != current_user.id:
         raise HTTPException(404, "Attempt not found")
     
-    update_attempt(db, attempt_id, {"auto_saved_answers": answers})
-    return {"message": "Answers auto-saved successfully"}
+    # Sequence numbers only go up; the client sends one past the highest it was acknowledged
+    seq = answers.pop("seq", None)
+    if seq is not None and (isinstance(seq, bool) or not isinstance(seq, int)):
+        raise HTTPException(400, "seq must be an integer")
+    
+    # Like patches, only read the attempt when this worker has not seen the
+    # client's last save: another worker may have stored a later one
+    stored_seq = 0
+    if seq is None or not await run_in_threadpool(autosave_buffer.follows, attempt_id, seq):
+        attempt = await get_attempt_async(db, attempt_id)
+        if attempt.status != AttemptStatus.IN_PROGRESS.value:
+            return _attempt_closed()
+        stored_seq = attempt.auto_save_seq or 0
+    try:
+        # Acknowledged from memory + journal; written to the database in the
+        # background. The journal write (and fsync) happens off the event loop.
+        acked_seq = await run_in_threadpool(
+            autosave_buffer.save, attempt_id, answers, seq=seq, stored_seq=stored_seq
+        )
+    except StaleSequenceError as e:
+        return _stale_sequence(e)
+    return {"message": "Answers auto-saved successfully", "acked_seq": acked_seq}
+
+@router.post("/{attempt_id}/auto-save/patch")
+async def auto_save_patch(
+    attempt_id: str,
+    patch: AutoSavePatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_principal)
+):
+    attempt_id = str(validate_attempt_id(attempt_id))
+    if await _attempt_owner(db, attempt_id) != current_user.id:
+        raise HTTPException(404, "Attempt not found")
+    
+    # Only read the stored state when this worker has not seen the client's last
+    # save. Asked off the event loop: the buffer's lock is held across journal writes.
+    stored = None
+    if not await run_in_threadpool(autosave_buffer.follows, attempt_id, patch.seq):
+        attempt = await get_attempt_async(db, attempt_id)
+        if attempt.status != AttemptStatus.IN_PROGRESS.value:
+            return _attempt_closed()
+        saved = attempt.auto_saved_answers or {}
+        stored = (dict(saved.get("answers") or {}), attempt.auto_save_seq or 0)
+    
+    try:
+        acked_seq = await run_in_threadpool(autosave_buffer.apply_patch, attempt_id, patch.seq, patch.answers, stored)
+    except StaleSequenceError as e:
+        return _stale_sequence(e)
+    return {"acked_seq": acked_seq}
+
+def _stale_sequence(e: StaleSequenceError) -> JSONResponse:
+    # The client resyncs with a full save numbered past acked_seq and every
+    # number it sent before, then patches on from there
+    return JSONResponse(
+        status_code=409,
+        content={"detail": "Out-of-order auto-save", "acked_seq": e.acked_seq}
+    )
+
+def _attempt_closed() -> JSONResponse:
+    # Would be dropped on its way to the database, so the client must not think it is saved
+    return JSONResponse(
+        status_code=409,
+        content={"detail": "Attempt is no longer in progress", "closed": True}
+    )
 
 @router.post("/{attempt_id}/submit")
-def submit_attempt(
+async def submit_attempt(
     attempt_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_principal)
 ):
-    attempt = get_attempt(db, attempt_id)
+    attempt_id = str(validate_attempt_id(attempt_id))
+    attempt = await get_attempt_async(db, attempt_id)
     if not attempt or attempt.student_id != current_user.id:
         raise HTTPException(404, "Attempt not found")
     
-    update_attempt(db, attempt_id, {
-        "end_time": datetime.utcnow(),
-        "status": "submitted"
-    })
-    return {"message": "Exam submitted successfully"}
\ No newline at end of file
+    if attempt.status != AttemptStatus.IN_PROGRESS.value:
+        # A retried submit; the first one already queued it for grading
+        return {"message": "Exam submitted successfully"}
+    
+    # Persist buffered saves before closing the attempt, or they could be
+    # written after it is graded
+    try:
+        await run_in_threadpool(autosave_buffer.flush)
+    except Exception:
+        logger.exception("Auto-save flush before submit failed")
+        retry_after = str(math.ceil(autosave_buffer.flush_interval))
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Could not save your answers, please submit again", "retry_after": int(retry_after)},
+            headers={"Retry-After": retry_after}
+        )
+    
+    # Only the request that closes the attempt queues it for grading
+    if await submit_attempt_async(db, attempt_id):
+        # Scored in the background; the attempt moves to "graded" when done
+        grading_queue.enqueue(attempt.id, attempt.exam_id)
+    # Later saves then read the attempt, find it closed and are refused
+    await run_in_threadpool(autosave_buffer.forget, attempt_id)
+    return {"message": "Exam submitted successfully"}
+
+@router.get("/grading/queue")
+def read_grading_queue(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(403, "Only admins can view the grading queue")
+    return {"depth": grading_queue.depth(), **grading_queue.stats()}
@@ -1,29 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import create_access_token, get_password_hash
-from app.crud.user import authenticate_user, create_user, get_user_by_email
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import create_access_token, get_password_hash, user_token_claims
+from app.crud.user import authenticate_user_async, create_user_async, get_user_by_email_async
 from app.schemas.user import UserCreate, Token, User
+from app.services.password_hashing import PasswordHasherBusy
 
 router = APIRouter()
 
+def _busy(e: PasswordHasherBusy) -> HTTPException:
+    # Clients back off for Retry-After instead of piling onto a saturated pool
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many logins at once, please retry shortly",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
 @router.post("/auth/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # OAuth2PasswordRequestForm has 'username' and 'password' fields
     # We treat 'username' as 'email' for our authentication
     print("user bf",form_data)
-    user = authenticate_user(db, form_data.username, form_data.password)  # Use username, not email
+    try:
+        user = await authenticate_user_async(db, form_data.username, form_data.password)  # Use username, not email
+    except PasswordHasherBusy as e:
+        raise _busy(e)
     print("user af",user)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
-    access_token = create_access_token(subject=user.email)
+    access_token = create_access_token(subject=user.email, claims=user_token_claims(user))
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -31,9 +43,9 @@ def login(
     }
 
 @router.post("/auth/register", response_model=Token)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    db_user = get_user_by_email(db, email=user_data.email)
+    db_user = await get_user_by_email_async(db, user_data.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -41,10 +53,14 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    user = create_user(db, user_data)
+    try:
+        # Awaits the hashing pool rather than holding a threadpool thread
+        user = await create_user_async(db, user_data)
+    except PasswordHasherBusy as e:
+        raise _busy(e)
     
     # Generate token
-    access_token = create_access_token(subject=user.email)
+    access_token = create_access_token(subject=user.email, claims=user_token_claims(user))
     return {
         "access_token": access_token,
         "token_type": "bearer",
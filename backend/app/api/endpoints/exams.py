@@ -1,23 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import uuid
-from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.core.database import AsyncSessionLocal, get_async_read_db, get_db, get_read_db
+from app.api.deps import get_current_principal, get_current_user
+from app.schemas.analytics import ExamAnalytics
 from app.schemas.exam import Exam, ExamCreate, ExamUpdate, ExamWithQuestions
 from app.schemas.user import User
-from app.crud.exam import create_exam, get_exams, get_exam_with_questions, update_exam, delete_exam
+from app.crud.exam import create_exam, get_exams, get_exam_question_ids, get_exam_with_questions_async, update_exam, delete_exam
+from app.crud.attempt import grade_exam_attempts
+from app.crud.pagination import CURSOR_HEADER, next_cursor
+from app.models.exam import Exam as ExamModel
+from app.services.autosave import autosave_buffer
+from app.services.exam_cache import exam_paper_cache, render_exam_paper
+from app.services.item_analytics import item_analytics
+from app.services.results_export import EXPORT_FORMATS, stream_exam_results
 
 router = APIRouter()
 
+async def _render_exam_paper(db: AsyncSession, exam_id: uuid.UUID) -> Optional[bytes]:
+    return render_exam_paper(await get_exam_with_questions_async(db, exam_id))
+
+async def _load_exam_paper(db: AsyncSession, exam_id: uuid.UUID) -> Optional[bytes]:
+    if exam_paper_cache.recently_changed(exam_id):
+        # The replica may not have this change yet, and the paper is about to be cached
+        async with AsyncSessionLocal() as primary:
+            return await _render_exam_paper(primary, exam_id)
+    return await _render_exam_paper(db, exam_id)
+
 @router.get("/", response_model=List[Exam])
 def read_exams(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    exams = get_exams(db, skip=skip, limit=limit)
+    try:
+        exams = get_exams(db, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    cursor = next_cursor(exams, limit)
+    if cursor:
+        response.headers[CURSOR_HEADER] = cursor
     return exams
 
 @router.post("/", response_model=Exam)
@@ -29,20 +57,21 @@ def create_new_exam(
     return create_exam(db, exam, current_user.id)
 
 @router.get("/{exam_id}", response_model=ExamWithQuestions)
-def read_exam(
+async def read_exam(
     exam_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_principal)
 ):
     try:
-        uuid.UUID(exam_id)
+        exam_uuid = uuid.UUID(exam_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid exam ID format")
     
-    exam = get_exam_with_questions(db, exam_id)
-    if exam is None:
+    # Serve the paper pre-serialized; concurrent misses render it once
+    paper = await exam_paper_cache.get_or_load_async(exam_uuid, lambda: _load_exam_paper(db, exam_uuid))
+    if paper is None:
         raise HTTPException(status_code=404, detail="Exam not found")
-    return exam
+    return Response(content=paper, media_type="application/json")
 
 @router.put("/{exam_id}", response_model=Exam)
 def update_existing_exam(
@@ -75,4 +104,71 @@ def delete_existing_exam(
     if not delete_exam(db, exam_id):
         raise HTTPException(status_code=404, detail="Exam not found")
     
-    return {"message": "Exam deleted successfully"}
\ No newline at end of file
+    return {"message": "Exam deleted successfully"}
+
+@router.post("/{exam_id}/grade")
+def grade_exam(
+    exam_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can grade exams")
+    try:
+        exam_uuid = uuid.UUID(exam_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid exam ID format")
+    if db.get(ExamModel, exam_uuid) is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    
+    # Grade the latest answers, not whatever the last background flush wrote
+    autosave_buffer.flush()
+    return grade_exam_attempts(db, exam_uuid)
+
+@router.get("/{exam_id}/analytics", response_model=ExamAnalytics)
+def read_exam_analytics(
+    exam_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view exam analytics")
+    try:
+        exam_uuid = uuid.UUID(exam_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid exam ID format")
+    
+    analytics = item_analytics.get(db, exam_uuid)
+    if analytics is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    return analytics
+
+@router.get("/{exam_id}/results/export")
+def export_exam_results(
+    exam_id: str,
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """One row per attempt with a score column per question.
+
+    CSV is sent as rows are read. An xlsx workbook can only be zipped once
+    its last row is written, so its first byte comes after the whole result
+    set has been read; allow for that in client and proxy timeouts on large
+    exams.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can export exam results")
+    try:
+        exam_uuid = uuid.UUID(exam_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid exam ID format")
+    if db.get(ExamModel, exam_uuid) is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    
+    # Rows are read and written while the response goes out, never all held at once
+    return StreamingResponse(
+        stream_exam_results(exam_uuid, get_exam_question_ids(db, exam_uuid), format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="exam-{exam_uuid}-results.{format}"'}
+    )
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import List
+from app.api.deps import get_current_user
+from app.core.profiling import profile_store
+from app.schemas.profile import ProfileInfo
+from app.schemas.user import User
+
+router = APIRouter()
+
+def _require_admin(current_user: User):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can read profiles")
+
+@router.get("/", response_model=List[ProfileInfo])
+def read_profiles(current_user: User = Depends(get_current_user)):
+    _require_admin(current_user)
+    return profile_store.list()
+
+@router.get("/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = Query("tree", pattern="^(tree|folded)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """The call tree as text, or collapsed stacks for flamegraph.pl / speedscope"""
+    _require_admin(current_user)
+    path = profile_store.path(profile_id, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}{profile_store.FORMATS[format]}")
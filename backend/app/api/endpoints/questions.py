@@ -1,40 +1,93 @@
-import os
+import shutil
 import tempfile
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.api.deps import get_current_user
-from app.schemas.question import Question, QuestionCreate, QuestionUpdate
+from app.schemas.question import Question, QuestionCreate, QuestionUpdate, QuestionSearchHit, QuestionFacets
 from app.schemas.user import User
-from app.crud.question import get_questions, create_question, get_question, update_question, delete_question
-from app.services.excel_parser import ExcelParser
+from app.crud.question import get_questions, search_questions, get_question_facets, create_question, get_question, update_question, delete_question
+from app.crud.pagination import CURSOR_HEADER, next_cursor
+from app.services.import_jobs import JobStatus, get_import_job_runner
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Question])
 def read_questions(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     type: Optional[str] = None,
     complexity: Optional[str] = None,
     tags: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    questions = get_questions(
-        db, 
-        skip=skip, 
-        limit=limit, 
-        search=search,
-        type=type,
-        complexity=complexity,
-        tags=tags
-    )
+    try:
+        questions = get_questions(
+            db, 
+            limit=limit, 
+            cursor=cursor,
+            search=search,
+            type=type,
+            complexity=complexity,
+            tags=tags
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The page body stays a plain list; the cursor for the next page rides in a header
+    cursor = next_cursor(questions, limit)
+    if cursor:
+        response.headers[CURSOR_HEADER] = cursor
     return questions
 
+@router.get("/search", response_model=List[QuestionSearchHit])
+def search_question_bank(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    type: Optional[str] = None,
+    complexity: Optional[str] = None,
+    tags: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        return search_questions(
+            db,
+            q,
+            limit=limit,
+            type=type,
+            complexity=complexity,
+            tags=tags
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/facets", response_model=QuestionFacets)
+def read_question_facets(
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    complexity: Optional[str] = None,
+    tags: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        return get_question_facets(
+            db,
+            search=search,
+            type=type,
+            complexity=complexity,
+            tags=tags
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/", response_model=Question)
 def create_new_question(
     question: QuestionCreate,  # Now this doesn't expect created_by
@@ -101,37 +154,32 @@ def delete_existing_question(
     delete_question(db, question_id)
     return {"message": "Question deleted successfully"}
 
-@router.post("/import")
+@router.post("/import", status_code=202)
 async def import_questions(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if not file.filename.endswith('.xlsx'):
         raise HTTPException(status_code=400, detail="Only Excel files are allowed")
     
-    # Save uploaded file temporarily
+    # Save uploaded file for the background job, which deletes it when done
     with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
-        content = await file.read()
-        temp_file.write(content)
+        await run_in_threadpool(shutil.copyfileobj, file.file, temp_file)
         temp_file_path = temp_file.name
     
-    try:
-        parser = ExcelParser()
-        questions_data = parser.parse_excel(temp_file_path)
-        
-        created_questions = []
-        for q_data in questions_data:
-            question_create = QuestionCreate(
-                **q_data,
-                created_by=current_user.id
-            )
-            question = create_question(db, question_create)
-            created_questions.append(question)
-        
-        return {"message": f"Successfully imported {len(created_questions)} questions"}
-    
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error importing questions: {str(e)}")
-    finally:
-        os.unlink(temp_file_path)
\ No newline at end of file
+    job_id = get_import_job_runner().submit(temp_file_path, file.filename, current_user.id)
+    return {
+        "job_id": job_id,
+        "status": JobStatus.QUEUED,
+        "message": "Import started"
+    }
+
+@router.get("/import/{job_id}")
+def read_import_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    job = get_import_job_runner().store.get(job_id)
+    if job is None or job["created_by"] != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
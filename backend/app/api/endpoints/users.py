@@ -1,11 +1,27 @@
-from fastapi import APIRouter, Depends
+import uuid
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.api.deps import get_current_user
-from app.schemas.user import User
+from app.crud.user import update_user
+from app.schemas.user import User, UserUpdate
 
 router = APIRouter()
 
 @router.get("/me", response_model=User)
 def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.patch("/{user_id}", response_model=User)
+def update_existing_user(
+    user_id: uuid.UUID,
+    user_update: UserUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can update users")
+    user = update_user(db, user_id, user_update.model_dump(exclude_unset=True))
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
\ No newline at end of file
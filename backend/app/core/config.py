@@ -1,5 +1,7 @@
+import os
+import tempfile
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Online Exam System"
@@ -11,20 +13,123 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
+    # Full URLs override the POSTGRES_* settings, e.g. sqlite:///./exam.db locally
+    DATABASE_URI: Optional[str] = None
+    # Read replica for read-heavy endpoints; unset means they read the primary
+    READ_DATABASE_URI: Optional[str] = None
+
+    # Connection pool (per worker process) and query limits
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+
+    # Per-request query instrumentation. DEBUG adds the query count and
+    # time to response headers; over-budget requests and statements
+    # repeated within one request (N+1 loops) are logged as warnings.
+    DEBUG: bool = False
+    QUERY_BUDGET: int = 30
+    # Budgets for specific routes, keyed like "GET /api/v1/exams/"
+    QUERY_BUDGETS: Dict[str, int] = {}
+    QUERY_REPEAT_WARNING: int = 10
+
+    # Prometheus metrics on /metrics. For several workers also set the
+    # PROMETHEUS_MULTIPROC_DIR environment variable to an empty directory.
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_INTERVAL_SECONDS: float = 5.0
+
+    # Sampling profiler for production requests. Admins profile a request
+    # with the X-Profile: 1 header; a sample rate above 0 also profiles that
+    # share of all requests. Nothing is installed while disabled.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_DIR: str = os.path.join(tempfile.gettempdir(), "exam_system_profiles")
+    PROFILING_MAX_FILES: int = 200
 
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
 
+    # Authenticated users cached by token subject
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    # Sign user id, role and active flag into tokens so hot endpoints can
+    # authorize without the users table. Claims are trusted for
+    # AUTH_TOKEN_CLAIMS_MAX_AGE_SECONDS after login, then requests go through
+    # the cache above; that is how long other workers can miss a role change
+    # or deactivation.
+    AUTH_TOKEN_CLAIMS: bool = False
+    AUTH_TOKEN_CLAIMS_MAX_AGE_SECONDS: int = 300
+
+    # Argon2 hashing process pool; 0 workers hashes on the request thread
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 10.0
+
+    # Rendered exam papers served by GET /exams/{id}
+    EXAM_CACHE_MAX_ENTRIES: int = 256
+    EXAM_CACHE_TTL_SECONDS: int = 300
+    # Exams whose own cache version is remembered; 404s are cached this briefly
+    EXAM_CACHE_MAX_VERSIONS: int = 10000
+    EXAM_CACHE_MISSING_TTL_SECONDS: int = 5
+    # Papers changed this recently are rendered from the primary, not the replica
+    EXAM_CACHE_REPLICA_LAG_SECONDS: int = 10
+    # Exams starting within the lead time are rendered into the cache ahead of time
+    EXAM_PREWARM_LEAD_SECONDS: int = 300
+    EXAM_PREWARM_INTERVAL_SECONDS: int = 30
+    # Pre-warmed papers come from the replica and are not invalidated by edits
+    # made through other workers; they are served at most this long
+    EXAM_PREWARM_TTL_SECONDS: int = 60
+
+    # Admission control for starting attempts (per worker process)
+    ADMISSION_WORKERS: int = 4
+    ADMISSION_BATCH_SIZE: int = 200
+    ADMISSION_MAX_WAITING: int = 2000
+    ADMISSION_WAIT_TIMEOUT_SECONDS: float = 10.0
+
+    # Background question imports
+    IMPORT_JOB_DB_PATH: str = os.path.join(tempfile.gettempdir(), "exam_system_import_jobs.sqlite3")
+    IMPORT_PARSE_WORKERS: int = 2
+    IMPORT_MAX_CONCURRENT_JOBS: int = 2
+    IMPORT_CHUNK_SIZE: int = 5000
+
+    # Write-behind buffer for attempt auto-saves
+    AUTOSAVE_JOURNAL_DIR: str = os.path.join(tempfile.gettempdir(), "exam_system_autosave")
+    AUTOSAVE_FLUSH_INTERVAL_SECONDS: float = 2.0
+    AUTOSAVE_JOURNAL_FSYNC: bool = False
+    AUTOSAVE_MAX_TRACKED_ATTEMPTS: int = 50000
+
+    # Background grading of submitted attempts
+    GRADING_WORKERS: int = 2
+    GRADING_BATCH_SIZE: int = 500
+    GRADING_MAX_RETRIES: int = 3
+    GRADING_RETRY_DELAY_SECONDS: float = 1.0
+
+    # Per-exam item analytics matrices kept in memory between requests
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 256
+    ANALYTICS_CACHE_TTL_SECONDS: int = 3600
+
+    # Streamed result exports: rows per server-side cursor fetch
+    EXPORT_BATCH_SIZE: int = 1000
+
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
     @property
     def DATABASE_URL(self) -> str:
+        if self.DATABASE_URI:
+            return self.DATABASE_URI
         return (
             f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
             f"@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def READ_DATABASE_URL(self) -> str:
+        return self.READ_DATABASE_URI or self.DATABASE_URL
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,10 +1,115 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_SECONDS
+from app.core.query_stats import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
+# Drivers for the async engines, by backend
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.metrics_label).observe(time.perf_counter() - started)
+
+
+class _TimedAsyncQueuePool(_TimedQueuePool, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _engine_kwargs(url: str, read_only: bool, is_async: bool) -> dict:
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        kwargs = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+        if not is_async:
+            kwargs["connect_args"] = {"check_same_thread": False}
+        return kwargs
+
+    server_settings = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    if read_only:
+        server_settings["default_transaction_read_only"] = "on"
+    if is_async:
+        connect_args = {"server_settings": server_settings}
+    else:
+        options = " ".join(f"-c {name}={value}" for name, value in server_settings.items())
+        connect_args = {"options": options} if options else {}
+    return {
+        "poolclass": _TimedAsyncQueuePool if is_async else _TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+def _sqlite_query_only(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _query_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+
+def create_db_engine(url: str, read_only: bool = False, **overrides):
+    """Engine with the pool and timeout settings from Settings.
+
+    Postgres gets the configured pool and a server-side statement timeout.
+    SQLite (a local stand-in for primary and replica) keeps its default
+    pool. A read-only engine refuses writes at the connection level on
+    both, so a query routed to the replica by mistake fails loudly instead
+    of writing to whatever the replica URL points at.
+    """
+    engine = create_engine(url, **{**_engine_kwargs(url, read_only, is_async=False), **overrides})
+    if read_only and engine.dialect.name == "sqlite":
+        _sqlite_query_only(engine)
+    instrument_engine(engine)
+    return engine
+
+
+def create_async_db_engine(url: str, read_only: bool = False, **overrides):
+    """Async counterpart of create_db_engine, on asyncpg (or aiosqlite)"""
+    url = make_url(url)
+    url = url.set(drivername=_ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+    engine = create_async_engine(url, **{**_engine_kwargs(str(url), read_only, is_async=True), **overrides})
+    if read_only and engine.dialect.name == "sqlite":
+        _sqlite_query_only(engine.sync_engine)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+engine = create_db_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Without a replica configured, reads share the primary's engine and pool
+read_engine = create_db_engine(settings.READ_DATABASE_URL, read_only=True) if settings.READ_DATABASE_URI else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Async engines for the hot endpoints. They keep their own pools, so each
+# worker can hold up to twice the configured pool size in connections.
+async_engine = create_async_db_engine(settings.DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async_read_engine = (
+    create_async_db_engine(settings.READ_DATABASE_URL, read_only=True) if settings.READ_DATABASE_URI else async_engine
+)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -12,4 +117,24 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Session on the read replica, for endpoints that never write.
+
+    Replicas lag the primary slightly, so don't use this where a client
+    must see its own write straight away.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from starlette.routing import Match
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# With several uvicorn workers each process writes its samples to files in
+# this directory and /metrics merges them, whichever worker serves the
+# scrape. It must exist and be emptied before the workers start.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being served",
+    ["method", "route"], multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out",
+    ["engine"], multiprocess_mode="livesum"
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time a worker spends hashing or verifying one password",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "password_hash_queue_wait_seconds", "Time a password waits for a hashing worker",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30)
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups", "Cache lookups; hit ratio is rate(hit) / rate(all)",
+    ["cache", "result"]
+)
+QUEUE_DEPTH = Gauge(
+    "queue_depth", "Work waiting in background queues",
+    ["queue"], multiprocess_mode="livesum"
+)
+
+
+def route_label(scope) -> str:
+    """Path template of the route serving the request, so ids don't explode the label set"""
+    partial = None
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """Records latency and in-flight requests per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method, route = scope["method"], route_label(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.labels(method, route, str(status)).observe(time.perf_counter() - started)
+            in_progress.dec()
+
+
+class MetricsSampler:
+    """Copies service state (queue depths, cache counters, pool usage)
+    into metrics every interval.
+
+    Each worker samples its own state; in multiprocess mode the gauges are
+    summed across the live workers. Cache hit/miss totals are turned into
+    counter increments, so they survive worker restarts like any counter.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._queues: List[Tuple[str, Callable[[], int]]] = []
+        self._caches: List[Tuple[str, Callable[[], dict]]] = []
+        self._pools: List[Tuple[str, object]] = []
+        self._seen: Dict[Tuple[str, str], int] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def queue(self, name: str, depth: Callable[[], int]) -> None:
+        self._queues.append((name, depth))
+
+    def cache(self, name: str, stats: Callable[[], dict]) -> None:
+        self._caches.append((name, stats))
+
+    def pool(self, name: str, engine) -> None:
+        self._pools.append((name, engine))
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        if MULTIPROC_DIR:
+            # Drop this worker's live gauges from the merged view
+            multiprocess.mark_process_dead(os.getpid())
+
+    def sample(self) -> None:
+        for name, depth in self._queues:
+            QUEUE_DEPTH.labels(name).set(depth())
+        for name, stats in self._caches:
+            stats = stats()
+            for result, key in (("hit", "hits"), ("miss", "misses")):
+                total = stats[key]
+                CACHE_LOOKUPS.labels(name, result).inc(max(total - self._seen.get((name, result), 0), 0))
+                self._seen[(name, result)] = total
+        for name, engine in self._pools:
+            checkedout = getattr(engine.pool, "checkedout", None)
+            if checkedout is not None:
+                DB_POOL_CHECKED_OUT.labels(name).set(checkedout())
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("Sampling metrics failed")
+            if self._stop.wait(self.interval):
+                return
+
+
+metrics_sampler = MetricsSampler(interval=settings.METRICS_SAMPLE_INTERVAL_SECONDS)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus text exposition for this worker, or for all of them in multiprocess mode"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
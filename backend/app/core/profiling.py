@@ -0,0 +1,283 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import Context, ContextVar
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_Stack = Tuple[str, ...]
+
+# Set while a request is being profiled; threadpool work inherits it
+_active: ContextVar[Optional["RequestSampler"]] = ContextVar("active_profile", default=None)
+
+
+_labels: Dict[Any, str] = {}
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        # Relative to the import root, e.g. app/crud/exam.py or sqlalchemy/orm/query.py
+        roots = {os.path.abspath(path or os.curdir) for path in sys.path}
+        for root in sorted(roots, key=len, reverse=True):
+            if filename.startswith(root + os.sep):
+                filename = filename[len(root) + 1:]
+                break
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+class RequestSampler:
+    """Samples the stacks of one request every interval seconds.
+
+    A request's work is spread over the event loop thread (while its task
+    is running), threadpool threads (sync endpoints and dependencies,
+    recognised by the context they run in) and time spent suspended in an
+    await. Each sample takes whichever of these is current; awaits are
+    recorded as the task's coroutine chain ending in an "[await]" frame.
+    """
+
+    def __init__(self, interval: float, root_code):
+        self.interval = interval
+        self.root_code = root_code
+        self.samples: Counter = Counter()
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._loop_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            stacks = self._sample()
+            if self._stop.is_set():
+                break  # the request is over; this caught the middleware stopping us
+            for stack in stacks:
+                self.samples[stack] += 1
+
+    def _sample(self) -> List[_Stack]:
+        frames = sys._current_frames()
+        if asyncio.current_task(self._loop) is self._task and self._loop_thread in frames:
+            return [self._trim(self._thread_stack(frames[self._loop_thread]))]
+
+        in_threads = []
+        for ident, frame in frames.items():
+            if ident in (self._loop_thread, threading.get_ident()):
+                continue
+            stack = self._worker_stack(frame)
+            if stack:
+                in_threads.append(stack)
+        if in_threads:
+            return in_threads
+        frames, waiting_on = self._await_stack()
+        return [self._trim(frames) + (f"[await {waiting_on}]",)]
+
+    def _trim(self, frames: List[Any]) -> _Stack:
+        # Start at this middleware; the server and event loop frames below it are noise
+        for index, frame in enumerate(frames):
+            if frame.f_code is self.root_code:
+                frames = frames[index + 1:]
+                break
+        return tuple(_label(frame) for frame in frames)
+
+    @staticmethod
+    def _thread_stack(frame) -> List[Any]:
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        return frames
+
+    def _worker_stack(self, frame) -> Optional[_Stack]:
+        # Threadpool workers hold the Context they run the call in as a
+        # local near the bottom of their stack
+        frames = self._thread_stack(frame)
+        for index, candidate in enumerate(frames[:4]):
+            for value in list(candidate.f_locals.values()):
+                if isinstance(value, Context) and value.get(_active) is self:
+                    return tuple(_label(f) for f in frames[index + 1:])
+        return None
+
+    def _await_stack(self) -> Tuple[List[Any], str]:
+        """The suspended task's coroutine chain, and what its innermost await is waiting on"""
+        frames, awaitable = [], self._task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                return frames, type(awaitable).__name__
+            frames.append(frame)
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        return frames, "event"
+
+
+class ProfileStore:
+    """Profiles on local disk, newest max_files kept.
+
+    Each profile is three files sharing an id: <id>.json (metadata),
+    <id>.txt (call tree) and <id>.folded (collapsed stacks for
+    flamegraph.pl or speedscope).
+    """
+
+    FORMATS = {"tree": ".txt", "folded": ".folded"}
+
+    def __init__(self, directory: str, max_files: int = 200):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, meta: Dict[str, Any], samples: Counter, interval: float) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, meta["id"])
+        with open(base + ".folded", "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{';'.join(stack) or '<idle>'} {count}\n")
+        with open(base + ".txt", "w") as f:
+            f.write(f"{meta['method']} {meta['path']} {meta['status']} in {meta['duration_ms']:.1f} ms, "
+                    f"{meta['samples']} samples every {interval * 1000:g} ms\n\n")
+            f.write(render_call_tree(samples))
+        # Written last: a profile is listed only once it is complete
+        with open(base + ".json", "w") as f:
+            json.dump(meta, f)
+        self._rotate()
+
+    def _rotate(self) -> None:
+        with self._lock:
+            profiles = self._profiles()
+            for meta in profiles[:max(len(profiles) - self.max_files, 0)]:
+                base = os.path.join(self.directory, meta["id"])
+                for suffix in (".json", *self.FORMATS.values()):
+                    try:
+                        os.remove(base + suffix)
+                    except FileNotFoundError:
+                        pass
+
+    def _profiles(self) -> List[Dict[str, Any]]:
+        # Oldest first by the recorded creation time; file mtimes can tie
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    with open(entry.path) as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # rotated away while listing
+        return sorted(profiles, key=lambda meta: meta["created_at"])
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        return self._profiles()[::-1]
+
+    def path(self, profile_id: str, format: str) -> Optional[str]:
+        try:
+            profile_id = str(uuid.UUID(profile_id))
+        except ValueError:
+            return None
+        path = os.path.join(self.directory, profile_id + self.FORMATS[format])
+        return path if os.path.exists(path) else None
+
+
+def render_call_tree(samples: Counter) -> str:
+    tree: Dict[str, Any] = {}
+    total = sum(samples.values())
+    for stack, count in samples.items():
+        node = tree
+        for frame in stack:
+            child = node.setdefault(frame, {"count": 0, "children": {}})
+            child["count"] += count
+            node = child["children"]
+
+    lines = []
+
+    def walk(children: Dict[str, Any], depth: int) -> None:
+        for frame, child in sorted(children.items(), key=lambda item: -item[1]["count"]):
+            lines.append(f"{child['count'] / total * 100:6.1f}% {child['count']:>6}  {'  ' * depth}{frame}")
+            walk(child["children"], depth + 1)
+
+    walk(tree, 0)
+    return "\n".join(lines) + "\n"
+
+
+class ProfilingMiddleware:
+    """Profiles requests that ask for it with the X-Profile header (admins
+    only) and a random PROFILING_SAMPLE_RATE share of the rest.
+
+    Only installed when PROFILING_ENABLED is set, so it costs nothing
+    otherwise. Profiled responses carry X-Profile-Id; the profiles are
+    listed and downloaded through /profiles.
+    """
+
+    def __init__(self, app, store: ProfileStore, is_admin: Callable[[str], Awaitable[bool]]):
+        self.app = app
+        self.store = store
+        self.is_admin = is_admin
+
+    async def _wants_profile(self, scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER.lower().encode()) in (b"1", b"true"):
+            scheme, _, token = headers.get(b"authorization", b"").decode().partition(" ")
+            if scheme.lower() == "bearer" and token and await self.is_admin(token):
+                return True
+        return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not await self._wants_profile(scope):
+            return await self.app(scope, receive, send)
+
+        profile_id = str(uuid.uuid4())
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())
+                ]
+            await send(message)
+
+        sampler = RequestSampler(settings.PROFILING_INTERVAL_MS / 1000, ProfilingMiddleware.__call__.__code__)
+        token = _active.set(sampler)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            _active.reset(token)
+            meta = {
+                "id": profile_id,
+                "created_at": datetime.utcnow().isoformat(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": (time.perf_counter() - started) * 1000,
+                "samples": sum(sampler.samples.values()),
+            }
+            # Off the event loop; writing a large profile takes a while
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.store.save, meta, sampler.samples, sampler.interval
+            )
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, max_files=settings.PROFILING_MAX_FILES)
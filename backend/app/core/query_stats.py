@@ -0,0 +1,137 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+
+# Literals vary between the rows of an N+1 loop; the statement shape doesn't
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryStats:
+    """Statements one request (or test block) sent to the database"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[_LITERALS.sub("?", " ".join(statement.split()))] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements run at least threshold times, the usual sign of an N+1"""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} queries in {self.seconds * 1000:.1f} ms"]
+        lines += [f"  {n:>4} x {statement[:200]}" for statement, n in self.statements.most_common()]
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the queries made inside the block, including in threadpool
+    helpers and AsyncSession greenlets started from it"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None and conn.info.get("query_started"):
+        stats.record(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+
+def instrument_engine(engine) -> None:
+    """Attribute the engine's queries to the tracked request, if any.
+
+    Untracked queries (background workers, scripts) pay one ContextVar
+    lookup each. Pass an AsyncEngine's sync_engine.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """Counts queries and database time per request.
+
+    In DEBUG the totals go out as response headers. A request over its
+    route's query budget (QUERY_BUDGETS, keyed like "GET /api/v1/exams/",
+    else QUERY_BUDGET) logs a warning with the statements it ran, as does
+    any statement repeated QUERY_REPEAT_WARNING times.
+
+    The headers are written when the response starts, so they leave out
+    queries made while streaming a body or in dependency teardown; the
+    warnings see everything.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # endpoint function -> "METHOD /path/{template}", filled on first sight
+        self._routes: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with track_queries() as stats:
+            async def send_with_headers(message):
+                if message["type"] == "http.response.start" and settings.DEBUG:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()),
+                        (QUERY_TIME_HEADER.lower().encode(), f"{stats.seconds * 1000:.1f}".encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_headers)
+            finally:
+                self._check(scope, stats)
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return f"{scope['method']} {scope['path']}"
+        if endpoint not in self._routes:
+            template = next(
+                (route.path for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint),
+                scope["path"]
+            )
+            self._routes[endpoint] = template
+        return f"{scope['method']} {self._routes[endpoint]}"
+
+    def _check(self, scope, stats: QueryStats) -> None:
+        if not stats.count:
+            return
+        route = self._route(scope)
+        budget = settings.QUERY_BUDGETS.get(route, settings.QUERY_BUDGET)
+        if stats.count > budget:
+            logger.warning("%s ran %d queries, over its budget of %d\n%s", route, stats.count, budget, stats.report())
+        for statement, n in stats.repeated(settings.QUERY_REPEAT_WARNING):
+            logger.warning("%s ran the same statement %d times (possible N+1): %s", route, n, statement[:200])
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
@@ -7,26 +7,39 @@ from app.core.config import settings
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    claims: Optional[Dict[str, Any]] = None
+) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "iat": datetime.utcnow(), "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def user_token_claims(user: Any) -> Optional[Dict[str, Any]]:
+    """Signed claims that let hot endpoints authorize from the token alone"""
+    if not settings.AUTH_TOKEN_CLAIMS:
+        return None
+    return {"uid": str(user.id), "role": getattr(user.role, "value", user.role), "active": bool(user.is_active)}
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def verify_token(token: str) -> Union[str, None]:
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except jwt.JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def verify_token(token: str) -> Union[str, None]:
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
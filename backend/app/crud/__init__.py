@@ -1,11 +1,13 @@
-from .user import get_user_by_email, create_user, authenticate_user
+from .user import get_user_by_email, create_user, authenticate_user, get_user_by_email_async, authenticate_user_async
 from .question import get_questions, create_question, get_question
-from .exam import create_exam, get_exams, get_exam_with_questions
-from .attempt import create_attempt, get_attempt, update_attempt
+from .exam import create_exam, get_exams, get_exam_with_questions, get_exam_with_questions_async
+from .attempt import create_attempt, get_attempt, update_attempt, get_attempt_async, update_attempt_async, submit_attempt_async
 
 __all__ = [
     "get_user_by_email", "create_user", "authenticate_user",
+    "get_user_by_email_async", "authenticate_user_async",
     "get_questions", "create_question", "get_question",
-    "create_exam", "get_exams", "get_exam_with_questions",
-    "create_attempt", "get_attempt", "update_attempt"
+    "create_exam", "get_exams", "get_exam_with_questions", "get_exam_with_questions_async",
+    "create_attempt", "get_attempt", "update_attempt", "get_attempt_async", "update_attempt_async",
+    "submit_attempt_async"
 ]
\ No newline at end of file
@@ -1,5 +1,27 @@
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.attempt import ExamAttempt
+from app.models.attempt import Answer, AttemptStatus, ExamAttempt
+from app.models.exam import ExamQuestion
+from app.models.question import Question, QuestionType
+from app.models.user import User
+from app.services.grading import AnswerKey, GradingService
+
+_attempts = ExamAttempt.__table__
+
+_GRADED_ATTEMPT_UPDATE = (
+    update(_attempts)
+    .where(_attempts.c.id == bindparam("attempt_id"))
+    .values(
+        total_score=bindparam("total_score"),
+        status=AttemptStatus.GRADED.value,
+        graded_at=bindparam("graded_at")
+    )
+)
 
 
 def create_attempt(db: Session, attempt_data: dict):
@@ -26,4 +48,156 @@ def update_attempt(db: Session, attempt_id: str, updates: dict):
             setattr(db_attempt, key, value)
         db.commit()
         db.refresh(db_attempt)
-    return db_attempt
\ No newline at end of file
+    return db_attempt
+
+async def get_attempt_async(db: AsyncSession, attempt_id: str):
+    result = await db.execute(select(ExamAttempt).where(ExamAttempt.id == uuid.UUID(str(attempt_id))))
+    return result.scalar_one_or_none()
+
+async def update_attempt_async(db: AsyncSession, attempt_id: str, updates: dict):
+    db_attempt = await get_attempt_async(db, attempt_id)
+    if db_attempt:
+        for key, value in updates.items():
+            setattr(db_attempt, key, value)
+        await db.commit()
+        await db.refresh(db_attempt)
+    return db_attempt
+
+async def submit_attempt_async(db: AsyncSession, attempt_id: str) -> bool:
+    """Close an attempt in progress; False if it was already submitted"""
+    result = await db.execute(
+        update(ExamAttempt)
+        .where(ExamAttempt.id == uuid.UUID(str(attempt_id)), ExamAttempt.status == AttemptStatus.IN_PROGRESS.value)
+        .values(end_time=datetime.utcnow(), status=AttemptStatus.SUBMITTED.value)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+def _saved_answers(saved: Any) -> Dict[str, Any]:
+    # The client auto-saves {"answers": {question_id: answer}}
+    if isinstance(saved, dict) and isinstance(saved.get("answers"), dict):
+        return saved["answers"]
+    return saved if isinstance(saved, dict) else {}
+
+def grade_exam_attempts(
+    db: Session,
+    exam_id: uuid.UUID,
+    attempt_ids: Optional[Sequence[uuid.UUID]] = None,
+    chunk_size: int = 2000
+):
+    """Grade an exam's submitted attempts in bulk, in a single transaction.
+    
+    Attempts still in progress are left alone. The answer key is compiled
+    once and each chunk of attempts is scored in one vectorized pass.
+    Answer rows for the graded attempts are replaced, so grading the same
+    attempts again is safe, and attempts are row-locked so concurrent
+    graders never score the same one twice.
+    """
+    started = time.perf_counter()
+    questions = (
+        db.query(Question)
+        .join(ExamQuestion, ExamQuestion.question_id == Question.id)
+        .filter(ExamQuestion.exam_id == exam_id)
+        .order_by(ExamQuestion.order)
+        .all()
+    )
+    key = AnswerKey(questions)
+    columns = {question_id: column for column, question_id in enumerate(key.question_ids)}
+    manual = [question_type not in (QuestionType.SINGLE_CHOICE, QuestionType.MULTI_CHOICE) for question_type in key.types]
+    
+    query = db.query(ExamAttempt.id).filter(
+        ExamAttempt.exam_id == exam_id,
+        ExamAttempt.status == AttemptStatus.SUBMITTED.value
+    )
+    if attempt_ids is not None:
+        query = query.filter(ExamAttempt.id.in_(attempt_ids))
+    # Attempts another grader has locked are left to it
+    ids = [attempt_id for attempt_id, in query.with_for_update(skip_locked=True).all()]
+    
+    graded_at = datetime.utcnow()
+    answers_written = 0
+    try:
+        for start in range(0, len(ids), chunk_size):
+            chunk_ids = ids[start:start + chunk_size]
+            rows = db.query(ExamAttempt.id, ExamAttempt.auto_saved_answers).filter(ExamAttempt.id.in_(chunk_ids)).all()
+            answer_sets = [_saved_answers(saved) for _, saved in rows]
+            scores, correct = GradingService.grade_batch(key, answer_sets)
+            totals = scores.sum(axis=1).tolist()
+            scores, correct = scores.tolist(), correct.tolist()
+            
+            answer_rows: List[dict] = []
+            for row, ((attempt_id, _), answers) in enumerate(zip(rows, answer_sets)):
+                for question_id, value in answers.items():
+                    column = columns.get(question_id)
+                    if column is None or value is None:
+                        continue
+                    answer_rows.append({
+                        "attempt_id": attempt_id,
+                        "question_id": uuid.UUID(question_id),
+                        "answer": value,
+                        "score": scores[row][column],
+                        # Text and image answers wait for manual grading
+                        "is_correct": None if manual[column] else correct[row][column],
+                        "graded_at": graded_at
+                    })
+            
+            db.execute(delete(Answer).where(Answer.attempt_id.in_(chunk_ids)))
+            if answer_rows:
+                db.execute(insert(Answer), answer_rows)
+            db.execute(_GRADED_ATTEMPT_UPDATE, [
+                {"attempt_id": attempt_id, "total_score": total, "graded_at": graded_at}
+                for (attempt_id, _), total in zip(rows, totals)
+            ])
+            answers_written += len(answer_rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    elapsed = time.perf_counter() - started
+    return {
+        "attempts": len(ids),
+        "questions": len(key),
+        "answers": answers_written,
+        "elapsed_seconds": round(elapsed, 3),
+        "attempts_per_second": round(len(ids) / elapsed, 1) if elapsed else None
+    }
+
+def graded_attempts_marker(db: Session, exam_id: uuid.UUID):
+    """(graded attempts, latest graded_at) for an exam; changes whenever grading does"""
+    return db.execute(
+        select(func.count(ExamAttempt.id), func.max(ExamAttempt.graded_at)).where(
+            ExamAttempt.exam_id == exam_id,
+            ExamAttempt.status == AttemptStatus.GRADED.value
+        )
+    ).one()
+
+def graded_answer_rows(db: Session, exam_id: uuid.UUID, graded_since: Optional[datetime] = None):
+    """Plain (attempt_id, total_score, question_id, answer, score) rows for an
+    exam's graded attempts, one per answer and one with empty answer columns
+    for attempts without answers"""
+    query = select(
+        ExamAttempt.id, ExamAttempt.total_score, Answer.question_id, Answer.answer, Answer.score
+    ).select_from(ExamAttempt).outerjoin(Answer, Answer.attempt_id == ExamAttempt.id).where(
+        ExamAttempt.exam_id == exam_id,
+        ExamAttempt.status == AttemptStatus.GRADED.value
+    )
+    if graded_since is not None:
+        query = query.where(ExamAttempt.graded_at >= graded_since)
+    return db.execute(query).all()
+
+def exam_result_rows(db: Session, exam_id: uuid.UUID, batch_size: int = 1000):
+    """Every attempt at an exam with its student, one row per answer, streamed.
+
+    Rows come (attempt_id, full_name, email, status, start_time, end_time,
+    graded_at, total_score, question_id, score), an attempt's rows together,
+    through a server-side cursor read batch_size rows at a time. Attempts
+    without answers have one row with empty answer columns.
+    """
+    query = select(
+        ExamAttempt.id, User.full_name, User.email, ExamAttempt.status, ExamAttempt.start_time,
+        ExamAttempt.end_time, ExamAttempt.graded_at, ExamAttempt.total_score, Answer.question_id, Answer.score
+    ).join(User, User.id == ExamAttempt.student_id).outerjoin(
+        Answer, Answer.attempt_id == ExamAttempt.id
+    ).where(ExamAttempt.exam_id == exam_id).order_by(ExamAttempt.start_time, ExamAttempt.id)
+    return db.execute(query.execution_options(yield_per=batch_size))
@@ -1,9 +1,26 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from typing import List, Optional, Union
 import uuid
 from app.models.exam import Exam, ExamQuestion
 from app.models.question import Question
 from app.schemas.exam import ExamCreate, ExamUpdate
+from app.crud.pagination import keyset_page
+from app.services.exam_cache import exam_paper_cache
+
+def _add_exam_questions(db: Session, exam_id, question_ids: List[uuid.UUID]) -> int:
+    # Verify all questions exist in one query instead of one lookup per id
+    existing = {
+        id for (id,) in db.query(Question.id).filter(Question.id.in_(question_ids))
+    }
+    exam_questions = [
+        ExamQuestion(exam_id=exam_id, question_id=question_id, order=order)
+        for order, question_id in enumerate(question_ids)
+        if question_id in existing
+    ]
+    db.add_all(exam_questions)
+    return len(exam_questions)
 
 def create_exam(db: Session, exam: ExamCreate, created_by: uuid.UUID):
     # Create the exam
@@ -17,48 +34,40 @@ def create_exam(db: Session, exam: ExamCreate, created_by: uuid.UUID):
         created_by=created_by
     )
     db.add(db_exam)
-    db.commit()
-    db.refresh(db_exam)
+    db.flush()
     
-    # Add questions to exam
-    for order, question_id in enumerate(exam.question_ids):
-        # Verify question exists
-        question = db.query(Question).filter(Question.id == question_id).first()
-        if question:
-            exam_question = ExamQuestion(
-                exam_id=db_exam.id,
-                question_id=question_id,
-                order=order
-            )
-            db.add(exam_question)
+    # Add questions to exam in the same transaction
+    question_count = _add_exam_questions(db, db_exam.id, exam.question_ids)
     
     db.commit()
     db.refresh(db_exam)
+    db_exam.question_count = question_count
     return db_exam
 
-def get_exams(db: Session, skip: int = 0, limit: int = 100):
-    exams = db.query(Exam).order_by(Exam.created_at.desc()).offset(skip).limit(limit).all()
+def get_exams(db: Session, limit: int = 100, cursor: Optional[str] = None):
+    # Count questions with a correlated subquery so the whole page is one query
+    question_count = select(func.count(ExamQuestion.id)).where(
+        ExamQuestion.exam_id == Exam.id
+    ).correlate(Exam).scalar_subquery()
     
-    # Add question count to each exam
-    for exam in exams:
-        exam.question_count = db.query(ExamQuestion).filter(ExamQuestion.exam_id == exam.id).count()
+    rows = keyset_page(db.query(Exam, question_count), Exam, limit, cursor).all()
     
+    exams = []
+    for exam, count in rows:
+        exam.question_count = count
+        exams.append(exam)
     return exams
 
-def get_exam_with_questions(db: Session, exam_id: str):
-    exam = db.query(Exam).filter(Exam.id == exam_id).first()
-    if not exam:
-        return None
-    
-    # Get the actual Question objects, not ExamQuestion objects
-    questions = db.query(Question).join(
+def _exam_questions_query(exam_id: str):
+    # The actual Question objects, not ExamQuestion objects
+    return select(Question).join(
         ExamQuestion, Question.id == ExamQuestion.question_id
-    ).filter(
+    ).where(
         ExamQuestion.exam_id == exam_id
-    ).order_by(ExamQuestion.order).all()
-    
-    # Convert exam to dict and add questions
-    exam_dict = {
+    ).order_by(ExamQuestion.order)
+
+def _exam_with_questions(exam: Exam, questions: List[Question]) -> dict:
+    return {
         "id": exam.id,
         "title": exam.title,
         "description": exam.description,
@@ -71,8 +80,29 @@ def get_exam_with_questions(db: Session, exam_id: str):
         "questions": questions,
         "question_count": len(questions)
     }
+
+def get_exam_with_questions(db: Session, exam_id: str):
+    exam = db.query(Exam).filter(Exam.id == exam_id).first()
+    if not exam:
+        return None
     
-    return exam_dict
+    questions = db.execute(_exam_questions_query(exam_id)).scalars().all()
+    return _exam_with_questions(exam, questions)
+
+async def get_exam_with_questions_async(db: AsyncSession, exam_id: Union[str, uuid.UUID]):
+    exam_id = uuid.UUID(str(exam_id))
+    exam = (await db.execute(select(Exam).where(Exam.id == exam_id))).scalar_one_or_none()
+    if not exam:
+        return None
+    
+    questions = (await db.execute(_exam_questions_query(exam_id))).scalars().all()
+    return _exam_with_questions(exam, questions)
+
+def get_exam_question_ids(db: Session, exam_id: uuid.UUID) -> List[uuid.UUID]:
+    """The exam's question ids in paper order"""
+    return db.scalars(
+        select(ExamQuestion.question_id).where(ExamQuestion.exam_id == exam_id).order_by(ExamQuestion.order)
+    ).all()
 
 def update_exam(db: Session, exam_id: str, exam_update: ExamUpdate):
     db_exam = db.query(Exam).filter(Exam.id == exam_id).first()
@@ -90,18 +120,11 @@ def update_exam(db: Session, exam_id: str, exam_update: ExamUpdate):
         db.query(ExamQuestion).filter(ExamQuestion.exam_id == exam_id).delete()
         
         # Add new questions
-        for order, question_id in enumerate(exam_update.question_ids):
-            question = db.query(Question).filter(Question.id == question_id).first()
-            if question:
-                exam_question = ExamQuestion(
-                    exam_id=exam_id,
-                    question_id=question_id,
-                    order=order
-                )
-                db.add(exam_question)
+        _add_exam_questions(db, db_exam.id, exam_update.question_ids)
     
     db.commit()
     db.refresh(db_exam)
+    exam_paper_cache.invalidate(exam_id)
     
     # Return exam with questions
     return get_exam_with_questions(db, exam_id)
@@ -113,4 +136,5 @@ def delete_exam(db: Session, exam_id: str):
         db.query(ExamQuestion).filter(ExamQuestion.exam_id == exam_id).delete()
         db.delete(db_exam)
         db.commit()
+        exam_paper_cache.invalidate(exam_id)
     return True
\ No newline at end of file
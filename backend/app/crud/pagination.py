@@ -0,0 +1,44 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps([created_at.isoformat(), str(id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def keyset_page(query, model, limit: int, cursor: Optional[str] = None):
+    """Apply newest-first keyset pagination on (created_at, id).
+
+    Seeks past the cursor with a row-value comparison instead of OFFSET, so
+    every page is a single index range scan regardless of its depth.
+    """
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < (created_at, id))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+
+
+def next_cursor(rows: List[Any], limit: int) -> Optional[str]:
+    """Return the cursor for the page after rows, or None on the last page"""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
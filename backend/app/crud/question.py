@@ -1,49 +1,166 @@
-from sqlalchemy import String, text
+from pydantic import ValidationError
+from sqlalchemy import String, cast, func, insert, literal, or_, select, union_all
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Callable, Iterable, List, Optional, Tuple
+import time
 import uuid
-from app.models.question import Question
+from app.models.exam import ExamQuestion
+from app.models.question import Question, QuestionType
+from app.crud.pagination import keyset_page
+from app.services.exam_cache import exam_paper_cache
 from app.schemas.question import QuestionCreate, QuestionUpdate
 
-def get_questions(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 100, 
+MAX_REPORTED_ERRORS = 1000
+SEARCH_CONFIG = "english"
+HIGHLIGHT_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=25, MinWords=10"
+
+def _search_predicate(search: str):
+    # Full-text match served by the GIN tsvector index; trigram word
+    # similarity (pg_trgm's <% operator) so misspelled or partial terms still
+    # match part of a longer title; and the plain substring match the
+    # question bank always had. All of them are served by GIN indexes.
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, search)
+    pattern = f"%{_escape_like(search)}%"
+    return or_(
+        Question.search_vector.op("@@")(tsquery),
+        literal(search).op("<%")(Question.title),
+        Question.title.ilike(pattern, escape="\\"),
+        Question.description.ilike(pattern, escape="\\")
+    )
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _escape_html(text):
+    # ts_headline returns its input verbatim around the <mark> tags, so the
+    # text is escaped before highlighting
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;")):
+        text = func.replace(text, char, entity)
+    return text
+
+def _filter_questions(
+    query,
     search: Optional[str] = None,
     type: Optional[str] = None,
     complexity: Optional[str] = None,
     tags: Optional[str] = None
 ):
-    # Get all questions first
-    all_questions = db.query(Question).offset(skip).limit(limit).all()
-    
-    # Apply filters in Python (less efficient but guaranteed to work)
-    filtered_questions = all_questions
-    
+    # Every filter is a SQL predicate so it runs before pagination, not after
     if search:
-        search_lower = search.lower()
-        filtered_questions = [
-            q for q in filtered_questions 
-            if search_lower in q.title.lower() or 
-               (q.description and search_lower in q.description.lower())
-        ]
+        query = query.filter(_search_predicate(search))
     
     if type:
-        filtered_questions = [q for q in filtered_questions if q.type == type]
+        query = query.filter(Question.type == QuestionType(type))
     
     if complexity:
-        filtered_questions = [q for q in filtered_questions if q.complexity == complexity]
+        query = query.filter(Question.complexity == complexity)
     
     if tags:
-        filtered_questions = [
-            q for q in filtered_questions 
-            if q.tags and tags in q.tags
-        ]
+        # Comma-separated tags must all be present; served by the GIN tags index
+        tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+        if tag_list:
+            query = query.filter(Question.tags.contains(tag_list))
     
-    return filtered_questions
+    return query
 
+def get_questions(
+    db: Session, 
+    limit: int = 100, 
+    cursor: Optional[str] = None,
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    complexity: Optional[str] = None,
+    tags: Optional[str] = None
+):
+    query = _filter_questions(
+        db.query(Question),
+        search=search,
+        type=type,
+        complexity=complexity,
+        tags=tags
+    )
+    return keyset_page(query, Question, limit, cursor).all()
 
+def search_questions(
+    db: Session,
+    search: str,
+    limit: int = 20,
+    type: Optional[str] = None,
+    complexity: Optional[str] = None,
+    tags: Optional[str] = None
+):
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, search)
+    score = (
+        func.ts_rank_cd(Question.search_vector, tsquery)
+        + func.word_similarity(search, Question.title)
+    ).label("score")
+    
+    # Rank and cut to the top hits first; ts_headline is costly, so it only
+    # runs on the rows that are actually returned
+    ranked = _filter_questions(
+        db.query(Question.id, score),
+        search=search,
+        type=type,
+        complexity=complexity,
+        tags=tags
+    ).order_by(score.desc()).limit(limit).subquery()
+    
+    rows = db.query(
+        Question,
+        ranked.c.score,
+        func.ts_headline(SEARCH_CONFIG, _escape_html(Question.title), tsquery, HIGHLIGHT_OPTIONS),
+        func.ts_headline(SEARCH_CONFIG, _escape_html(func.coalesce(Question.description, "")), tsquery, HIGHLIGHT_OPTIONS)
+    ).join(ranked, ranked.c.id == Question.id).order_by(ranked.c.score.desc()).all()
+    
+    return [
+        {
+            "question": question,
+            "score": score,
+            "title_highlight": title_highlight,
+            "snippet": snippet or None
+        }
+        for question, score, title_highlight, snippet in rows
+    ]
 
+def get_question_facets(
+    db: Session,
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    complexity: Optional[str] = None,
+    tags: Optional[str] = None
+):
+    filtered = _filter_questions(
+        db.query(Question.type, Question.complexity, Question.tags),
+        search=search,
+        type=type,
+        complexity=complexity,
+        tags=tags
+    ).cte("filtered")
+    
+    tag_values = select(
+        func.jsonb_array_elements_text(filtered.c.tags).label("value")
+    ).where(func.jsonb_typeof(filtered.c.tags) == "array").subquery()
+    
+    # One round trip: every facet is a grouped branch over the same filtered set
+    facets = union_all(
+        select(literal("total"), literal(None, String), func.count()).select_from(filtered),
+        select(literal("type"), cast(filtered.c.type, String), func.count()).group_by(filtered.c.type),
+        select(literal("complexity"), filtered.c.complexity, func.count()).group_by(filtered.c.complexity),
+        select(literal("tag"), tag_values.c.value, func.count()).group_by(tag_values.c.value),
+    )
+    
+    result = {"total": 0, "types": {}, "complexities": {}, "tags": {}}
+    for facet, value, count in db.execute(facets):
+        if facet == "total":
+            result["total"] = count
+        elif facet == "type":
+            # The enum column stores member names
+            result["types"][QuestionType[value].value] = count
+        elif facet == "complexity":
+            result["complexities"][value] = count
+        else:
+            result["tags"][value] = count
+    return result
 
 def create_question(db: Session, question: QuestionCreate, created_by: uuid.UUID):
     # Convert to dict and add created_by
@@ -56,6 +173,77 @@ def create_question(db: Session, question: QuestionCreate, created_by: uuid.UUID
     db.refresh(db_question)
     return db_question
 
+def bulk_create_questions(
+    db: Session,
+    rows: Iterable[Tuple[int, dict]],
+    created_by: uuid.UUID,
+    errors: Optional[List[dict]] = None,
+    batch_size: int = 1000,
+    on_batch: Optional[Callable[[int], None]] = None
+):
+    """Validate and insert (row_number, data) pairs in a single transaction.
+    
+    Valid rows are inserted in executemany batches as they stream in. If any
+    row fails validation, here or upstream in `errors`, the whole import is
+    rolled back and nothing is written.
+    """
+    errors = errors if errors is not None else []
+    started = time.perf_counter()
+    total = imported = invalid = 0
+    batch = []
+    
+    def flush():
+        nonlocal imported
+        db.execute(insert(Question), batch)
+        imported += len(batch)
+        batch.clear()
+        if on_batch:
+            on_batch(imported)
+    
+    try:
+        for row_number, data in rows:
+            total += 1
+            try:
+                question = QuestionCreate(**data)
+            except ValidationError as e:
+                errors.append({"row": row_number, "error": _format_validation_error(e)})
+                invalid += 1
+                continue
+            # Keep validating after the first error so the report is complete,
+            # but stop writing rows that will be rolled back anyway
+            if errors:
+                continue
+            batch.append({**question.dict(), "created_by": created_by})
+            if len(batch) >= batch_size:
+                flush()
+        
+        if errors:
+            db.rollback()
+            imported = 0
+        else:
+            if batch:
+                flush()
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    elapsed = time.perf_counter() - started
+    return {
+        # Rows rejected upstream never reached this loop but still count
+        "rows": total + len(errors) - invalid,
+        "imported": imported,
+        "failed": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(imported / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
 def get_question(db: Session, question_id: str):
     try:
         return db.query(Question).filter(Question.id == question_id).first()
@@ -63,6 +251,12 @@ def get_question(db: Session, question_id: str):
         print(f"Error getting question: {e}")
         return None
 
+def _exam_ids_using(db: Session, question_id: str):
+    return [
+        exam_id for (exam_id,) in
+        db.query(ExamQuestion.exam_id).filter(ExamQuestion.question_id == question_id).distinct()
+    ]
+
 def update_question(db: Session, question_id: str, question_update: QuestionUpdate):
     db_question = db.query(Question).filter(Question.id == question_id).first()
     if not db_question:
@@ -75,11 +269,15 @@ def update_question(db: Session, question_id: str, question_update: QuestionUpda
     
     db.commit()
     db.refresh(db_question)
+    # Exam papers embed the question, so every exam using it must re-render
+    exam_paper_cache.invalidate(*_exam_ids_using(db, question_id))
     return db_question
 
 def delete_question(db: Session, question_id: str):
     db_question = db.query(Question).filter(Question.id == question_id).first()
     if db_question:
+        exam_ids = _exam_ids_using(db, question_id)
         db.delete(db_question)
         db.commit()
+        exam_paper_cache.invalidate(*exam_ids)
     return True
\ No newline at end of file
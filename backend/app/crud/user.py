@@ -1,13 +1,20 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash, verify_password
+from app.services.password_hashing import password_hasher
+from app.services.principal_cache import principal_cache
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
 def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+    hashed_password = password_hasher.hash(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -17,12 +24,51 @@ def create_user(db: Session, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    # Drop a cached "not found" for this email
+    principal_cache.invalidate(db_user.email)
+    return db_user
+
+async def create_user_async(db: AsyncSession, user: UserCreate):
+    hashed_password = await password_hasher.hash_async(user.password)
+    db_user = User(
+        email=user.email,
+        hashed_password=hashed_password,
+        full_name=user.full_name,
+        role=user.role
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    # Drop a cached "not found" for this email
+    principal_cache.invalidate(db_user.email)
+    return db_user
+
+def get_user(db: Session, user_id):
+    return db.query(User).filter(User.id == user_id).first()
+
+def update_user(db: Session, user_id, updates: dict):
+    db_user = get_user(db, user_id)
+    if db_user:
+        for key, value in updates.items():
+            setattr(db_user, key, value)
+        db.commit()
+        db.refresh(db_user)
+        # Role and active flag gate every request, so they must not be served stale
+        principal_cache.invalidate(db_user.email)
     return db_user
 
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not password_hasher.verify(password, user.hashed_password):
+        return False
+    return user
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str):
+    user = await get_user_by_email_async(db, email)
+    if not user:
+        return False
+    if not await password_hasher.verify_async(password, user.hashed_password):
         return False
-    return user
\ No newline at end of file
+    return user
@@ -1,11 +1,25 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.endpoints import auth, users, questions, exams, attempts
-from app.core.database import engine, Base
+from app.core.database import engine, read_engine, async_engine, async_read_engine
+from app.core.metrics import MetricsMiddleware, metrics_sampler, render_metrics
+from app.core.profiling import PROFILE_ID_HEADER, ProfilingMiddleware, profile_store
+from app.core.query_stats import QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryStatsMiddleware
+from app.api.deps import is_admin_token
+from app.api.endpoints import auth, users, questions, exams, attempts, profiles
+from app.crud.pagination import CURSOR_HEADER
+from app.services.admission import attempt_admission
+from app.services.autosave import autosave_buffer
+from app.services.exam_cache import exam_paper_cache
+from app.services.exam_prewarm import exam_prewarmer
+from app.services.grading_queue import grading_queue
+from app.services.import_jobs import recover_import_jobs, shutdown_import_job_runner
+from app.services.item_analytics import item_analytics
+from app.services.password_hashing import password_hasher
+from app.services.principal_cache import principal_cache
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic (`alembic upgrade head`), so importing
+# the app never touches the database
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -20,7 +34,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CURSOR_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER, PROFILE_ID_HEADER],
 )
+app.add_middleware(QueryStatsMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, store=profile_store, is_admin=is_admin_token)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix=settings.API_V1_STR, tags=["auth"])
@@ -28,6 +48,28 @@ app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["u
 app.include_router(questions.router, prefix=f"{settings.API_V1_STR}/questions", tags=["questions"])
 app.include_router(exams.router, prefix=f"{settings.API_V1_STR}/exams", tags=["exams"]) 
 app.include_router(attempts.router, prefix=f"{settings.API_V1_STR}/attempts", tags=["attempts"])
+app.include_router(profiles.router, prefix=f"{settings.API_V1_STR}/profiles", tags=["profiles"])
+
+@app.on_event("startup")
+def start_background_workers():
+    # Also replays auto-save journals left behind by a crashed worker
+    autosave_buffer.start()
+    # Also queues attempts that were submitted but never graded
+    grading_queue.start()
+    # Fails imports a dead worker left queued or running, removing their uploads
+    recover_import_jobs()
+    exam_prewarmer.start()
+    if settings.METRICS_ENABLED:
+        metrics_sampler.start()
+
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    shutdown_import_job_runner()
+    autosave_buffer.stop()
+    grading_queue.stop()
+    password_hasher.shutdown()
+    exam_prewarmer.stop()
+    metrics_sampler.stop()
 
 @app.get("/")
 async def root():
@@ -37,6 +79,25 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+if settings.METRICS_ENABLED:
+    metrics_sampler.queue("autosave", autosave_buffer.pending_count)
+    metrics_sampler.queue("grading", grading_queue.depth)
+    metrics_sampler.queue("admission", attempt_admission.depth)
+    metrics_sampler.queue("password_hash", lambda: password_hasher.stats()["queued"])
+    metrics_sampler.cache("exam_paper", exam_paper_cache.stats)
+    metrics_sampler.cache("principal", principal_cache.stats)
+    metrics_sampler.cache("item_analytics", item_analytics.stats)
+    metrics_sampler.pool("primary", engine)
+    metrics_sampler.pool("primary_async", async_engine)
+    if read_engine is not engine:
+        metrics_sampler.pool("replica", read_engine)
+        metrics_sampler.pool("replica_async", async_read_engine)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        body, content_type = render_metrics()
+        return Response(body, headers={"Content-Type": content_type})
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
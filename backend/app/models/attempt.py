@@ -1,6 +1,6 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, DateTime, Integer, Boolean, JSON
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy import ForeignKey
@@ -14,6 +14,17 @@ class AttemptStatus(str, enum.Enum):
 
 class ExamAttempt(Base):
     __tablename__ = "exam_attempts"
+    __table_args__ = (
+        # Finds an exam's attempts graded since a point in time (item analytics)
+        Index("ix_exam_attempts_exam_id_graded_at", "exam_id", "graded_at"),
+        # At most one attempt in progress per student and exam, even when
+        # several workers admit the same student at once
+        Index(
+            "ux_exam_attempts_in_progress", "exam_id", "student_id", unique=True,
+            postgresql_where=text("status = 'in_progress'"),
+            sqlite_where=text("status = 'in_progress'")
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id"), nullable=False)
@@ -23,6 +34,9 @@ class ExamAttempt(Base):
     status = Column(String, default=AttemptStatus.IN_PROGRESS)
     total_score = Column(Integer, default=0)
     auto_saved_answers = Column(JSON)  # For auto-save functionality
+    auto_saved_at = Column(DateTime)  # When the stored auto-save was made
+    auto_save_seq = Column(Integer, nullable=False, default=0, server_default="0")  # Last applied patch sequence
+    graded_at = Column(DateTime)  # When grading last scored this attempt
     
     # Relationships
     exam = relationship("Exam", back_populates="attempts")
@@ -32,7 +46,7 @@ class Answer(Base):
     __tablename__ = "answers"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    attempt_id = Column(UUID(as_uuid=True), ForeignKey("exam_attempts.id"), nullable=False)
+    attempt_id = Column(UUID(as_uuid=True), ForeignKey("exam_attempts.id"), nullable=False, index=True)
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False)
     answer = Column(JSON)  # Can be string, array, or file path
     score = Column(Integer, default=0)
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, Boolean, Integer, JSON
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy import ForeignKey
@@ -8,6 +8,10 @@ from app.core.database import Base
 
 class Exam(Base):
     __tablename__ = "exams"
+    __table_args__ = (
+        # Backs keyset pagination: ORDER BY created_at DESC, id DESC
+        Index("ix_exams_created_at_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
@@ -27,8 +31,8 @@ class ExamQuestion(Base):
     __tablename__ = "exam_questions"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id"), nullable=False)
-    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False)
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id"), nullable=False, index=True)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False, index=True)
     order = Column(Integer, nullable=False)  # Order of question in exam
     
     # Relationships
@@ -1,7 +1,8 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, Integer, JSON, DateTime, Enum as SQLEnum, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, JSON, DateTime, Enum as SQLEnum, Text, Index, Computed, DDL, event
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -13,6 +14,29 @@ class QuestionType(str, enum.Enum):
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        # Back keyset pagination (ORDER BY created_at DESC, id DESC), alone
+        # and behind the equality filters of the question bank
+        Index("ix_questions_created_at_id", "created_at", "id"),
+        Index("ix_questions_type_created_at_id", "type", "created_at", "id"),
+        Index("ix_questions_complexity_created_at_id", "complexity", "created_at", "id"),
+        # Containment (@>) lookups for the tag filter
+        Index(
+            "ix_questions_tags", "tags",
+            postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"}
+        ),
+        # Full-text search over title/description, typo-tolerant title
+        # matching and substring (ILIKE) matches on both
+        Index("ix_questions_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_questions_title_trgm", "title",
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_questions_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
@@ -22,6 +46,22 @@ class Question(Base):
     options = Column(JSON)
     correct_answers = Column(JSON)
     max_score = Column(Integer, default=1)
-    tags = Column(JSON)
+    tags = Column(JSONB(none_as_null=True))
     created_at = Column(DateTime, server_default=func.now())
-    created_by = Column(UUID(as_uuid=True), nullable=False)
\ No newline at end of file
+    created_by = Column(UUID(as_uuid=True), nullable=False)
+    # Maintained by PostgreSQL; deferred so listings never ship it over the wire
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    ))
+
+# The trigram index needs pg_trgm before the table is created
+event.listen(
+    Question.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
\ No newline at end of file
@@ -1,11 +1,15 @@
 from .user import User, UserCreate, UserLogin, Token
-from .question import Question, QuestionCreate, QuestionUpdate, QuestionImport
+from .question import Question, QuestionCreate, QuestionUpdate, QuestionImport, QuestionSearchHit, QuestionFacets
 from .exam import Exam, ExamCreate, ExamUpdate, ExamWithQuestions
 from .attempt import ExamAttemptSchema as ExamAttempt, AnswerSchema as Answer, AnswerCreate, ExamAttemptCreate
+from .profile import ProfileInfo
+from .analytics import ExamAnalytics, QuestionAnalytics, ScoreBin
 
 __all__ = [
     "User", "UserCreate", "UserLogin", "Token",
-    "Question", "QuestionCreate", "QuestionUpdate", "QuestionImport", 
+    "Question", "QuestionCreate", "QuestionUpdate", "QuestionImport", "QuestionSearchHit", "QuestionFacets",
     "Exam", "ExamCreate", "ExamUpdate", "ExamWithQuestions",
-    "ExamAttempt", "Answer", "AnswerCreate", "ExamAttemptCreate"
+    "ExamAttempt", "Answer", "AnswerCreate", "ExamAttemptCreate",
+    "ProfileInfo",
+    "ExamAnalytics", "QuestionAnalytics", "ScoreBin"
 ]
\ No newline at end of file
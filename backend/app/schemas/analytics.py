@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+class ScoreBin(BaseModel):
+    start: float
+    end: float
+    count: int
+
+class QuestionAnalytics(BaseModel):
+    question_id: str
+    title: str
+    type: str
+    max_score: int
+    answered: Optional[float] = None  # Share of attempts that answered
+    p_value: Optional[float] = None  # Mean score as a share of max_score (difficulty)
+    discrimination: Optional[float] = None  # Upper minus lower 27% mean score, over max_score
+    options: Optional[Dict[str, float]] = None  # Share of attempts choosing each option
+
+class ExamAnalytics(BaseModel):
+    attempts: int
+    max_score: int
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    stdev: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    distribution: List[ScoreBin]
+    questions: List[QuestionAnalytics]
+    graded_through: Optional[datetime] = None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, Any, List
+from pydantic import BaseModel, StrictInt
+from typing import Optional, Any, Dict, List
 from datetime import datetime
 import uuid
 
@@ -18,6 +18,11 @@ class AnswerSchema(AnswerBase):
     class Config:
         from_attributes = True
 
+class AutoSavePatch(BaseModel):
+    seq: StrictInt  # true/false are not sequence numbers
+    # question_id -> answer; null clears the answer
+    answers: Dict[str, Any]
+
 class ExamAttemptCreate(BaseModel):
     exam_id: uuid.UUID
 
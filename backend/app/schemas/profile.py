@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import datetime
+import uuid
+
+class ProfileInfo(BaseModel):
+    id: uuid.UUID
+    created_at: datetime
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    samples: int
@@ -1,7 +1,7 @@
 
 from datetime import datetime
 from pydantic import BaseModel
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 from app.models.question import QuestionType
 import uuid
 
@@ -37,5 +37,17 @@ class Question(QuestionBase):
     class Config:
         from_attributes = True
 
+class QuestionSearchHit(BaseModel):
+    question: Question
+    score: float
+    title_highlight: str  # HTML-escaped, matches wrapped in <mark>
+    snippet: Optional[str] = None
+
+class QuestionFacets(BaseModel):
+    total: int
+    types: Dict[str, int]
+    complexities: Dict[str, int]
+    tags: Dict[str, int]
+
 class QuestionImport(BaseModel):
     file_path: str
\ No newline at end of file
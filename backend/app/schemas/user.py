@@ -12,6 +12,11 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class UserUpdate(BaseModel):
+    full_name: Optional[str] = None
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -23,6 +28,13 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class Principal(BaseModel):
+    """The authenticated user as far as authorization needs it"""
+    id: uuid.UUID
+    email: str
+    role: UserRole
+    is_active: bool
+
 class Token(BaseModel):
     access_token: str
     token_type: str
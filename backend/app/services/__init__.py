@@ -1,5 +1,14 @@
-from .excel_parser import ExcelParser
 from .grading import GradingService
-from .autosave import AutoSaveService
+from .autosave import AutoSaveService, AutoSaveBuffer, StaleSequenceError, autosave_buffer
+from .exam_cache import ExamPaperCache, exam_paper_cache
+from .principal_cache import PrincipalCache, principal_cache
 
-__all__ = ["ExcelParser", "GradingService", "AutoSaveService"]
\ No newline at end of file
+__all__ = ["ExcelParser", "GradingService", "AutoSaveService", "AutoSaveBuffer", "StaleSequenceError", "autosave_buffer", "ExamPaperCache", "exam_paper_cache", "PrincipalCache", "principal_cache"]
+
+
+def __getattr__(name):
+    # ExcelParser pulls in pandas and openpyxl; only import it when asked for
+    if name == "ExcelParser":
+        from .excel_parser import ExcelParser
+        return ExcelParser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
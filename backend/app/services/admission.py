@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.attempt import AttemptStatus, ExamAttempt
+from app.models.exam import Exam
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Too many students are already waiting to start an attempt"""
+
+    def __init__(self, position: int, retry_after: int):
+        super().__init__(f"Admission queue full at position {position}, retry in {retry_after}s")
+        self.position = position
+        self.retry_after = retry_after
+
+
+class ExamNotFound(Exception):
+    pass
+
+
+# (exam_id, student_id, future resolved with the attempt)
+_Request = Tuple[uuid.UUID, uuid.UUID, "asyncio.Future"]
+
+# INSERT ... ON CONFLICT, by dialect
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class AttemptAdmission:
+    """Admission control for starting exam attempts.
+
+    At an exam's start time every enrolled student asks for an attempt
+    within seconds. Requests join one FIFO queue. A fixed number of
+    workers drain it in batches, and each batch is created with a single
+    multi-row INSERT ... RETURNING, so the database sees a few large writes
+    instead of thousands of small ones. Once max_waiting requests are
+    queued, new ones are turned away at once with their would-be position
+    and a Retry-After estimate, instead of piling up until they time out.
+
+    A student who retries gets the attempt already in progress rather than
+    a second one. That also holds for a retry after a timed-out wait, whose
+    attempt may have been created anyway. A request for a pair already
+    waiting here shares its place in the queue, and across workers the
+    unique index on in-progress attempts decides: a batch that loses the
+    race picks up the winner's attempt.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        workers: int = 4,
+        batch_size: int = 200,
+        max_waiting: int = 2000,
+        wait_timeout: float = 10.0
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[_Request]"] = None
+        self._tasks: List["asyncio.Task"] = []
+        # (exam_id, student_id) -> the future of its queued request
+        self._waiting: Dict[Tuple[uuid.UUID, uuid.UUID], "asyncio.Future"] = {}
+        # Attempts created per second, smoothed; drives the Retry-After estimate
+        self._rate = float(batch_size)
+        self.admitted = 0
+        self.rejected = 0
+        self.batches = 0
+
+    def _ensure_started(self) -> "asyncio.Queue[_Request]":
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or the previous event loop is gone (tests, reloads)
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_waiting)
+            self._waiting = {}
+            self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+        return self._queue
+
+    async def start(self, exam_id: uuid.UUID, student_id: uuid.UUID) -> ExamAttempt:
+        queue = self._ensure_started()
+        pair = (exam_id, student_id)
+        future = self._waiting.get(pair)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            try:
+                queue.put_nowait((exam_id, student_id, future))
+            except asyncio.QueueFull:
+                self.rejected += 1
+                raise AdmissionRejected(queue.qsize() + 1, self.retry_after(queue.qsize()))
+            self._waiting[pair] = future
+            future.add_done_callback(lambda _: self._waiting.pop(pair, None))
+        position = queue.qsize()
+        try:
+            # shield: a timed-out wait must not cancel the attempt it is queued for
+            return await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected(position, self.retry_after(position))
+
+    def retry_after(self, waiting: int) -> int:
+        return max(1, math.ceil(waiting / max(self._rate, 1.0)))
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "waiting": self.depth(),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "attempts_per_second": round(self._rate, 1),
+        }
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            started = time.perf_counter()
+            try:
+                await self._admit(batch)
+            except Exception as e:
+                logger.exception("Creating a batch of %d attempts failed", len(batch))
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                elapsed = max(time.perf_counter() - started, 1e-3)
+                self._rate = 0.8 * self._rate + 0.2 * (len(batch) / elapsed) * self.workers
+            self.batches += 1
+
+    async def _admit(self, batch: List[_Request]) -> None:
+        async with self.session_factory() as db:
+            exam_ids = {exam_id for exam_id, _, _ in batch}
+            existing_exams = set((await db.scalars(select(Exam.id).where(Exam.id.in_(exam_ids)))).all())
+
+            pairs = {(exam_id, student_id) for exam_id, student_id, _ in batch if exam_id in existing_exams}
+            attempts: Dict[Tuple[uuid.UUID, uuid.UUID], ExamAttempt] = {}
+            if pairs:
+                in_progress = await db.scalars(
+                    select(ExamAttempt).where(
+                        tuple_(ExamAttempt.exam_id, ExamAttempt.student_id).in_(list(pairs)),
+                        ExamAttempt.status == AttemptStatus.IN_PROGRESS.value
+                    )
+                )
+                for attempt in in_progress:
+                    attempts[(attempt.exam_id, attempt.student_id)] = attempt
+
+            # Duplicates within the batch collapse into one new attempt. Another
+            # worker may create one for the same pair meanwhile; the unique
+            # index skips ours, and its attempt is read back below.
+            new_pairs = [pair for pair in pairs if pair not in attempts]
+            if new_pairs:
+                now = datetime.utcnow()
+                statement = _INSERTS[db.bind.dialect.name](ExamAttempt).on_conflict_do_nothing(
+                    index_elements=[ExamAttempt.exam_id, ExamAttempt.student_id],
+                    index_where=ExamAttempt.status == AttemptStatus.IN_PROGRESS.value
+                ).returning(ExamAttempt)
+                created = await db.scalars(statement, [
+                    {
+                        "id": uuid.uuid4(),
+                        "exam_id": exam_id,
+                        "student_id": student_id,
+                        "start_time": now,
+                        "status": AttemptStatus.IN_PROGRESS.value,
+                        "total_score": 0
+                    }
+                    for exam_id, student_id in new_pairs
+                ])
+                for attempt in created.all():
+                    attempts[(attempt.exam_id, attempt.student_id)] = attempt
+                await db.commit()
+
+                raced = [pair for pair in new_pairs if pair not in attempts]
+                if raced:
+                    winners = await db.scalars(
+                        select(ExamAttempt).where(
+                            tuple_(ExamAttempt.exam_id, ExamAttempt.student_id).in_(raced),
+                            ExamAttempt.status == AttemptStatus.IN_PROGRESS.value
+                        )
+                    )
+                    for attempt in winners:
+                        attempts[(attempt.exam_id, attempt.student_id)] = attempt
+
+        for exam_id, student_id, future in batch:
+            if future.done():
+                continue
+            attempt = attempts.get((exam_id, student_id))
+            if exam_id not in existing_exams:
+                future.set_exception(ExamNotFound(str(exam_id)))
+            elif attempt is None:
+                # Created and already submitted elsewhere between our insert and read
+                future.set_exception(RuntimeError("Attempt was closed while being admitted"))
+            else:
+                future.set_result(attempt)
+                self.admitted += 1
+
+
+attempt_admission = AttemptAdmission(
+    AsyncSessionLocal,
+    workers=settings.ADMISSION_WORKERS,
+    batch_size=settings.ADMISSION_BATCH_SIZE,
+    max_waiting=settings.ADMISSION_MAX_WAITING,
+    wait_timeout=settings.ADMISSION_WAIT_TIMEOUT_SECONDS
+)
@@ -1,6 +1,20 @@
+import fcntl
 import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from sqlalchemy import Integer, and_, bindparam, func, or_, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.attempt import AttemptStatus, ExamAttempt
+from app.services.grading_queue import grading_queue
+
+logger = logging.getLogger(__name__)
 
 class AutoSaveService:
     @staticmethod
@@ -19,4 +33,419 @@ class AutoSaveService:
     def should_auto_save(last_save_time: datetime, current_time: datetime, min_interval: int = 30) -> bool:
         """Determine if auto-save should trigger based on time interval"""
         time_diff = (current_time - last_save_time).total_seconds()
-        return time_diff >= min_interval
\ No newline at end of file
+        return time_diff >= min_interval
+
+
+_attempts = ExamAttempt.__table__
+
+# Saves can reach the database out of order (several workers, journal
+# replay), so a save only lands if it has a higher sequence number than the
+# stored one and was made before the attempt was submitted. Saves journaled
+# without one keep the stored number and land if they are newer. A graded
+# attempt's answers are final: they must keep matching its score.
+_seq = func.coalesce(bindparam("seq", type_=Integer), _attempts.c.auto_save_seq)
+_BUFFERED_SAVE_UPDATE = (
+    update(_attempts)
+    .where(_attempts.c.id == bindparam("attempt_id"))
+    .where(or_(
+        _attempts.c.auto_save_seq < _seq,
+        and_(
+            _attempts.c.auto_save_seq == _seq,
+            or_(_attempts.c.auto_saved_at.is_(None), _attempts.c.auto_saved_at < bindparam("saved_at"))
+        )
+    ))
+    .where(or_(_attempts.c.end_time.is_(None), _attempts.c.end_time >= bindparam("saved_at")))
+    .where(or_(
+        _attempts.c.status == AttemptStatus.IN_PROGRESS.value,
+        _attempts.c.status == AttemptStatus.SUBMITTED.value
+    ))
+    .values(
+        auto_saved_answers=bindparam("answers"),
+        auto_saved_at=bindparam("saved_at"),
+        auto_save_seq=_seq
+    )
+)
+
+
+class StaleSequenceError(Exception):
+    """A save's sequence number does not follow the last acknowledged one"""
+
+    def __init__(self, acked_seq: int):
+        super().__init__(f"Expected sequence {acked_seq + 1}")
+        self.acked_seq = acked_seq
+
+
+class AutoSaveBuffer:
+    """Write-behind buffer for attempt auto-saves.
+
+    A save is acknowledged once it is in memory and in a local append-only
+    journal. Repeated saves for an attempt coalesce to the latest one, and a
+    background thread writes them to the database in batched UPDATEs every
+    flush interval.
+
+    Every save carries a sequence number, which only ever goes up. Clients
+    can send patches: only the answers changed since the last acknowledged
+    sequence number. The buffer keeps each attempt's latest answers in
+    memory to apply them to; when it has none, or the client moved on
+    through another worker, the caller passes the state stored in the
+    database instead. A patch that follows neither (lost request, or a save
+    another worker has not flushed yet) is rejected, and the client resyncs
+    with a full save numbered past everything it has been acknowledged.
+
+    Flushing also notices attempts that were submitted meanwhile, e.g.
+    through another worker. Their answers are dropped from memory, so the
+    next save reads the attempt and is refused. Those still waiting to be
+    graded are handed to regrade, so their score covers any save that
+    landed after the submit.
+
+    Each process journals to its own files and holds an exclusive lock on
+    them. At startup, journals nobody holds a lock on were left by a dead
+    process, so they are replayed into the database and removed.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        journal_dir: str,
+        flush_interval: float = 2.0,
+        fsync: bool = False,
+        max_batch: int = 500,
+        max_states: int = 50_000,
+        regrade: Optional[Callable[[uuid.UUID, uuid.UUID], None]] = None
+    ):
+        self.session_factory = session_factory
+        self.journal_dir = journal_dir
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_batch = max_batch
+        self.max_states = max_states
+        self.regrade = regrade
+        self._pending: Dict[str, Tuple[Any, datetime, Optional[int]]] = {}
+        # Latest (answers, acknowledged sequence) per attempt, for applying patches
+        self._states: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._journal = None
+        self._journal_path: Optional[str] = None
+        # Rotated journals whose saves are not yet confirmed in the database
+        self._segments: List[Tuple[str, Any]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.saves = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._recover_orphaned_journals()
+            self._journal_path = os.path.join(
+                self.journal_dir, f"autosave-{os.getpid()}-{uuid.uuid4().hex}.journal"
+            )
+            self._journal = self._open_locked(self._journal_path)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="autosave-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self.flush()
+        with self._lock:
+            os.unlink(self._journal_path)
+            self._journal.close()
+            self._journal = None
+
+    def save(self, attempt_id: str, answers: Any, seq: Optional[int] = None, stored_seq: int = 0) -> int:
+        """Buffer the latest answers for an attempt; durable once this returns.
+
+        seq must be above both the acknowledged sequence number and
+        stored_seq, the one in the database, otherwise StaleSequenceError
+        carries the higher of them. Without one the save takes the next
+        number. Returns the acknowledged sequence number.
+        """
+        self.start()
+        attempt_id = str(attempt_id)
+        with self._lock:
+            acked = max(stored_seq, self._local_seq(attempt_id))
+            if seq is None:
+                seq = acked + 1
+            elif seq <= acked:
+                raise StaleSequenceError(acked)
+            answers_by_question = answers.get("answers") if isinstance(answers, dict) else None
+            self._remember(attempt_id, dict(answers_by_question or {}), seq)
+            self._record(attempt_id, answers, seq)
+            return seq
+
+    def _local_seq(self, attempt_id: str) -> int:
+        # Caller holds self._lock. An evicted attempt's save not yet flushed
+        # still counts: it is newer than the database copy.
+        state = self._states.get(attempt_id)
+        if state is not None:
+            return state[1]
+        pending = self._pending.get(attempt_id)
+        return (pending[2] or 0) if pending is not None else 0
+
+    def follows(self, attempt_id: str, seq: int) -> bool:
+        """Whether a save or patch numbered seq follows the answers held here"""
+        with self._lock:
+            state = self._states.get(str(attempt_id))
+            return state is not None and seq == state[1] + 1
+
+    def forget(self, attempt_id: str) -> None:
+        """Drop the answers held for an attempt, e.g. once it is submitted"""
+        with self._lock:
+            self._states.pop(str(attempt_id), None)
+
+    def apply_patch(
+        self,
+        attempt_id: str,
+        seq: int,
+        patch: Dict[str, Any],
+        stored: Optional[Tuple[Dict[str, Any], int]] = None
+    ) -> int:
+        """Apply per-question changes on top of the attempt's latest answers.
+
+        seq must be exactly one past the last acknowledged sequence number,
+        otherwise StaleSequenceError carries the acknowledged one so the
+        client can resync. stored is the (answers, sequence number) in the
+        database, needed whenever follows() is false. A None value clears
+        that question's answer. Returns the newly acknowledged sequence number.
+        """
+        self.start()
+        attempt_id = str(attempt_id)
+        with self._lock:
+            state = self._states.get(attempt_id)
+            if state is None:
+                pending = self._pending.get(attempt_id)
+                if pending is not None and pending[2] is not None:
+                    # Evicted, but its save not yet flushed is newer than the database copy
+                    state = (dict((pending[0] or {}).get("answers") or {}), pending[2])
+            if stored is not None and (state is None or stored[1] > state[1]):
+                state = stored
+            if state is None:
+                raise StaleSequenceError(0)
+            answers, acked = state
+            if seq != acked + 1:
+                raise StaleSequenceError(acked)
+            answers = {**answers, **patch}
+            answers = {question_id: value for question_id, value in answers.items() if value is not None}
+            self._remember(attempt_id, answers, seq)
+            self._record(attempt_id, {"answers": answers}, seq)
+            return seq
+
+    def _remember(self, attempt_id: str, answers: Dict[str, Any], acked: int) -> None:
+        # Caller holds self._lock
+        self._states[attempt_id] = (answers, acked)
+        self._states.move_to_end(attempt_id)
+        while len(self._states) > self.max_states:
+            self._states.popitem(last=False)
+
+    def _record(self, attempt_id: str, answers: Any, seq: Optional[int]) -> None:
+        # Caller holds self._lock
+        saved_at = datetime.utcnow()
+        self._journal.write(json.dumps({
+            "attempt_id": attempt_id,
+            "answers": answers,
+            "seq": seq,
+            "saved_at": saved_at.isoformat()
+        }) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._pending[attempt_id] = (answers, saved_at, seq)
+        self.saves += 1
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write every buffered save to the database; returns the number of attempts written"""
+        with self._flush_lock:
+            with self._lock:
+                if self._journal is None:
+                    return 0
+                snapshot, self._pending = self._pending, {}
+                self._rotate_journal()
+            try:
+                closed = self._write(snapshot)
+            except Exception:
+                # Requeue unless a newer save for the attempt arrived meanwhile;
+                # the rotated journals stay on disk until a later flush succeeds
+                with self._lock:
+                    self._pending = {**snapshot, **self._pending}
+                raise
+            for path, journal in self._segments:
+                os.unlink(path)
+                journal.close()
+            self._segments.clear()
+            self.flushes += 1
+            with self._lock:
+                for attempt_id, _, _ in closed:
+                    self._states.pop(str(attempt_id), None)
+            self._regrade(closed)
+            return len(snapshot)
+
+    def _rotate_journal(self) -> None:
+        # Caller holds self._lock. Later saves go to a fresh journal; the old
+        # one is renamed but kept open, so its lock still marks it as ours.
+        if self._journal.tell() == 0:
+            return
+        segment = f"{self._journal_path}.{uuid.uuid4().hex}.flushing"
+        os.rename(self._journal_path, segment)
+        self._segments.append((segment, self._journal))
+        self._journal = self._open_locked(self._journal_path)
+
+    def _write(
+        self, saves: Dict[str, Tuple[Any, datetime, Optional[int]]]
+    ) -> List[Tuple[uuid.UUID, uuid.UUID, str]]:
+        """Write saves to the database; returns (id, exam_id, status) of those no longer in progress"""
+        if not saves:
+            return []
+        items = [
+            {"attempt_id": uuid.UUID(attempt_id), "answers": answers, "saved_at": saved_at, "seq": seq}
+            for attempt_id, (answers, saved_at, seq) in saves.items()
+        ]
+        closed = []
+        db = self.session_factory()
+        try:
+            for start in range(0, len(items), self.max_batch):
+                batch = items[start:start + self.max_batch]
+                db.execute(_BUFFERED_SAVE_UPDATE, batch)
+                closed += db.execute(
+                    select(_attempts.c.id, _attempts.c.exam_id, _attempts.c.status).where(
+                        _attempts.c.id.in_([item["attempt_id"] for item in batch]),
+                        _attempts.c.status != AttemptStatus.IN_PROGRESS.value
+                    )
+                ).all()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self.rows_written += len(items)
+        return closed
+
+    def _regrade(self, attempts: List[Tuple[uuid.UUID, uuid.UUID, str]]) -> None:
+        if self.regrade is None:
+            return
+        for attempt_id, exam_id, status in attempts:
+            if status == AttemptStatus.SUBMITTED.value:
+                # Grading skips attempts already graded, so an extra pass is harmless
+                self.regrade(attempt_id, exam_id)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Auto-save flush failed, will retry")
+
+    @staticmethod
+    def _open_locked(path: str):
+        # Created under a name recovery ignores and renamed once locked, so
+        # another process starting up never finds it unlocked and replays it
+        directory, name = os.path.split(path)
+        while True:
+            temporary = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+            journal = open(temporary, "a", encoding="utf-8")
+            fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            try:
+                os.rename(temporary, path)
+            except FileNotFoundError:
+                # Cleaned up by another process's startup before we locked it
+                journal.close()
+                continue
+            return journal
+
+    @staticmethod
+    def _still_linked(path: str, journal) -> bool:
+        # False once another process replayed and removed the journal
+        try:
+            return os.stat(path).st_ino == os.fstat(journal.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _recover_orphaned_journals(self) -> None:
+        saves: Dict[str, Tuple[Any, datetime, Optional[int]]] = {}
+        orphans = []
+        for name in os.listdir(self.journal_dir):
+            path = os.path.join(self.journal_dir, name)
+            if name.startswith(".autosave-") and name.endswith(".tmp"):
+                # A journal its process died creating; it holds no saves
+                self._remove_if_unlocked(path)
+                continue
+            if not name.startswith("autosave-"):
+                continue
+            try:
+                journal = open(path, "r", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Owned by a live process
+                journal.close()
+                continue
+            if not self._still_linked(path, journal):
+                journal.close()
+                continue
+            orphans.append((path, journal))
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from the crash; everything before it is intact
+                    continue
+                saved_at = datetime.fromisoformat(entry["saved_at"])
+                current = saves.get(entry["attempt_id"])
+                if current is None or current[1] < saved_at:
+                    saves[entry["attempt_id"]] = (entry["answers"], saved_at, entry.get("seq"))
+
+        try:
+            closed = self._write(saves)
+        except Exception:
+            # Leave the journals in place for the next start to retry
+            logger.exception("Replaying orphaned auto-save journals failed")
+            for path, journal in orphans:
+                journal.close()
+            return
+        for path, journal in orphans:
+            # Removed while still locked, so no other process replays it again
+            os.unlink(path)
+            journal.close()
+        self._regrade(closed)
+        if orphans:
+            logger.info("Replayed %d buffered auto-saves from %d orphaned journals", len(saves), len(orphans))
+
+    @staticmethod
+    def _remove_if_unlocked(path: str) -> None:
+        try:
+            journal = open(path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        try:
+            fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.unlink(path)
+        except (BlockingIOError, FileNotFoundError):
+            pass  # renamed into place or removed meanwhile
+        finally:
+            journal.close()
+
+
+autosave_buffer = AutoSaveBuffer(
+    SessionLocal,
+    journal_dir=settings.AUTOSAVE_JOURNAL_DIR,
+    flush_interval=settings.AUTOSAVE_FLUSH_INTERVAL_SECONDS,
+    fsync=settings.AUTOSAVE_JOURNAL_FSYNC,
+    max_states=settings.AUTOSAVE_MAX_TRACKED_ATTEMPTS,
+    regrade=grading_queue.enqueue
+)
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.exam import ExamWithQuestions
+
+
+_MISSING = object()
+
+
+def render_exam_paper(exam: Optional[dict]) -> Optional[bytes]:
+    """The JSON body of GET /exams/{id}, as stored in the cache"""
+    if exam is None:
+        return None
+    return ExamWithQuestions.model_validate(exam).model_dump_json().encode()
+
+
+class ExamPaperCache:
+    """Cache of rendered exam papers keyed by exam id and version.
+
+    Every write that changes what a paper renders to bumps the exam's
+    version, so entries loaded before the write are never served again even
+    if their load was still in flight. Versions are per process; the TTL
+    bounds how long another worker can serve a paper after a change.
+
+    Versions come from one counter and only the max_versions most recently
+    changed exams keep their own. The rest share a floor version, raised
+    past every version handed out whenever one is dropped, so forgetting an
+    exam's version can only cause a miss, never a stale hit.
+
+    A missing exam (None) is cached for missing_ttl_seconds only, so an exam
+    just created through another worker is found soon after.
+
+    get_or_load_async() is the single-flight load for async callers: one
+    coroutine per exam renders, the others wait for it on the event loop.
+
+    For replica_lag_seconds after invalidating an exam, recently_changed()
+    is true: a read replica may not have the change yet, so callers render
+    those papers from the primary.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        max_versions: int = 10000,
+        missing_ttl_seconds: float = 5,
+        replica_lag_seconds: float = 10
+    ):
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.max_versions = max_versions
+        self.missing_ttl_seconds = missing_ttl_seconds
+        self._changed = TTLCache(max_entries=max_versions, ttl_seconds=replica_lag_seconds)
+        # exam key -> [lock, coroutines using it], for get_or_load_async
+        self._loading: Dict[str, List[Any]] = {}
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(exam_id: Union[str, uuid.UUID]) -> str:
+        return str(uuid.UUID(str(exam_id)))
+
+    def _version(self, key: str) -> int:
+        return self._versions.get(key, self._floor)
+
+    def version(self, exam_id: Union[str, uuid.UUID]) -> int:
+        return self._version(self._key(exam_id))
+
+    def recently_changed(self, exam_id: Union[str, uuid.UUID]) -> bool:
+        return self._changed.get(self._key(exam_id)) is not None
+
+    def get_or_load(self, exam_id: Union[str, uuid.UUID], loader: Callable[[], Any]) -> Any:
+        key = self._key(exam_id)
+        version = self._version(key)
+        paper = self._cache.get_or_load((key, version), loader)
+        if paper is None:
+            self._cache.set((key, version), None, ttl_seconds=self.missing_ttl_seconds)
+        return paper
+
+    async def get_or_load_async(self, exam_id: Union[str, uuid.UUID], loader: Callable[[], Awaitable[Any]]) -> Any:
+        key = self._key(exam_id)
+        paper = self.get(key, _MISSING)
+        if paper is not _MISSING:
+            return paper
+        # Only touched from the event loop, so no thread lock is needed
+        loading = self._loading.setdefault(key, [asyncio.Lock(), 0])
+        loading[1] += 1
+        try:
+            async with loading[0]:
+                # Stored under the version read before rendering, so a paper
+                # that changed meanwhile is never served
+                version = self._version(key)
+                paper = self._cache.get((key, version), _MISSING)
+                if paper is _MISSING:
+                    paper = await loader()
+                    self.set(key, version, paper)
+                return paper
+        finally:
+            loading[1] -= 1
+            if not loading[1]:
+                del self._loading[key]
+
+    def get(self, exam_id: Union[str, uuid.UUID], default: Any = None) -> Any:
+        key = self._key(exam_id)
+        return self._cache.get((key, self._version(key)), default)
+
+    def set(
+        self, exam_id: Union[str, uuid.UUID], version: int, paper: Any, ttl_seconds: Optional[float] = None
+    ) -> None:
+        """Store a paper rendered at `version`; if the exam changed since, it is never served"""
+        ttl = self.missing_ttl_seconds if paper is None else ttl_seconds
+        self._cache.set((self._key(exam_id), version), paper, ttl_seconds=ttl)
+
+    def invalidate(self, *exam_ids: Union[str, uuid.UUID]) -> None:
+        with self._lock:
+            for exam_id in exam_ids:
+                key = self._key(exam_id)
+                self._cache.discard((key, self._version(key)))
+                self._counter += 1
+                self._versions[key] = self._counter
+                self._versions.move_to_end(key)
+                self._changed.set(key, True)
+            if len(self._versions) > self.max_versions:
+                while len(self._versions) > self.max_versions:
+                    self._versions.popitem(last=False)
+                self._counter += 1
+                self._floor = self._counter
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._counter += 1
+            self._floor = self._counter
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+exam_paper_cache = ExamPaperCache(
+    max_entries=settings.EXAM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.EXAM_CACHE_TTL_SECONDS,
+    max_versions=settings.EXAM_CACHE_MAX_VERSIONS,
+    missing_ttl_seconds=settings.EXAM_CACHE_MISSING_TTL_SECONDS,
+    replica_lag_seconds=settings.EXAM_CACHE_REPLICA_LAG_SECONDS
+)
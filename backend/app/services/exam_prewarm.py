@@ -0,0 +1,102 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.crud.exam import get_exam_with_questions
+from app.models.exam import Exam
+from app.services.exam_cache import ExamPaperCache, exam_paper_cache, render_exam_paper
+
+logger = logging.getLogger(__name__)
+
+
+class ExamPaperPrewarmer:
+    """Renders exam papers into the cache shortly before their start time.
+
+    Every student fetches the paper in the first seconds of an exam. This
+    background thread looks for published exams starting within
+    lead_seconds and loads each one into this process's paper cache ahead
+    of time, so the rush finds it warm. Papers already cached are skipped.
+
+    Papers are rendered from the read replica, and an edit made through
+    another worker does not invalidate this process's cache. Pre-warmed
+    entries therefore live for ttl_seconds only, well below the cache's
+    own TTL, and a later pass renders them again; exams changed here
+    recently are left to the request path, which reads the primary.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        cache: ExamPaperCache,
+        lead_seconds: float = 300,
+        interval: float = 30,
+        ttl_seconds: float = 60
+    ):
+        self.session_factory = session_factory
+        self.cache = cache
+        self.lead_seconds = lead_seconds
+        self.interval = interval
+        self.ttl_seconds = ttl_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.warmed = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="exam-prewarm", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+
+    def warm_upcoming(self) -> int:
+        """Render every upcoming exam that is not cached yet; returns how many were"""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        warmed = 0
+        try:
+            exam_ids = db.query(Exam.id).filter(
+                Exam.is_published.is_(True),
+                Exam.start_time <= now + timedelta(seconds=self.lead_seconds),
+                Exam.end_time > now
+            ).all()
+            for exam_id, in exam_ids:
+                if self.cache.get(exam_id) is not None or self.cache.recently_changed(exam_id):
+                    continue
+                version = self.cache.version(exam_id)
+                paper = render_exam_paper(get_exam_with_questions(db, exam_id))
+                self.cache.set(exam_id, version, paper, ttl_seconds=self.ttl_seconds)
+                warmed += 1
+        finally:
+            db.close()
+        self.warmed += warmed
+        return warmed
+
+    def _run(self) -> None:
+        while True:
+            try:
+                warmed = self.warm_upcoming()
+                if warmed:
+                    logger.info("Pre-warmed %d exam papers", warmed)
+            except Exception:
+                logger.exception("Pre-warming exam papers failed")
+            if self._stop.wait(self.interval):
+                return
+
+
+exam_prewarmer = ExamPaperPrewarmer(
+    ReadSessionLocal,
+    exam_paper_cache,
+    lead_seconds=settings.EXAM_PREWARM_LEAD_SECONDS,
+    interval=settings.EXAM_PREWARM_INTERVAL_SECONDS,
+    ttl_seconds=settings.EXAM_PREWARM_TTL_SECONDS
+)
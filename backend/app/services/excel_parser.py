@@ -1,58 +1,143 @@
 import pandas as pd
 import json
-from typing import List, Dict, Any
+from itertools import islice
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+from openpyxl import load_workbook
 from app.models.question import QuestionType
 
+CHOICE_TYPES = {QuestionType.SINGLE_CHOICE, QuestionType.MULTI_CHOICE}
+TYPE_LOOKUP = {question_type.value: question_type for question_type in QuestionType}
+
 class ExcelParser:
-    def __init__(self):
+    def __init__(self, chunk_size: int = 5000):
         self.required_columns = ['title', 'complexity', 'type']
-        
+        self.optional_columns = ['description', 'options', 'correct_answers', 'max_score', 'tags']
+        self.chunk_size = chunk_size
+        self.errors: List[Dict[str, Any]] = []
+
     def parse_excel(self, file_path: str) -> List[Dict[str, Any]]:
         """Parse Excel file and return list of question dictionaries"""
+        questions = [question for _, question in self.iter_rows(file_path)]
+        if self.errors:
+            first = self.errors[0]
+            raise ValueError(f"Error parsing Excel file: row {first['row']}: {first['error']}")
+        return questions
+
+    def iter_rows(self, file_path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (excel_row_number, question) pairs, collecting bad rows in self.errors"""
+        for chunk in self.iter_chunks(file_path):
+            yield from chunk
+
+    def iter_chunks(self, file_path: str) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """Stream the first sheet in chunks of parsed (excel_row_number, question) pairs.
+
+        Rows are read through openpyxl's read-only mode and each chunk is
+        transformed column-wise, so peak memory depends on chunk_size rather
+        than on the size of the workbook.
+        """
+        self.errors.clear()
+        for columns, raw_rows, first_row_number in self.iter_raw_chunks(file_path):
+            chunk = self.parse_chunk(
+                pd.DataFrame(raw_rows, columns=columns),
+                range(first_row_number, first_row_number + len(raw_rows))
+            )
+            if chunk:
+                yield chunk
+
+    def iter_raw_chunks(self, file_path: str) -> Iterator[Tuple[List[str], List[tuple], int]]:
+        """Stream (columns, raw_rows, first_excel_row_number) blocks of unparsed cell values"""
+        try:
+            workbook = load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"Error parsing Excel file: {str(e)}")
+
         try:
-            df = pd.read_excel(file_path)
-            
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            columns = [str(name).strip() if name is not None else '' for name in header]
+
             # Validate required columns
-            missing_columns = [col for col in self.required_columns if col not in df.columns]
+            missing_columns = [col for col in self.required_columns if col not in columns]
             if missing_columns:
                 raise ValueError(f"Missing required columns: {missing_columns}")
-            
-            questions = []
-            for index, row in df.iterrows():
-                question = self._parse_row(row)
-                if question:
-                    questions.append(question)
-                    
-            return questions
-            
-        except Exception as e:
-            raise ValueError(f"Error parsing Excel file: {str(e)}")
-    
-    def _parse_row(self, row) -> Dict[str, Any]:
-        """Parse a single row from Excel"""
+
+            # Row 1 is the header, so data starts on spreadsheet row 2
+            next_row_number = 2
+            width = len(columns)
+            while True:
+                # Read-only rows can be ragged when trailing cells are empty
+                raw_rows = [
+                    row[:width] + (None,) * (width - len(row))
+                    for row in islice(rows, self.chunk_size)
+                ]
+                if not raw_rows:
+                    break
+                yield columns, raw_rows, next_row_number
+                next_row_number += len(raw_rows)
+        finally:
+            workbook.close()
+
+    def count_rows(self, file_path: str) -> Optional[int]:
+        """Data row count from the sheet's recorded dimensions, if the file has them"""
+        workbook = load_workbook(file_path, read_only=True)
         try:
-            question = {
-                'title': str(row['title']),
-                'description': str(row.get('description', '')),
-                'complexity': str(row['complexity']),
-                'type': QuestionType(row['type']),
-                'max_score': int(row.get('max_score', 1)),
-                'tags': self._parse_tags(row.get('tags', ''))
-            }
-            
-            # Parse options for choice questions
-            if question['type'] in [QuestionType.SINGLE_CHOICE, QuestionType.MULTI_CHOICE]:
-                question['options'] = self._parse_json_field(row.get('options', '[]'))
-                question['correct_answers'] = self._parse_json_field(row.get('correct_answers', '[]'))
-            else:
-                question['options'] = None
-                question['correct_answers'] = None
-                
-            return question
-            
-        except Exception as e:
-            raise ValueError(f"Error parsing row: {str(e)}")
-    
+            max_row = workbook.worksheets[0].max_row
+            return max(max_row - 1, 0) if max_row else None
+        finally:
+            workbook.close()
+
+    def parse_chunk(self, df: pd.DataFrame, row_numbers) -> List[Tuple[int, Dict[str, Any]]]:
+        """Parse a block of rows with column-wise transforms instead of per-row access"""
+        df = df.reindex(columns=self.required_columns + self.optional_columns)
+        df.index = pd.Index(row_numbers)
+
+        # Spreadsheets often trail off into blank rows
+        df = df.dropna(how='all')
+        if df.empty:
+            return []
+
+        errors = pd.Series('', index=df.index)
+
+        types = df['type'].map(TYPE_LOOKUP)
+        invalid_types = types.isna()
+        errors[invalid_types] = "'" + df.loc[invalid_types, 'type'].astype(str) + "' is not a valid QuestionType"
+
+        max_scores = pd.to_numeric(df['max_score'], errors='coerce')
+        invalid_scores = max_scores.isna() & df['max_score'].notna()
+        errors[invalid_scores] = "invalid max_score: " + df.loc[invalid_scores, 'max_score'].astype(str)
+
+        for column in self.required_columns:
+            blank = df[column].isna()
+            errors[blank] = f"{column} is required"
+
+        for row_number, message in errors[errors != ''].items():
+            self.errors.append({'row': row_number, 'error': f"Error parsing row: {message}"})
+
+        valid = errors == ''
+        df = df[valid]
+        types = types[valid]
+        is_choice = types.isin(CHOICE_TYPES)
+
+        parsed = pd.DataFrame({
+            'title': df['title'].astype(str),
+            'description': df['description'].fillna('').astype(str),
+            'complexity': df['complexity'].astype(str),
+            'type': types,
+            'max_score': max_scores[valid].fillna(1).astype(int),
+            'tags': self._map_unique(df['tags'], self._parse_tags),
+            # Options only apply to choice questions
+            'options': self._map_unique(df['options'], self._parse_json_field).where(is_choice, None),
+            'correct_answers': self._map_unique(df['correct_answers'], self._parse_json_field).where(is_choice, None),
+        }, index=df.index)
+
+        return list(zip(parsed.index, parsed.to_dict('records')))
+
+    def _map_unique(self, column: pd.Series, parse) -> pd.Series:
+        """Apply parse once per distinct cell value rather than once per row"""
+        column = column.astype(object).where(column.notna(), '')
+        parsed = {value: parse(value) for value in column.unique()}
+        return column.map(parsed).astype(object)
+
     def _parse_json_field(self, value: str) -> Any:
         """Parse JSON field from string"""
         if pd.isna(value) or value == '':
@@ -61,9 +146,19 @@ class ExcelParser:
             return json.loads(str(value))
         except json.JSONDecodeError:
             return str(value).split(',') if ',' in str(value) else [str(value)]
-    
+
     def _parse_tags(self, tags: str) -> List[str]:
         """Parse tags from CSV string"""
         if pd.isna(tags) or tags == '':
             return []
-        return [tag.strip() for tag in str(tags).split(',')]
\ No newline at end of file
+        return [tag.strip() for tag in str(tags).split(',')]
+
+
+def parse_raw_chunk(columns: List[str], raw_rows: List[tuple], first_row_number: int):
+    """Parse one block from iter_raw_chunks; module-level so worker processes can run it"""
+    parser = ExcelParser()
+    chunk = parser.parse_chunk(
+        pd.DataFrame(raw_rows, columns=columns),
+        range(first_row_number, first_row_number + len(raw_rows))
+    )
+    return chunk, parser.errors
@@ -1,21 +1,119 @@
-from typing import Any, List
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from app.models.question import QuestionType
 
+# Bit 63 marks an answer value the key has never seen, so it can never match
+UNKNOWN_CHOICE = 1 << 63
+MAX_ENCODED_CHOICES = 63
+
+# Answer kinds in the encoded matrix
+UNANSWERED, SCALAR, LIST = 0, 1, 2
+
+
+def _token(value: Any) -> Any:
+    """Hashable stand-in for a JSON answer value"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+class AnswerKey:
+    """An exam's answer key compiled once for vectorized grading.
+
+    Each choice question gets a value -> bit table built from its options and
+    correct answers, so an answer becomes a single uint64 mask and the key a
+    mask per question. Choice questions with more distinct values than fit
+    in a mask are graded one answer at a time instead.
+    """
+
+    def __init__(self, questions: Sequence[Any]):
+        self.question_ids = [str(question.id) for question in questions]
+        self.types = [QuestionType(question.type) for question in questions]
+        self.max_scores = np.array([question.max_score or 1 for question in questions], dtype=np.int64)
+        self.correct_answers = [question.correct_answers or [] for question in questions]
+        self.is_single = np.array([t == QuestionType.SINGLE_CHOICE for t in self.types])
+        self.is_multi = np.array([t == QuestionType.MULTI_CHOICE for t in self.types])
+        self.correct_masks = np.zeros(len(questions), dtype=np.uint64)
+        self.fallback = np.zeros(len(questions), dtype=bool)
+        self._bits: List[Optional[Dict[Any, int]]] = []
+
+        for index, question in enumerate(questions):
+            if not (self.is_single[index] or self.is_multi[index]):
+                self._bits.append(None)
+                continue
+            values = dict.fromkeys(_token(value) for value in (question.options or []) + self.correct_answers[index])
+            if len(values) > MAX_ENCODED_CHOICES:
+                self.fallback[index] = True
+                self._bits.append(None)
+                continue
+            bits = {value: 1 << position for position, value in enumerate(values)}
+            self._bits.append(bits)
+            mask = 0
+            for value in self.correct_answers[index]:
+                mask |= bits[_token(value)]
+            self.correct_masks[index] = mask
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    def choice_bits(self, index: int) -> Optional[Dict[Any, int]]:
+        """Answer value -> bit for a choice question, None if it isn't encoded"""
+        return self._bits[index]
+
+    def encode(self, answer_sets: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode attempts' {question_id: answer} maps as (masks, kinds) matrices"""
+        # Built as plain Python ints first; per-cell numpy item access is far slower
+        masks: List[List[int]] = []
+        kinds: List[List[int]] = []
+        columns = list(zip(self.question_ids, self._bits))
+        empty_masks, empty_kinds = [0] * len(columns), [UNANSWERED] * len(columns)
+        for answers in answer_sets:
+            if not answers:
+                masks.append(empty_masks)
+                kinds.append(empty_kinds)
+                continue
+            row_masks, row_kinds = empty_masks.copy(), empty_kinds.copy()
+            for column, (question_id, bits) in enumerate(columns):
+                value = answers.get(question_id)
+                # Falsy answers ("", [], 0) score nothing, as in grade_question
+                if not value:
+                    continue
+                if isinstance(value, list):
+                    row_kinds[column] = LIST
+                    if bits is not None:
+                        mask = 0
+                        for item in value:
+                            mask |= bits.get(_token(item), UNKNOWN_CHOICE)
+                        row_masks[column] = mask
+                else:
+                    row_kinds[column] = SCALAR
+                    if bits is not None:
+                        row_masks[column] = bits.get(_token(value), UNKNOWN_CHOICE)
+            masks.append(row_masks)
+            kinds.append(row_kinds)
+        shape = (len(answer_sets), len(columns))
+        return (
+            np.array(masks, dtype=np.uint64).reshape(shape),
+            np.array(kinds, dtype=np.int8).reshape(shape),
+        )
+
+
 class GradingService:
     @staticmethod
-    def grade_question(question_type: QuestionType, student_answer: Any, correct_answers: List[Any]) -> int:
+    def grade_question(question_type: QuestionType, student_answer: Any, correct_answers: List[Any], max_score: int = 1) -> int:
         """Grade a single question and return score"""
         if not student_answer:
             return 0
             
         if question_type == QuestionType.SINGLE_CHOICE:
-            return 1 if student_answer in correct_answers else 0
+            return max_score if student_answer in correct_answers else 0
         elif question_type == QuestionType.MULTI_CHOICE:
             if not isinstance(student_answer, list):
                 return 0
             student_set = set(student_answer)
             correct_set = set(correct_answers)
-            return 1 if student_set == correct_set else 0
+            return max_score if student_set == correct_set else 0
         else:
             # Text and image questions need manual grading
             return 0
@@ -23,4 +121,26 @@ class GradingService:
     @staticmethod
     def calculate_total_score(graded_answers: List[dict]) -> int:
         """Calculate total score from graded answers"""
-        return sum(answer.get('score', 0) for answer in graded_answers)
\ No newline at end of file
+        return sum(answer.get('score', 0) for answer in graded_answers)
+
+    @staticmethod
+    def grade_batch(key: AnswerKey, answer_sets: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Grade every attempt against the key in one pass.
+
+        Returns (scores, correct) matrices of attempts x questions. Text and
+        image questions score 0 and are never marked correct; they need
+        manual grading.
+        """
+        masks, kinds = key.encode(answer_sets)
+        single = key.is_single & (kinds == SCALAR) & ((masks & key.correct_masks) != 0)
+        multi = key.is_multi & (kinds == LIST) & (masks == key.correct_masks)
+        correct = single | multi
+
+        for column in np.flatnonzero(key.fallback):
+            question_id = key.question_ids[column]
+            for row, answers in enumerate(answer_sets):
+                correct[row, column] = GradingService.grade_question(
+                    key.types[column], (answers or {}).get(question_id), key.correct_answers[column]
+                ) > 0
+
+        return correct * key.max_scores, correct
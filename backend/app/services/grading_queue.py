@@ -0,0 +1,186 @@
+import logging
+import queue
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.attempt import grade_exam_attempts
+from app.models.attempt import AttemptStatus, ExamAttempt
+
+logger = logging.getLogger(__name__)
+
+# (attempt_id, exam_id, failed tries so far)
+_Item = Tuple[uuid.UUID, uuid.UUID, int]
+
+
+class GradingQueue:
+    """Grades submitted attempts in the background, off the request path.
+
+    Submitting an attempt enqueues it; a pool of worker threads drains the
+    queue in batches, groups the batch by exam and grades each group with
+    one grade_exam_attempts call. The database stays the source of truth:
+    an attempt is queued for as long as its status is "submitted", so at
+    startup every submitted attempt is enqueued again and nothing is lost
+    when a worker dies.
+
+    Grading is idempotent (graded attempts are skipped, Answer rows are
+    replaced and attempts being graded elsewhere are skipped), so a failed
+    batch is simply retried with exponential backoff, up to max_retries.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int = 2,
+        batch_size: int = 500,
+        max_retries: int = 3,
+        retry_delay: float = 1.0
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._timers: Dict[int, threading.Timer] = {}
+        self.in_flight = 0
+        self.graded = 0
+        self.retries = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f"grading-worker-{n}", daemon=True)
+                for n in range(self.workers)
+            ]
+        self._recover_submitted_attempts()
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+            timers, self._timers = list(self._timers.values()), {}
+        for timer in timers:
+            timer.cancel()
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def enqueue(self, attempt_id: uuid.UUID, exam_id: uuid.UUID) -> None:
+        self._queue.put((uuid.UUID(str(attempt_id)), uuid.UUID(str(exam_id)), 0))
+
+    def depth(self) -> int:
+        """Attempts waiting to be graded, including those waiting for a retry"""
+        with self._lock:
+            return self._queue.qsize() + len(self._timers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "retrying": len(self._timers),
+                "in_flight": self.in_flight,
+                "graded": self.graded,
+                "retries": self.retries,
+                "failed": self.failed,
+            }
+
+    def _recover_submitted_attempts(self) -> None:
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(ExamAttempt.id, ExamAttempt.exam_id)
+                .filter(ExamAttempt.status == AttemptStatus.SUBMITTED.value)
+                .all()
+            )
+        except Exception:
+            logger.exception("Could not load submitted attempts to grade")
+            return
+        finally:
+            db.close()
+        for attempt_id, exam_id in rows:
+            self.enqueue(attempt_id, exam_id)
+        if rows:
+            logger.info("Queued %d submitted attempts for grading", len(rows))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Another worker's stop signal; hand it back
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            by_exam: Dict[uuid.UUID, List[_Item]] = defaultdict(list)
+            for item in batch:
+                by_exam[item[1]].append(item)
+            for exam_id, items in by_exam.items():
+                self._grade(exam_id, items)
+
+    def _grade(self, exam_id: uuid.UUID, items: List[_Item]) -> None:
+        with self._lock:
+            self.in_flight += len(items)
+        db = self.session_factory()
+        try:
+            report = grade_exam_attempts(db, exam_id, [attempt_id for attempt_id, _, _ in items])
+        except Exception:
+            logger.exception("Grading %d attempts of exam %s failed", len(items), exam_id)
+            for item in items:
+                self._retry(item)
+        else:
+            with self._lock:
+                self.graded += report["attempts"]
+        finally:
+            db.close()
+            with self._lock:
+                self.in_flight -= len(items)
+
+    def _retry(self, item: _Item) -> None:
+        attempt_id, exam_id, tries = item
+        with self._lock:
+            if tries >= self.max_retries or not self._threads:
+                self.failed += 1
+                # Still "submitted" in the database, so the next start picks it up
+                logger.error("Giving up grading attempt %s after %d tries", attempt_id, tries + 1)
+                return
+            self.retries += 1
+            timer = threading.Timer(self.retry_delay * 2 ** tries, self._requeue, ((attempt_id, exam_id, tries + 1),))
+            timer.daemon = True
+            self._timers[id(timer)] = timer
+        timer.start()
+
+    def _requeue(self, item: _Item) -> None:
+        with self._lock:
+            # Runs on the timer's own thread
+            self._timers.pop(id(threading.current_thread()), None)
+            if not self._threads:
+                return
+        self._queue.put(item)
+
+
+grading_queue = GradingQueue(
+    SessionLocal,
+    workers=settings.GRADING_WORKERS,
+    batch_size=settings.GRADING_BATCH_SIZE,
+    max_retries=settings.GRADING_MAX_RETRIES,
+    retry_delay=settings.GRADING_RETRY_DELAY_SECONDS
+)
@@ -0,0 +1,324 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.question import bulk_create_questions
+
+if TYPE_CHECKING:
+    # pandas and openpyxl load on the first import, not at worker startup
+    from app.services.excel_parser import ExcelParser
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+INTERRUPTED_MESSAGE = "Import interrupted by a server restart, nothing was imported; upload the file again"
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove(file_path: Optional[str]) -> None:
+    if file_path:
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+
+
+class ImportJobStore:
+    """Import job state in a local SQLite file, shared by every worker on the host.
+
+    Each job records the worker process that owns it and its uploaded file,
+    so jobs whose worker died can be failed and their files removed.
+    """
+
+    COLUMNS = (
+        "id", "status", "filename", "created_by", "rows_total", "rows_parsed",
+        "rows_inserted", "rows_failed", "errors", "message", "created_at",
+        "started_at", "finished_at", "file_path", "owner_pid",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            # WAL lets request handlers read progress while a job is writing it
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS import_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    filename TEXT,
+                    created_by TEXT NOT NULL,
+                    rows_total INTEGER,
+                    rows_parsed INTEGER NOT NULL DEFAULT 0,
+                    rows_inserted INTEGER NOT NULL DEFAULT 0,
+                    rows_failed INTEGER NOT NULL DEFAULT 0,
+                    errors TEXT,
+                    message TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    file_path TEXT,
+                    owner_pid INTEGER
+                )
+                """
+            )
+            # Files made before file_path and owner_pid were recorded
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(import_jobs)")}
+            for column, type in (("file_path", "TEXT"), ("owner_pid", "INTEGER")):
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE import_jobs ADD COLUMN {column} {type}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, filename: str, created_by: uuid.UUID, file_path: Optional[str] = None) -> str:
+        job_id = str(uuid.uuid4())
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO import_jobs (id, status, filename, created_by, created_at, file_path, owner_pid) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JobStatus.QUEUED, filename, str(created_by), time.time(), file_path, os.getpid()),
+            )
+        return job_id
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        unknown = set(fields) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        if "errors" in fields:
+            fields["errors"] = json.dumps(fields["errors"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"UPDATE import_jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["errors"] = json.loads(job["errors"]) if job["errors"] else []
+        job["eta_seconds"] = self._eta(job)
+        return job
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Jobs still queued or running, whichever worker owns them"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, status, file_path, owner_pid FROM import_jobs WHERE status IN (?, ?)",
+                (JobStatus.QUEUED, JobStatus.RUNNING),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def fail_interrupted(self, job_id: str) -> None:
+        self.update(
+            job_id, status=JobStatus.FAILED, rows_inserted=0, message=INTERRUPTED_MESSAGE, finished_at=time.time()
+        )
+
+    @staticmethod
+    def _eta(job: Dict[str, Any]) -> Optional[float]:
+        if job["status"] != JobStatus.RUNNING or not job["rows_total"] or not job["rows_parsed"]:
+            return None
+        elapsed = time.time() - job["started_at"]
+        remaining = max(job["rows_total"] - job["rows_parsed"], 0)
+        return round(remaining * elapsed / job["rows_parsed"], 1)
+
+
+class ImportJobRunner:
+    """Runs question imports in the background.
+
+    Each job streams raw row blocks out of the workbook on a job thread and
+    fans them out to a process pool for parsing. It then feeds the parsed
+    rows, in order, into the single-transaction bulk importer. The number of
+    blocks in flight is capped, so memory stays flat however large the
+    file is.
+    """
+
+    def __init__(self, store: ImportJobStore, parse_workers: int, max_concurrent_jobs: int, chunk_size: int):
+        self.store = store
+        self.parse_workers = parse_workers
+        self.chunk_size = chunk_size
+        self._jobs = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="import-job")
+        self._parsers: Optional[ProcessPoolExecutor] = None
+        # job_id -> (future, file_path) for jobs submitted and not yet done
+        self._submitted: Dict[str, Tuple[Future, str]] = {}
+        self._lock = threading.Lock()
+
+    def _parser_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._parsers is None:
+                # spawn, not fork: the parent holds threads and pooled DB connections
+                self._parsers = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._parsers
+
+    def submit(self, file_path: str, filename: str, created_by: uuid.UUID) -> str:
+        job_id = self.store.create(filename, created_by, file_path)
+        with self._lock:
+            future = self._jobs.submit(self._run, job_id, file_path, created_by)
+            self._submitted[job_id] = (future, file_path)
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+
+    def _forget(self, job_id: str) -> None:
+        with self._lock:
+            self._submitted.pop(job_id, None)
+
+    def recover(self) -> int:
+        """Fail jobs left queued or running by a worker that is gone, and
+        remove their uploads. Call at startup; returns how many were failed.
+
+        The import is one transaction, so an interrupted job wrote nothing
+        and the user only has to upload the file again.
+        """
+        recovered = 0
+        for job in self.store.unfinished():
+            if job["owner_pid"] != os.getpid() and _pid_alive(job["owner_pid"]):
+                continue
+            self.store.fail_interrupted(job["id"])
+            _remove(job["file_path"])
+            recovered += 1
+        return recovered
+
+    def _run(self, job_id: str, file_path: str, created_by: uuid.UUID) -> None:
+        from app.services.excel_parser import ExcelParser
+
+        db = SessionLocal()
+        try:
+            parser = ExcelParser(chunk_size=self.chunk_size)
+            self.store.update(
+                job_id,
+                status=JobStatus.RUNNING,
+                started_at=time.time(),
+                rows_total=parser.count_rows(file_path),
+            )
+            report = bulk_create_questions(
+                db,
+                self._parse(job_id, parser, file_path),
+                created_by=created_by,
+                errors=parser.errors,
+                on_batch=lambda imported: self.store.update(job_id, rows_inserted=imported),
+            )
+            self.store.update(
+                job_id,
+                status=JobStatus.FAILED if report["failed"] else JobStatus.SUCCEEDED,
+                rows_parsed=report["rows"],
+                rows_inserted=report["imported"],
+                rows_failed=report["failed"],
+                errors=report["errors"],
+                message=(
+                    f"Import rejected: {report['failed']} of {report['rows']} rows are invalid, nothing was imported"
+                    if report["failed"] else
+                    f"Successfully imported {report['imported']} questions ({report['rows_per_second']} rows/s)"
+                ),
+                finished_at=time.time(),
+            )
+        except Exception as e:
+            self.store.update(
+                job_id,
+                status=JobStatus.FAILED,
+                rows_inserted=0,
+                message=f"Error importing questions: {str(e)}",
+                finished_at=time.time(),
+            )
+        finally:
+            db.close()
+            _remove(file_path)
+
+    def _parse(self, job_id: str, parser: "ExcelParser", file_path: str) -> Iterator[Tuple[int, dict]]:
+        from app.services.excel_parser import parse_raw_chunk
+
+        pool = self._parser_pool()
+        pending: "deque[Future]" = deque()
+        parsed = 0
+
+        def drain() -> List[Tuple[int, dict]]:
+            nonlocal parsed
+            chunk, chunk_errors = pending.popleft().result()
+            parser.errors.extend(chunk_errors)
+            parsed += len(chunk) + len(chunk_errors)
+            self.store.update(job_id, rows_parsed=parsed, rows_failed=len(parser.errors))
+            return chunk
+
+        for columns, raw_rows, first_row_number in parser.iter_raw_chunks(file_path):
+            pending.append(pool.submit(parse_raw_chunk, columns, raw_rows, first_row_number))
+            if len(pending) >= self.parse_workers * 2:
+                yield from drain()
+        while pending:
+            yield from drain()
+
+    def shutdown(self) -> None:
+        # Jobs that never started are failed now; running ones fail on their
+        # own once the parser pool below is gone
+        with self._lock:
+            submitted = list(self._submitted.items())
+        for job_id, (future, file_path) in submitted:
+            if future.cancel():
+                self.store.fail_interrupted(job_id)
+                _remove(file_path)
+        self._jobs.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            if self._parsers is not None:
+                self._parsers.shutdown(wait=False, cancel_futures=True)
+                self._parsers = None
+
+
+_runner: Optional[ImportJobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_import_job_runner() -> ImportJobRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = ImportJobRunner(
+                ImportJobStore(settings.IMPORT_JOB_DB_PATH),
+                parse_workers=settings.IMPORT_PARSE_WORKERS,
+                max_concurrent_jobs=settings.IMPORT_MAX_CONCURRENT_JOBS,
+                chunk_size=settings.IMPORT_CHUNK_SIZE,
+            )
+        return _runner
+
+
+def recover_import_jobs() -> int:
+    return get_import_job_runner().recover()
+
+
+def shutdown_import_job_runner() -> None:
+    global _runner
+    with _runner_lock:
+        if _runner is not None:
+            _runner.shutdown()
+            _runner = None
@@ -0,0 +1,211 @@
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.crud.attempt import graded_answer_rows, graded_attempts_marker
+from app.models.exam import Exam, ExamQuestion
+from app.models.question import Question
+from app.services.exam_cache import exam_paper_cache
+from app.services.grading import UNANSWERED, UNKNOWN_CHOICE, AnswerKey
+
+# Share of attempts in the upper and lower groups of the discrimination index
+DISCRIMINATION_GROUP = 0.27
+DISTRIBUTION_BINS = 10
+# Graders stamp a whole run with the time it started, so a run that commits
+# after a newer one can carry an older graded_at. Incremental loads re-read
+# this far back; re-read attempts simply replace their rows.
+REGRADE_OVERLAP = timedelta(minutes=10)
+
+
+class ExamItemData:
+    """An exam's graded results as matrices, one row per attempt.
+
+    scores holds each attempt's score per question, masks and kinds its
+    answers encoded with the exam's AnswerKey, and totals the attempt
+    totals. Newly graded attempts are merged in without reloading the rest.
+    """
+
+    def __init__(self, paper_version: int, questions: Sequence[Any]):
+        self.paper_version = paper_version
+        self.key = AnswerKey(questions)
+        self.titles = [question.title for question in questions]
+        self.columns = {question_id: column for column, question_id in enumerate(self.key.question_ids)}
+        self.rows: Dict[uuid.UUID, int] = {}
+        width = len(questions)
+        self.totals = np.zeros(0, dtype=np.float64)
+        self.scores = np.zeros((0, width), dtype=np.float64)
+        self.masks = np.zeros((0, width), dtype=np.uint64)
+        self.kinds = np.zeros((0, width), dtype=np.int8)
+        # (graded attempts, latest graded_at) the matrices reflect
+        self.marker: Optional[Tuple[int, Optional[datetime]]] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.lock = threading.Lock()
+
+    def reset(self) -> None:
+        self.rows.clear()
+        width = len(self.key)
+        self.totals = np.zeros(0, dtype=np.float64)
+        self.scores = np.zeros((0, width), dtype=np.float64)
+        self.masks = np.zeros((0, width), dtype=np.uint64)
+        self.kinds = np.zeros((0, width), dtype=np.int8)
+
+    def merge(self, rows: Sequence[Tuple]) -> int:
+        """Fold in (attempt_id, total_score, question_id, answer, score) rows; returns attempts merged"""
+        attempt_ids: List[uuid.UUID] = []
+        totals: List[float] = []
+        answer_sets: List[Dict[str, Any]] = []
+        cells_row: List[int] = []
+        cells_column: List[int] = []
+        cells_score: List[float] = []
+        index: Dict[uuid.UUID, int] = {}
+        for attempt_id, total_score, question_id, answer, score in rows:
+            position = index.get(attempt_id)
+            if position is None:
+                position = index[attempt_id] = len(attempt_ids)
+                attempt_ids.append(attempt_id)
+                totals.append(total_score or 0)
+                answer_sets.append({})
+            if question_id is None:
+                continue
+            column = self.columns.get(str(question_id))
+            if column is None:
+                continue
+            answer_sets[position][str(question_id)] = answer
+            cells_row.append(position)
+            cells_column.append(column)
+            cells_score.append(score or 0)
+        if not attempt_ids:
+            return 0
+
+        scores = np.zeros((len(attempt_ids), len(self.key)), dtype=np.float64)
+        scores[np.array(cells_row, dtype=np.intp), np.array(cells_column, dtype=np.intp)] = cells_score
+        masks, kinds = self.key.encode(answer_sets)
+
+        # Attempts seen before (re-read or regraded) are overwritten in place
+        existing = [(position, self.rows[attempt_id]) for position, attempt_id in enumerate(attempt_ids) if attempt_id in self.rows]
+        if existing:
+            new_positions, old_rows = (np.array(side, dtype=np.intp) for side in zip(*existing))
+            self.totals[old_rows] = np.array(totals, dtype=np.float64)[new_positions]
+            self.scores[old_rows] = scores[new_positions]
+            self.masks[old_rows] = masks[new_positions]
+            self.kinds[old_rows] = kinds[new_positions]
+        fresh = [position for position, attempt_id in enumerate(attempt_ids) if attempt_id not in self.rows]
+        if fresh:
+            fresh = np.array(fresh, dtype=np.intp)
+            for offset, position in enumerate(fresh.tolist()):
+                self.rows[attempt_ids[position]] = len(self.totals) + offset
+            self.totals = np.concatenate([self.totals, np.array(totals, dtype=np.float64)[fresh]])
+            self.scores = np.concatenate([self.scores, scores[fresh]])
+            self.masks = np.concatenate([self.masks, masks[fresh]])
+            self.kinds = np.concatenate([self.kinds, kinds[fresh]])
+        return len(attempt_ids)
+
+    def statistics(self) -> Dict[str, Any]:
+        key, totals, scores = self.key, self.totals, self.scores
+        attempts = len(totals)
+        max_total = int(key.max_scores.sum())
+        max_scores = key.max_scores.astype(np.float64)
+
+        bins = max(min(DISTRIBUTION_BINS, max_total), 1)
+        counts, edges = np.histogram(totals, bins=bins, range=(0, max(max_total, 1)))
+        summary: Dict[str, Any] = {
+            "attempts": attempts,
+            "max_score": max_total,
+            "mean": None, "median": None, "stdev": None, "min": None, "max": None,
+            "distribution": [
+                {"start": float(start), "end": float(end), "count": int(count)}
+                for start, end, count in zip(edges[:-1], edges[1:], counts)
+            ],
+        }
+        if attempts:
+            summary.update(
+                mean=float(totals.mean()), median=float(np.median(totals)), stdev=float(totals.std()),
+                min=float(totals.min()), max=float(totals.max())
+            )
+
+        p_values = discrimination = answered = None
+        if attempts:
+            p_values = scores.mean(axis=0) / max_scores
+            answered = (self.kinds != UNANSWERED).mean(axis=0)
+        if attempts >= 2:
+            group = max(1, int(round(attempts * DISCRIMINATION_GROUP)))
+            order = np.argsort(totals, kind="stable")
+            discrimination = (scores[order[-group:]].mean(axis=0) - scores[order[:group]].mean(axis=0)) / max_scores
+
+        questions = []
+        for column, question_id in enumerate(key.question_ids):
+            bits = key.choice_bits(column)
+            options = None
+            if bits is not None and attempts:
+                selected = self.masks[:, column]
+                options = {str(value): float(((selected & np.uint64(bit)) != 0).mean()) for value, bit in bits.items()}
+                other = float(((selected & np.uint64(UNKNOWN_CHOICE)) != 0).mean())
+                if other:
+                    options["(other)"] = other
+            questions.append({
+                "question_id": question_id,
+                "title": self.titles[column],
+                "type": key.types[column].value,
+                "max_score": int(key.max_scores[column]),
+                "answered": float(answered[column]) if answered is not None else None,
+                "p_value": float(p_values[column]) if p_values is not None else None,
+                "discrimination": float(discrimination[column]) if discrimination is not None else None,
+                "options": options,
+            })
+        summary["questions"] = questions
+        return summary
+
+
+class ItemAnalytics:
+    """Per-exam score and item statistics, kept up to date incrementally.
+
+    Each request checks one cheap marker, the exam's graded attempt count
+    and latest graded_at. When it is unchanged the cached statistics are
+    returned as they are. Otherwise only attempts graded since the last
+    load are read, in one query of plain rows, and merged into the exam's
+    matrices before the statistics are recomputed with NumPy. A change to
+    the exam's questions (its paper version) starts the exam over.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def get(self, db: Session, exam_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        version = exam_paper_cache.version(exam_id)
+        data = self._cache.get(exam_id)
+        if data is None or data.paper_version != version:
+            if db.get(Exam, exam_id) is None:
+                return None
+            questions = db.query(Question).join(
+                ExamQuestion, ExamQuestion.question_id == Question.id
+            ).filter(ExamQuestion.exam_id == exam_id).order_by(ExamQuestion.order).all()
+            data = ExamItemData(version, questions)
+            self._cache.set(exam_id, data)
+
+        with data.lock:
+            count, latest = graded_attempts_marker(db, exam_id)
+            if data.result is not None and data.marker == (count, latest):
+                return data.result
+            since = data.marker[1] if data.marker else None
+            if since is not None:
+                data.merge(graded_answer_rows(db, exam_id, graded_since=since - REGRADE_OVERLAP))
+            if since is None or len(data.rows) != count:
+                # First load, or attempts stopped counting as graded: read everything
+                data.reset()
+                data.merge(graded_answer_rows(db, exam_id))
+            data.marker = (count, latest)
+            data.result = {**data.statistics(), "graded_through": latest}
+            return data.result
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+item_analytics = ItemAnalytics(
+    max_entries=settings.ANALYTICS_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS
+)
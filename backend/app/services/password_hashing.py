@@ -0,0 +1,211 @@
+import asyncio
+import math
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_SECONDS, PASSWORD_HASH_WAIT_SECONDS
+from app.core.security import get_password_hash, verify_password
+
+
+class PasswordHasherBusy(Exception):
+    """Every worker is busy and the wait queue is full, or the wait timed out"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password hashing is saturated, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    # Runs in the worker process: the result, and how long the hash itself took
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+def _hash_seconds(future: Future) -> Optional[float]:
+    if future.cancelled() or future.exception() is not None:
+        return None
+    return future.result()[1]
+
+
+class PasswordHashPool:
+    """Runs argon2 hashing and verification in a dedicated process pool.
+
+    Argon2 is deliberately CPU- and memory-hard. Run on the request thread
+    during a login spike, it starves the threadpool every other endpoint
+    shares. Here at most `workers` hashes run at once, up to `max_queue`
+    more wait for a worker, and anything beyond that is rejected straight
+    away with PasswordHasherBusy, so callers answer 503 rather than time out.
+
+    With workers=0 hashing runs inline, which is what tests and one-off
+    scripts want.
+
+    Endpoints use the *_async methods. hash() and verify() block their
+    thread until the worker is done, so at most `max_sync_waiters` callers
+    may wait that way; that stays well below the threadpool sync endpoints
+    share (40 threads by default).
+
+    Time spent hashing and time spent waiting for a worker are exported as
+    the password_hash_seconds and password_hash_queue_wait_seconds
+    histograms.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        timeout: float,
+        latency_window: int = 1000,
+        max_sync_waiters: int = 8
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_queue)
+        self._sync_waiters = threading.BoundedSemaphore(max_sync_waiters)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._latencies: "deque[float]" = deque(maxlen=latency_window)
+        self.pending = 0
+        self.calls = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the parent holds threads and pooled DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def hash(self, password: str) -> str:
+        return self._run(get_password_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run(verify_password, plain_password, hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        """hash() for async endpoints; awaits the worker instead of blocking a thread"""
+        return await self._run_async(get_password_hash, password)
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        """verify() for async endpoints; awaits the worker instead of blocking a thread"""
+        return await self._run_async(verify_password, plain_password, hashed_password)
+
+    def _admit(self) -> float:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy(self.retry_after())
+        with self._lock:
+            self.pending += 1
+        return time.perf_counter()
+
+    def _submit(self, started: float, fn: Callable[..., Any], *args: Any) -> Future:
+        try:
+            future: Future = self._pool().submit(_timed, fn, *args)
+        except Exception:
+            self._release(started)
+            raise
+        # The slot stays taken until the worker is really done, even if we stop waiting
+        future.add_done_callback(lambda done: self._release(started, _hash_seconds(done)))
+        return future
+
+    def _timed_out(self) -> PasswordHasherBusy:
+        with self._lock:
+            self.timeouts += 1
+        return PasswordHasherBusy(self.retry_after())
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._sync_waiters.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy(self.retry_after())
+        try:
+            started = self._admit()
+            if self.workers <= 0:
+                return self._run_inline(started, fn, *args)
+            try:
+                return self._submit(started, fn, *args).result(timeout=self.timeout)[0]
+            except FutureTimeout:
+                raise self._timed_out()
+        finally:
+            self._sync_waiters.release()
+
+    async def _run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        started = self._admit()
+        if self.workers <= 0:
+            return await asyncio.to_thread(self._run_inline, started, fn, *args)
+        future = self._submit(started, fn, *args)
+        try:
+            return (await asyncio.wait_for(asyncio.wrap_future(future), self.timeout))[0]
+        except asyncio.TimeoutError:
+            raise self._timed_out()
+
+    def _run_inline(self, started: float, fn: Callable[..., Any], *args: Any) -> Any:
+        hash_seconds = None
+        try:
+            result, hash_seconds = _timed(fn, *args)
+            return result
+        finally:
+            self._release(started, hash_seconds)
+
+    def _release(self, started: float, hash_seconds: Optional[float] = None) -> None:
+        latency = time.perf_counter() - started
+        with self._lock:
+            self.pending -= 1
+            self.calls += 1
+            self._latencies.append(latency)
+        self._slots.release()
+        if hash_seconds is not None:
+            PASSWORD_HASH_SECONDS.observe(hash_seconds)
+            PASSWORD_HASH_WAIT_SECONDS.observe(max(latency - hash_seconds, 0.0))
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        with self._lock:
+            latency = sum(self._latencies) / len(self._latencies) if self._latencies else 0.5
+            backlog = self.pending
+        return max(1, math.ceil(backlog * latency / max(self.workers, 1)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            pending = self.pending
+
+            def percentile(p: float) -> Optional[float]:
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4)
+
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": pending,
+                "queued": max(pending - self.workers, 0),
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "latency_p50_seconds": percentile(0.5),
+                "latency_p95_seconds": percentile(0.95),
+                "latency_max_seconds": percentile(1.0),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS
+)
@@ -0,0 +1,59 @@
+import time
+from typing import Any, Callable, Dict, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class PrincipalCache:
+    """Authenticated users keyed by token subject (email).
+
+    Saves the users-table lookup on every authenticated request. Entries
+    live for a short TTL, and changing a user's role or active flag
+    invalidates their entry. It also records when that happened: token
+    claims issued before it are no longer trusted, so the next request
+    reloads the user. Both are per process, so claims are only trusted for
+    claims_max_age_seconds after the token was issued; in other workers
+    that and the TTL bound how long a role change or deactivation goes
+    unnoticed.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, claims_max_age_seconds: float):
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.claims_max_age_seconds = claims_max_age_seconds
+        # A revocation only matters while claims issued before it are trusted
+        self._revoked_at = TTLCache(max_entries=max_entries, ttl_seconds=claims_max_age_seconds)
+
+    def get_or_load(self, subject: str, loader: Callable[[], Any]) -> Any:
+        return self._cache.get_or_load(subject, loader)
+
+    def get(self, subject: str, default: Any = None) -> Any:
+        return self._cache.get(subject, default)
+
+    def set(self, subject: str, user: Any) -> None:
+        self._cache.set(subject, user)
+
+    def invalidate(self, subject: str) -> None:
+        self._revoked_at.set(subject, time.time())
+        self._cache.discard(subject)
+
+    def claims_trusted(self, subject: str, issued_at: Optional[float]) -> bool:
+        """Whether claims in a token issued at issued_at can stand in for the user"""
+        if issued_at is None or time.time() - issued_at > self.claims_max_age_seconds:
+            return False
+        revoked_at = self._revoked_at.get(subject)
+        # iat has whole-second precision, so a tie counts as revoked
+        return revoked_at is None or issued_at > revoked_at
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._revoked_at.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    claims_max_age_seconds=settings.AUTH_TOKEN_CLAIMS_MAX_AGE_SECONDS
+)
@@ -0,0 +1,47 @@
+import asyncio
+from contextlib import contextmanager
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core.database import create_async_db_engine, create_db_engine
+from app.core.query_stats import track_queries
+
+
+@pytest.fixture
+def max_queries():
+    """Fail the test if the block runs more than `limit` queries:
+
+        with max_queries(3):
+            client.get("/api/v1/exams/")
+    """
+    @contextmanager
+    def check(limit: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= limit, f"expected at most {limit} queries, got {stats.report()}"
+    return check
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A session on a SQLite file holding the full schema (less question search)"""
+    from benchmarks.seed_data import create_schema
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'exam.db'}")
+    create_schema(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def async_sessions(db):
+    """An async session factory on the same SQLite file as `db`"""
+    # No pooling: TestClient and asyncio.run each bring their own event loop
+    engine = create_async_db_engine(str(db.get_bind().url), poolclass=NullPool)
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(engine.dispose())
@@ -0,0 +1,97 @@
+import asyncio
+import uuid
+import pytest
+from app.services.admission import AdmissionRejected, AttemptAdmission
+
+
+class RecordingAdmission(AttemptAdmission):
+    """Resolves each request with its (exam, student) pair instead of touching the database"""
+
+    def __init__(self, **kwargs):
+        super().__init__(session_factory=None, **kwargs)
+        self.release = asyncio.Event()
+        self.batch_sizes = []
+
+    async def _admit(self, batch):
+        await self.release.wait()
+        self.batch_sizes.append(len(batch))
+        for exam_id, student_id, future in batch:
+            future.set_result((exam_id, student_id))
+
+
+def test_requests_are_admitted_in_batches():
+    async def scenario():
+        admission = RecordingAdmission(workers=1, batch_size=50, max_waiting=500)
+        exam_id = uuid.uuid4()
+        students = [uuid.uuid4() for _ in range(120)]
+        waiting = [asyncio.ensure_future(admission.start(exam_id, student)) for student in students]
+        await asyncio.sleep(0)
+        admission.release.set()
+        results = await asyncio.gather(*waiting)
+        return admission, exam_id, students, results
+
+    admission, exam_id, students, results = asyncio.run(scenario())
+
+    assert results == [(exam_id, student) for student in students]
+    assert admission.batch_sizes == [50, 50, 20]
+
+
+def test_overflow_is_rejected_with_position():
+    async def scenario():
+        admission = RecordingAdmission(workers=1, batch_size=10, max_waiting=5)
+        # The worker takes the first five as a batch, the next five wait in the queue
+        waiting = [asyncio.ensure_future(admission.start(uuid.uuid4(), uuid.uuid4())) for _ in range(5)]
+        await asyncio.sleep(0)
+        waiting += [asyncio.ensure_future(admission.start(uuid.uuid4(), uuid.uuid4())) for _ in range(5)]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.start(uuid.uuid4(), uuid.uuid4())
+        admission.release.set()
+        await asyncio.gather(*waiting)
+        return admission, rejected.value
+
+    admission, rejected = asyncio.run(scenario())
+
+    assert rejected.position == 6
+    assert rejected.retry_after >= 1
+    assert admission.rejected == 1
+
+
+def test_repeated_starts_share_one_queued_request():
+    async def scenario():
+        admission = RecordingAdmission(workers=1, batch_size=50, max_waiting=500)
+        exam_id, student_id = uuid.uuid4(), uuid.uuid4()
+        waiting = [asyncio.ensure_future(admission.start(exam_id, student_id)) for _ in range(3)]
+        await asyncio.sleep(0)
+        admission.release.set()
+        return admission, await asyncio.gather(*waiting)
+
+    admission, results = asyncio.run(scenario())
+
+    assert len(set(results)) == 1
+    assert admission.batch_sizes == [1]
+    assert admission._waiting == {}
+
+
+def test_workers_racing_for_a_student_create_one_attempt(db, async_sessions):
+    from datetime import datetime, timedelta
+    from sqlalchemy import func, select
+    from app.models.attempt import ExamAttempt
+    from app.models.exam import Exam
+
+    start = datetime.utcnow()
+    exam = Exam(title="Exam", start_time=start, end_time=start + timedelta(hours=2), duration_minutes=90,
+                created_by=uuid.uuid4())
+    db.add(exam)
+    db.commit()
+    student_id = uuid.uuid4()
+
+    async def scenario():
+        # Two worker processes, each with its own queue
+        first, second = (AttemptAdmission(async_sessions, workers=1) for _ in range(2))
+        return await asyncio.gather(first.start(exam.id, student_id), second.start(exam.id, student_id))
+
+    attempts = asyncio.run(scenario())
+
+    assert attempts[0].id == attempts[1].id
+    assert db.scalar(select(func.count()).select_from(ExamAttempt)) == 1
@@ -0,0 +1,79 @@
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from app.api import deps
+from app.core.config import settings
+from app.services.principal_cache import PrincipalCache
+
+
+def test_claims_are_trusted_while_fresh_and_not_revoked():
+    cache = PrincipalCache(max_entries=10, ttl_seconds=30, claims_max_age_seconds=300)
+    now = time.time()
+
+    assert cache.claims_trusted("a@example.com", now - 10)
+    assert not cache.claims_trusted("a@example.com", now - 301)
+    assert not cache.claims_trusted("a@example.com", None)
+
+    cache.invalidate("a@example.com")
+    assert not cache.claims_trusted("a@example.com", now - 10)
+    assert cache.claims_trusted("a@example.com", time.time() + 1)
+    assert cache.claims_trusted("b@example.com", now - 10)
+
+
+@pytest.fixture
+def student(monkeypatch):
+    """An account deactivated after its tokens were issued, as the database now has it"""
+    user = SimpleNamespace(
+        id=uuid.uuid4(), email="student@example.com", full_name="Student", role="student", is_active=False
+    )
+    loads = []
+
+    async def get_user_by_email_async(db, email):
+        loads.append(email)
+        return user
+
+    monkeypatch.setattr(settings, "AUTH_TOKEN_CLAIMS", True)
+    monkeypatch.setattr(deps, "get_user_by_email_async", get_user_by_email_async)
+    monkeypatch.setattr(deps, "principal_cache", PrincipalCache(
+        max_entries=10, ttl_seconds=30, claims_max_age_seconds=300
+    ))
+    user.loads = loads
+    return user
+
+
+def authorize(user, issued_ago: float):
+    token = jwt.encode({
+        "sub": user.email, "uid": str(user.id), "role": "student", "active": True,
+        "iat": int(time.time() - issued_ago), "exp": int(time.time() + 3600)
+    }, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(deps.get_current_principal(credentials, db=None))
+
+
+def test_fresh_claims_skip_the_users_table(student):
+    principal = authorize(student, issued_ago=10)
+
+    assert principal.id == student.id
+    assert student.loads == []
+
+
+def test_old_claims_are_checked_against_the_users_table(student):
+    with pytest.raises(HTTPException) as error:
+        authorize(student, issued_ago=600)
+
+    assert error.value.status_code == 403
+    assert student.loads == [student.email]
+
+
+def test_revoked_claims_are_checked_against_the_users_table(student):
+    deps.principal_cache.invalidate(student.email)
+
+    with pytest.raises(HTTPException) as error:
+        authorize(student, issued_ago=10)
+
+    assert error.value.status_code == 403
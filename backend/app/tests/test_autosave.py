@@ -0,0 +1,422 @@
+import fcntl
+import json
+import os
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import sessionmaker
+from app.models.attempt import ExamAttempt
+from app.services.autosave import AutoSaveBuffer, StaleSequenceError
+
+
+@pytest.fixture
+def attempt_id(db):
+    attempt_id = uuid.uuid4()
+    db.execute(insert(ExamAttempt).values(
+        id=attempt_id, exam_id=uuid.uuid4(), student_id=uuid.uuid4(),
+        start_time=datetime.utcnow(), status="in_progress"
+    ))
+    db.commit()
+    return attempt_id
+
+
+@pytest.fixture
+def make_buffer(db, tmp_path):
+    buffers = []
+
+    def make(**kwargs):
+        # A long interval so only the test flushes
+        buffer = AutoSaveBuffer(
+            sessionmaker(bind=db.get_bind()), str(tmp_path / "journals"), flush_interval=3600, **kwargs
+        )
+        buffers.append(buffer)
+        return buffer
+
+    yield make
+    for buffer in buffers:
+        buffer.stop()
+
+
+def stored(db, attempt_id):
+    db.expire_all()
+    return db.execute(
+        select(ExamAttempt.auto_saved_answers, ExamAttempt.auto_save_seq).where(ExamAttempt.id == attempt_id)
+    ).one()
+
+
+def journal_names(buffer):
+    return sorted(os.listdir(buffer.journal_dir))
+
+
+def test_saves_are_journaled_then_flushed(db, attempt_id, make_buffer):
+    buffer = make_buffer()
+
+    buffer.save(attempt_id, {"answers": {"q1": "a"}}, 1)
+    buffer.save(attempt_id, {"answers": {"q1": "b"}}, 2)
+
+    with open(buffer._journal_path) as journal:
+        entries = [json.loads(line) for line in journal]
+    assert [entry["answers"]["answers"]["q1"] for entry in entries] == ["a", "b"]
+    assert stored(db, attempt_id) == (None, 0)
+
+    assert buffer.flush() == 1
+    assert stored(db, attempt_id) == ({"answers": {"q1": "b"}}, 2)
+    # The flushed journal was rotated out and removed
+    assert journal_names(buffer) == [os.path.basename(buffer._journal_path)]
+    assert os.path.getsize(buffer._journal_path) == 0
+
+
+def test_failed_flush_keeps_saves_and_journal(db, attempt_id, make_buffer, monkeypatch):
+    buffer = make_buffer()
+    buffer.save(attempt_id, {"answers": {"q1": "a"}}, 1)
+
+    def fail(saves):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(buffer, "_write", fail)
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    assert buffer.pending_count() == 1
+    assert len([name for name in journal_names(buffer) if name.endswith(".flushing")]) == 1
+
+    monkeypatch.undo()
+    assert buffer.flush() == 1
+    assert stored(db, attempt_id) == ({"answers": {"q1": "a"}}, 1)
+    assert journal_names(buffer) == [os.path.basename(buffer._journal_path)]
+
+
+def test_orphaned_journals_are_replayed_and_removed(db, attempt_id, make_buffer, tmp_path):
+    journal_dir = tmp_path / "journals"
+    journal_dir.mkdir()
+    entries = [
+        {"attempt_id": str(attempt_id), "answers": {"answers": {"q1": answer}}, "seq": seq,
+         "saved_at": datetime(2026, 1, 1, 10, 0, seq).isoformat()}
+        for seq, answer in [(2, "b"), (1, "a")]
+    ]
+    (journal_dir / "autosave-1-dead.journal").write_text(
+        "".join(json.dumps(entry) + "\n" for entry in entries) + '{"attempt_id": "torn'
+    )
+    (journal_dir / ".autosave-1-dead.journal.abc.tmp").write_text("")
+
+    buffer = make_buffer()
+    buffer.start()
+
+    assert stored(db, attempt_id) == ({"answers": {"q1": "b"}}, 2)
+    assert journal_names(buffer) == [os.path.basename(buffer._journal_path)]
+
+
+def test_journals_locked_by_a_live_process_are_left_alone(db, attempt_id, make_buffer):
+    owner = make_buffer()
+    owner.save(attempt_id, {"answers": {"q1": "a"}}, 1)
+
+    other = make_buffer()
+    other.start()
+
+    assert stored(db, attempt_id) == (None, 0)
+    assert os.path.basename(owner._journal_path) in journal_names(other)
+
+
+def test_journal_is_locked_before_it_gets_its_name(tmp_path, monkeypatch):
+    path = str(tmp_path / "autosave-1-x.journal")
+    renamed = []
+    rename = os.rename
+
+    def check_locked(source, destination):
+        # Another process must not be able to take the file over
+        with open(source) as probe:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(probe, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        renamed.append(os.path.basename(source))
+        rename(source, destination)
+
+    monkeypatch.setattr(os, "rename", check_locked)
+    journal = AutoSaveBuffer._open_locked(path)
+    journal.close()
+
+    assert renamed[0].startswith(".autosave-") and renamed[0].endswith(".tmp")
+    assert os.listdir(tmp_path) == ["autosave-1-x.journal"]
+
+
+def stored_state(db, attempt_id):
+    # What the patch endpoint passes when the buffer does not follow on
+    answers, seq = stored(db, attempt_id)
+    return dict((answers or {}).get("answers") or {}), seq
+
+
+def test_patches_must_follow_the_acknowledged_sequence(db, attempt_id, make_buffer):
+    buffer = make_buffer()
+    assert buffer.save(attempt_id, {"answers": {"q1": "a"}}, 1) == 1
+
+    assert buffer.follows(attempt_id, 2)
+    assert buffer.apply_patch(attempt_id, 2, {"q2": "b"}) == 2
+    for seq in (2, 4):
+        with pytest.raises(StaleSequenceError) as error:
+            buffer.apply_patch(attempt_id, seq, {"q1": "z"})
+        assert error.value.acked_seq == 2
+    assert buffer.apply_patch(attempt_id, 3, {"q1": None}) == 3
+
+    buffer.flush()
+    assert stored(db, attempt_id) == ({"answers": {"q2": "b"}}, 3)
+
+
+def test_full_saves_never_lower_the_sequence(db, attempt_id, make_buffer):
+    buffer = make_buffer()
+    buffer.save(attempt_id, {"answers": {"q1": "a"}}, 5)
+
+    with pytest.raises(StaleSequenceError) as error:
+        buffer.save(attempt_id, {"answers": {"q1": "old"}}, 5)
+    assert error.value.acked_seq == 5
+    # The database is ahead of this worker
+    with pytest.raises(StaleSequenceError) as error:
+        buffer.save(attempt_id, {"answers": {"q1": "old"}}, 6, stored_seq=8)
+    assert error.value.acked_seq == 8
+    # Without a number a save takes the next one
+    assert buffer.save(attempt_id, {"answers": {"q1": "b"}}) == 6
+
+
+def test_database_keeps_the_highest_sequence(db, attempt_id, make_buffer):
+    buffer = make_buffer()
+    buffer.save(attempt_id, {"answers": {"q1": "new"}}, 4)
+    buffer.flush()
+
+    # Later by the clock but lower by sequence, e.g. another worker's late flush
+    later = datetime(2100, 1, 1)
+    buffer._write({str(attempt_id): ({"answers": {"q1": "old"}}, later, 3)})
+    assert stored(db, attempt_id) == ({"answers": {"q1": "new"}}, 4)
+    # Journaled without a number: keeps the stored one
+    buffer._write({str(attempt_id): ({"answers": {"q1": "legacy"}}, later, None)})
+    assert stored(db, attempt_id) == ({"answers": {"q1": "legacy"}}, 4)
+
+
+def test_patches_move_between_workers_through_the_database(db, attempt_id, make_buffer):
+    first, second = make_buffer(), make_buffer()
+    first.save(attempt_id, {"answers": {"q1": "a"}}, 1)
+    first.apply_patch(attempt_id, 2, {"q2": "b"})
+    first.flush()
+
+    assert not second.follows(attempt_id, 3)
+    second.apply_patch(attempt_id, 3, {"q3": "c"}, stored_state(db, attempt_id))
+    second.flush()
+
+    # The first worker's answers are from seq 2; it picks up the stored seq 3
+    assert not first.follows(attempt_id, 4)
+    first.apply_patch(attempt_id, 4, {"q1": "d"}, stored_state(db, attempt_id))
+    first.flush()
+    assert stored(db, attempt_id) == ({"answers": {"q1": "d", "q2": "b", "q3": "c"}}, 4)
+
+
+def test_unflushed_save_elsewhere_forces_a_resync(db, attempt_id, make_buffer):
+    first, second = make_buffer(), make_buffer()
+    first.save(attempt_id, {"answers": {"q1": "a"}}, 1)
+    first.flush()
+    second.apply_patch(attempt_id, 2, {"q2": "b"}, stored_state(db, attempt_id))
+
+    # Seq 2 is only on the second worker, so the first cannot apply seq 3
+    with pytest.raises(StaleSequenceError) as error:
+        first.apply_patch(attempt_id, 3, {"q3": "c"}, stored_state(db, attempt_id))
+    assert error.value.acked_seq == 1
+
+    # The client resyncs past every number it sent
+    assert first.save(attempt_id, {"answers": {"q1": "a", "q2": "b", "q3": "c"}}, 4, stored_seq=1) == 4
+    first.flush()
+    second.flush()
+    assert stored(db, attempt_id) == ({"answers": {"q1": "a", "q2": "b", "q3": "c"}}, 4)
+
+
+def test_boolean_sequence_numbers_are_rejected(attempt_id):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_principal
+    from app.api.endpoints import attempts
+    from app.core.database import get_async_db
+
+    student = SimpleNamespace(id=uuid.uuid4(), role="student")
+    app = FastAPI()
+    app.include_router(attempts.router, prefix="/attempts")
+    app.dependency_overrides[get_current_principal] = lambda: student
+    app.dependency_overrides[get_async_db] = lambda: None
+    attempts._attempt_owners.set(str(attempt_id), student.id)
+    client = TestClient(app)
+
+    response = client.post(f"/attempts/{attempt_id}/auto-save", json={"answers": {}, "seq": True})
+    assert response.status_code == 400
+    response = client.post(f"/attempts/{attempt_id}/auto-save/patch", json={"answers": {}, "seq": True})
+    assert response.status_code == 422
+
+
+def attempts_client(db, attempt_id, async_sessions, monkeypatch):
+    """The attempts router over async sessions, signed in as the attempt's student"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_principal
+    from app.api.endpoints import attempts
+    from app.core.database import get_async_db
+
+    student_id = db.execute(select(ExamAttempt.student_id).where(ExamAttempt.id == attempt_id)).scalar()
+    monkeypatch.setattr(attempts, "_attempt_owners", attempts.TTLCache(max_entries=10, ttl_seconds=60))
+
+    async def session():
+        async with async_sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(attempts.router, prefix="/attempts")
+    app.dependency_overrides[get_current_principal] = lambda: SimpleNamespace(id=student_id, role="student")
+    app.dependency_overrides[get_async_db] = session
+    return TestClient(app)
+
+
+def test_auto_save_endpoints_over_async_sessions(db, attempt_id, make_buffer, async_sessions, monkeypatch):
+    from app.api.endpoints import attempts
+
+    buffer = make_buffer()
+    monkeypatch.setattr(attempts, "autosave_buffer", buffer)
+    client = attempts_client(db, attempt_id, async_sessions, monkeypatch)
+    url = f"/attempts/{attempt_id}/auto-save"
+
+    assert client.post(url, json={"answers": {"q1": "a"}, "seq": 1}).json()["acked_seq"] == 1
+    assert client.post(f"{url}/patch", json={"seq": 2, "answers": {"q2": "b"}}).json() == {"acked_seq": 2}
+    response = client.post(f"{url}/patch", json={"seq": 4, "answers": {"q3": "c"}})
+    assert (response.status_code, response.json()["acked_seq"]) == (409, 2)
+    buffer.flush()
+
+    # A worker that has not seen the attempt picks up from the database
+    other = make_buffer()
+    monkeypatch.setattr(attempts, "autosave_buffer", other)
+    assert client.post(f"{url}/patch", json={"seq": 3, "answers": {"q1": None}}).json() == {"acked_seq": 3}
+    response = client.post(url, json={"answers": {"q1": "stale"}, "seq": 3})
+    assert (response.status_code, response.json()["acked_seq"]) == (409, 3)
+    other.flush()
+    assert stored(db, attempt_id) == ({"answers": {"q2": "b"}}, 3)
+
+    assert client.post(f"/attempts/{uuid.uuid4()}/auto-save", json={"answers": {}}).status_code == 404
+
+
+def test_saves_to_a_closed_attempt_are_refused(db, attempt_id, make_buffer, async_sessions, monkeypatch):
+    from app.api.endpoints import attempts
+
+    buffer = make_buffer()
+    monkeypatch.setattr(attempts, "autosave_buffer", buffer)
+    client = attempts_client(db, attempt_id, async_sessions, monkeypatch)
+    url = f"/attempts/{attempt_id}/auto-save"
+    assert client.post(url, json={"answers": {"q1": "a"}, "seq": 1}).status_code == 200
+
+    db.execute(update(ExamAttempt).where(ExamAttempt.id == attempt_id).values(status="submitted"))
+    db.commit()
+    buffer.forget(attempt_id)
+
+    for path, body in [(url, {"answers": {"q1": "b"}, "seq": 2}), (f"{url}/patch", {"seq": 2, "answers": {"q1": "b"}})]:
+        response = client.post(path, json=body)
+        assert (response.status_code, response.json().get("closed")) == (409, True)
+
+
+def test_evicted_attempts_keep_their_unflushed_sequence(db, attempt_id, make_buffer):
+    buffer = make_buffer(max_states=1)
+    buffer.save(attempt_id, {"answers": {"q1": "new"}}, 3)
+    buffer.save(uuid.uuid4(), {"answers": {}}, 1)
+
+    # A delayed older save must not replace the newer one waiting to be flushed
+    with pytest.raises(StaleSequenceError) as error:
+        buffer.save(attempt_id, {"answers": {"q1": "old"}}, 2)
+    assert error.value.acked_seq == 3
+
+
+def test_following_saves_are_acknowledged_without_reading_the_attempt(
+    db, attempt_id, make_buffer, async_sessions, monkeypatch
+):
+    from app.api.endpoints import attempts
+
+    monkeypatch.setattr(attempts, "autosave_buffer", make_buffer())
+    client = attempts_client(db, attempt_id, async_sessions, monkeypatch)
+    attempts._attempt_owners.set(str(attempt_id), db.scalar(select(ExamAttempt.student_id)))
+    reads = []
+    get_attempt_async = attempts.get_attempt_async
+
+    async def counting(db, attempt_id):
+        reads.append(attempt_id)
+        return await get_attempt_async(db, attempt_id)
+
+    monkeypatch.setattr(attempts, "get_attempt_async", counting)
+    url = f"/attempts/{attempt_id}/auto-save"
+
+    assert client.post(url, json={"answers": {"q1": "a"}, "seq": 1}).status_code == 200
+    assert client.post(url, json={"answers": {"q1": "b"}, "seq": 2}).status_code == 200
+    assert client.post(f"{url}/patch", json={"seq": 3, "answers": {"q2": "c"}}).status_code == 200
+    # Only the first save, which this worker had nothing to compare with
+    assert len(reads) == 1
+
+
+def set_status(db, attempt_id, status, end_time=None):
+    db.execute(update(ExamAttempt).where(ExamAttempt.id == attempt_id).values(status=status, end_time=end_time))
+    db.commit()
+
+
+def test_late_saves_never_change_graded_answers(db, attempt_id, make_buffer):
+    regraded = []
+    buffer = make_buffer(regrade=lambda attempt_id, exam_id: regraded.append(attempt_id))
+    buffer.save(attempt_id, {"answers": {"q1": "a"}}, 1)
+    set_status(db, attempt_id, "graded", datetime(2100, 1, 1))
+
+    buffer.flush()
+
+    assert stored(db, attempt_id) == (None, 0)
+    assert regraded == []
+    # Dropped from memory, so the next save reads the attempt
+    assert not buffer.follows(attempt_id, 2)
+
+
+def test_saves_landing_on_a_submitted_attempt_are_regraded(db, attempt_id, make_buffer):
+    regraded = []
+    buffer = make_buffer(regrade=lambda attempt_id, exam_id: regraded.append(attempt_id))
+    buffer.save(attempt_id, {"answers": {"q1": "a"}}, 1)
+    set_status(db, attempt_id, "submitted", datetime(2100, 1, 1))
+
+    buffer.flush()
+
+    assert stored(db, attempt_id) == ({"answers": {"q1": "a"}}, 1)
+    assert regraded == [attempt_id]
+
+
+def submit_client(db, attempt_id, async_sessions, monkeypatch, buffer):
+    from app.api.endpoints import attempts
+
+    queued = []
+    monkeypatch.setattr(attempts, "autosave_buffer", buffer)
+    monkeypatch.setattr(attempts.grading_queue, "enqueue", lambda attempt_id, exam_id: queued.append(attempt_id))
+    client = attempts_client(db, attempt_id, async_sessions, monkeypatch)
+    return client, queued
+
+
+def test_attempts_are_queued_for_grading_once(db, attempt_id, make_buffer, async_sessions, monkeypatch):
+    client, queued = submit_client(db, attempt_id, async_sessions, monkeypatch, make_buffer())
+
+    for _ in range(2):
+        assert client.post(f"/attempts/{attempt_id}/submit").status_code == 200
+
+    assert queued == [attempt_id]
+    db.expire_all()
+    assert db.get(ExamAttempt, attempt_id).status == "submitted"
+
+
+def test_submit_waits_for_buffered_saves(db, attempt_id, make_buffer, async_sessions, monkeypatch):
+    buffer = make_buffer()
+    client, queued = submit_client(db, attempt_id, async_sessions, monkeypatch, buffer)
+    buffer.save(attempt_id, {"answers": {"q1": "a"}}, 1)
+
+    def fail(saves):
+        raise RuntimeError("database down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(buffer, "_write", fail)
+        response = client.post(f"/attempts/{attempt_id}/submit")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert queued == []
+    db.expire_all()
+    assert db.get(ExamAttempt, attempt_id).status == "in_progress"
+
+    assert client.post(f"/attempts/{attempt_id}/submit").status_code == 200
+    assert queued == [attempt_id]
+    assert stored(db, attempt_id) == ({"answers": {"q1": "a"}}, 1)
@@ -0,0 +1,185 @@
+import threading
+import uuid
+import pytest
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+from app.services.exam_cache import ExamPaperCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = TTLCache(ttl_seconds=10)
+    cache.set("paper", "cached")
+    cache.set("missing", None, ttl_seconds=1)
+
+    clock.now += 5
+    assert cache.get("paper") == "cached"
+    assert cache.get("missing", "gone") == "gone"
+    clock.now += 5
+    assert cache.get("paper") is None
+    assert cache.get_or_load("paper", lambda: "reloaded") == "reloaded"
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "paper"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("exam", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["misses"] < 8:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["paper"] * 8
+    assert cache.stats()["loads"] == 1
+
+
+def test_failed_loads_reach_every_waiter_and_are_not_cached():
+    cache = TTLCache()
+
+    def loader():
+        raise RuntimeError("database went away")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("exam", loader)
+    assert cache.get_or_load("exam", lambda: "paper") == "paper"
+
+
+def test_invalidated_papers_are_never_served():
+    cache = ExamPaperCache(max_entries=10, ttl_seconds=60)
+    exam_id = uuid.uuid4()
+    version = cache.version(exam_id)
+
+    cache.invalidate(exam_id)
+    # A render that started before the change finishes after it
+    cache.set(exam_id, version, "old paper")
+
+    assert cache.get(exam_id) is None
+    assert cache.get_or_load(str(exam_id), lambda: "new paper") == "new paper"
+    assert cache.get(exam_id) == "new paper"
+
+
+def test_versions_are_bounded_without_serving_stale_papers():
+    cache = ExamPaperCache(max_entries=10, ttl_seconds=60, max_versions=2)
+    exam_ids = [uuid.uuid4() for _ in range(3)]
+    untouched = uuid.uuid4()
+    cache.set(untouched, cache.version(untouched), "untouched paper")
+    stale = {exam_id: cache.version(exam_id) for exam_id in exam_ids}
+
+    cache.invalidate(*exam_ids)
+    for exam_id in exam_ids:
+        cache.set(exam_id, stale[exam_id], "stale paper")
+
+    assert len(cache._versions) == 2
+    assert all(cache.get(exam_id) is None for exam_id in exam_ids)
+    # Dropping a version costs exams without one a miss, never a stale hit
+    assert cache.get(untouched) is None
+
+
+def test_missing_exams_are_cached_briefly(clock):
+    cache = ExamPaperCache(max_entries=10, ttl_seconds=60, missing_ttl_seconds=2)
+    exam_id = uuid.uuid4()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return None if len(loads) == 1 else "paper"
+
+    assert cache.get_or_load(exam_id, loader) is None
+    assert cache.get_or_load(exam_id, loader) is None
+    clock.now += 3
+    assert cache.get_or_load(exam_id, loader) == "paper"
+    assert len(loads) == 2
+
+
+def test_recent_changes_are_flagged_for_the_replica_lag(clock):
+    cache = ExamPaperCache(max_entries=10, ttl_seconds=60, replica_lag_seconds=5)
+    exam_id = uuid.uuid4()
+
+    assert not cache.recently_changed(exam_id)
+    cache.invalidate(exam_id)
+    assert cache.recently_changed(str(exam_id))
+    clock.now += 6
+    assert not cache.recently_changed(exam_id)
+
+
+def test_async_loads_are_single_flight():
+    import asyncio
+
+    cache = ExamPaperCache(max_entries=10, ttl_seconds=60)
+    exam_id = uuid.uuid4()
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return f"paper {len(loads)}"
+
+    async def scenario():
+        papers = await asyncio.gather(*(cache.get_or_load_async(exam_id, loader) for _ in range(10)))
+        assert papers == ["paper 1"] * 10
+        # Changed mid-render: the old render is stored but never served
+        render = asyncio.ensure_future(cache.get_or_load_async(exam_id, loader))
+        cache.invalidate(exam_id)
+        render.cancel()
+        assert await cache.get_or_load_async(exam_id, loader) == "paper 2"
+
+    asyncio.run(scenario())
+    assert len(loads) == 2
+    assert cache._loading == {}
+
+
+def test_async_load_errors_are_not_cached():
+    import asyncio
+
+    cache = ExamPaperCache(max_entries=10, ttl_seconds=60)
+
+    async def failing():
+        raise RuntimeError("database went away")
+
+    async def working():
+        return "paper"
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load_async("0" * 32, failing)
+        return await cache.get_or_load_async("0" * 32, working)
+
+    assert asyncio.run(scenario()) == "paper"
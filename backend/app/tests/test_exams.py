@@ -0,0 +1,150 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.crud.exam import get_exam_with_questions_async, get_exams
+from app.crud.pagination import next_cursor
+from app.models.exam import Exam, ExamQuestion
+from app.models.question import Question, QuestionType
+
+
+def add_exams(db, counts):
+    start = datetime(2026, 6, 1, 9, 0)
+    for n, count in enumerate(counts):
+        exam = Exam(
+            title=f"Exam {n}", start_time=start, end_time=start + timedelta(hours=2), duration_minutes=90,
+            created_by=uuid.uuid4(), created_at=start - timedelta(days=n)
+        )
+        db.add(exam)
+        db.flush()
+        db.add_all(ExamQuestion(exam_id=exam.id, question_id=uuid.uuid4(), order=order) for order in range(count))
+    db.commit()
+    db.expunge_all()
+
+
+def test_exam_list_counts_questions_in_one_query(db, max_queries):
+    add_exams(db, [3, 0, 5, 1, 2])
+
+    with max_queries(1):
+        first = get_exams(db, limit=3)
+    with max_queries(1):
+        rest = get_exams(db, limit=3, cursor=next_cursor(first, 3))
+
+    assert [exam.title for exam in first + rest] == [f"Exam {n}" for n in range(5)]
+    assert [exam.question_count for exam in first + rest] == [3, 0, 5, 1, 2]
+
+
+def test_exam_with_questions_async_keeps_paper_order(db, async_sessions):
+    add_exams(db, [0])
+    exam_id = db.query(Exam.id).scalar()
+    titles = ["Third", "First", "Second"]
+    for order, title in zip([3, 1, 2], titles):
+        question_id = uuid.uuid4()
+        db.execute(insert(Question).values(
+            id=question_id, title=title, complexity="easy", type=QuestionType.TEXT, created_by=uuid.uuid4()
+        ))
+        db.add(ExamQuestion(exam_id=exam_id, question_id=question_id, order=order))
+    db.commit()
+
+    async def read(exam_id):
+        async with async_sessions() as session:
+            return await get_exam_with_questions_async(session, exam_id)
+
+    exam = asyncio.run(read(exam_id))
+
+    assert exam["title"] == "Exam 0"
+    assert [question.title for question in exam["questions"]] == ["First", "Second", "Third"]
+    assert asyncio.run(read(uuid.uuid4())) is None
+
+
+def test_recently_changed_papers_are_read_from_the_primary(monkeypatch):
+    from contextlib import asynccontextmanager
+    from types import SimpleNamespace
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_principal
+    from app.api.endpoints import exams
+    from app.core.database import get_async_read_db
+    from app.services.exam_cache import ExamPaperCache
+
+    @asynccontextmanager
+    async def primary_session():
+        yield "primary"
+
+    async def render(db, exam_id):
+        return f'"{db}"'.encode()
+
+    cache = ExamPaperCache(max_entries=10, ttl_seconds=60, replica_lag_seconds=60)
+    monkeypatch.setattr(exams, "exam_paper_cache", cache)
+    monkeypatch.setattr(exams, "AsyncSessionLocal", primary_session)
+    monkeypatch.setattr(exams, "_render_exam_paper", render)
+    app = FastAPI()
+    app.include_router(exams.router, prefix="/exams")
+    app.dependency_overrides[get_current_principal] = lambda: SimpleNamespace(id=uuid.uuid4(), role="student")
+    app.dependency_overrides[get_async_read_db] = lambda: "replica"
+    client = TestClient(app)
+    unchanged, changed = str(uuid.uuid4()), str(uuid.uuid4())
+
+    cache.invalidate(changed)
+
+    assert client.get(f"/exams/{unchanged}").json() == "replica"
+    # Cached under the new version, so it must not be the replica's old paper
+    assert client.get(f"/exams/{changed}").json() == "primary"
+
+
+def test_prewarmed_papers_expire_early(db, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+    from app.core import cache as cache_module
+    from app.services.exam_cache import ExamPaperCache
+    from app.services.exam_prewarm import ExamPaperPrewarmer
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    start = datetime.utcnow() + timedelta(minutes=1)
+    upcoming, changed = [
+        Exam(title=title, start_time=start, end_time=start + timedelta(hours=2), duration_minutes=90,
+             is_published=True, created_by=uuid.uuid4())
+        for title in ("Upcoming", "Just edited")
+    ]
+    db.add_all([upcoming, changed])
+    db.commit()
+    cache = ExamPaperCache(max_entries=10, ttl_seconds=300)
+    cache.invalidate(changed.id)
+    prewarmer = ExamPaperPrewarmer(sessionmaker(bind=db.get_bind()), cache, ttl_seconds=60)
+
+    # The edited exam is left for the request path to render from the primary
+    assert prewarmer.warm_upcoming() == 1
+    assert b"Upcoming" in cache.get(upcoming.id)
+    assert cache.get(changed.id) is None
+
+    now[0] += 61
+    assert cache.get(upcoming.id) is None
+    assert prewarmer.warm_upcoming() == 2
+
+
+def test_exam_paper_endpoint_takes_string_ids(db, async_sessions, monkeypatch):
+    from types import SimpleNamespace
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_principal
+    from app.api.endpoints import exams
+    from app.core.database import get_async_read_db
+    from app.services.exam_cache import ExamPaperCache
+
+    add_exams(db, [0])
+    exam_id = db.query(Exam.id).scalar()
+
+    async def session():
+        async with async_sessions() as db:
+            yield db
+
+    monkeypatch.setattr(exams, "exam_paper_cache", ExamPaperCache(max_entries=10, ttl_seconds=60))
+    app = FastAPI()
+    app.include_router(exams.router, prefix="/exams")
+    app.dependency_overrides[get_current_principal] = lambda: SimpleNamespace(id=uuid.uuid4(), role="student")
+    app.dependency_overrides[get_async_read_db] = session
+    client = TestClient(app)
+
+    assert client.get(f"/exams/{exam_id}").json()["title"] == "Exam 0"
+    assert client.get(f"/exams/{uuid.uuid4()}").status_code == 404
+    assert client.get("/exams/not-a-uuid").status_code == 400
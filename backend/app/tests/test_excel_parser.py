@@ -0,0 +1,76 @@
+import pytest
+from openpyxl import Workbook
+from app.models.question import QuestionType
+from app.services.excel_parser import ExcelParser
+
+HEADER = ['title', 'description', 'complexity', 'type', 'options', 'correct_answers', 'max_score', 'tags']
+
+
+def write_workbook(path, rows, header=HEADER):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Questions')
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def test_parse_excel_converts_columns(tmp_path):
+    path = write_workbook(tmp_path / 'q.xlsx', [
+        ['What is 2+2?', 'Arithmetic', 'Class 1', 'single_choice', '["4", "5"]', '["4"]', 2, 'math, basic'],
+        ['Explain photosynthesis', None, 'Class 4', 'text', '["ignored"]', None, None, None],
+    ])
+
+    choice, text = ExcelParser().parse_excel(path)
+
+    assert choice == {
+        'title': 'What is 2+2?',
+        'description': 'Arithmetic',
+        'complexity': 'Class 1',
+        'type': QuestionType.SINGLE_CHOICE,
+        'max_score': 2,
+        'tags': ['math', 'basic'],
+        'options': ['4', '5'],
+        'correct_answers': ['4'],
+    }
+    assert text['options'] is None and text['correct_answers'] is None
+    assert text['max_score'] == 1
+    assert text['tags'] == []
+
+
+def test_iter_rows_collects_bad_rows_with_row_numbers(tmp_path):
+    path = write_workbook(tmp_path / 'q.xlsx', [
+        ['Good', None, 'Class 1', 'text', None, None, 1, None],
+        ['Bad type', None, 'Class 1', 'essay', None, None, 1, None],
+        [None, None, 'Class 1', 'text', None, None, 1, None],
+        ['Bad score', None, 'Class 1', 'text', None, None, 'x', None],
+    ])
+    parser = ExcelParser()
+
+    rows = list(parser.iter_rows(path))
+
+    assert [row_number for row_number, _ in rows] == [2]
+    assert [error['row'] for error in parser.errors] == [3, 4, 5]
+    assert "'essay' is not a valid QuestionType" in parser.errors[0]['error']
+    with pytest.raises(ValueError, match='row 3'):
+        parser.parse_excel(path)
+
+
+def test_iter_chunks_streams_in_fixed_size_chunks(tmp_path):
+    path = write_workbook(tmp_path / 'q.xlsx', [
+        [f'Q{i}', None, 'Class 1', 'multi_choice', 'a,b', 'a', 1, 'x'] for i in range(25)
+    ] + [[None] * len(HEADER)])
+
+    chunks = list(ExcelParser(chunk_size=10).iter_chunks(path))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[-1][-1][0] == 26
+    assert chunks[0][0][1]['options'] == ['a', 'b']
+
+
+def test_missing_required_columns(tmp_path):
+    path = write_workbook(tmp_path / 'q.xlsx', [['Q', 'Class 1']], header=['title', 'complexity'])
+
+    with pytest.raises(ValueError, match='Missing required columns'):
+        ExcelParser().parse_excel(path)
@@ -0,0 +1,179 @@
+import random
+import threading
+import uuid
+from types import SimpleNamespace
+import numpy as np
+from app.models.question import QuestionType
+from app.services.grading import AnswerKey, GradingService, MAX_ENCODED_CHOICES
+
+
+def make_question(type, options=None, correct_answers=None, max_score=1):
+    return SimpleNamespace(
+        id=uuid.uuid4(), type=type, options=options, correct_answers=correct_answers, max_score=max_score
+    )
+
+
+def test_grade_question():
+    assert GradingService.grade_question(QuestionType.SINGLE_CHOICE, 'a', ['a']) == 1
+    assert GradingService.grade_question(QuestionType.SINGLE_CHOICE, 'b', ['a'], max_score=3) == 0
+    assert GradingService.grade_question(QuestionType.MULTI_CHOICE, ['b', 'a'], ['a', 'b'], max_score=3) == 3
+    assert GradingService.grade_question(QuestionType.MULTI_CHOICE, 'a', ['a']) == 0
+    assert GradingService.grade_question(QuestionType.TEXT, 'anything', []) == 0
+
+
+def test_grade_batch_scores_every_attempt():
+    single = make_question(QuestionType.SINGLE_CHOICE, ['a', 'b', 'c'], ['b'], max_score=2)
+    multi = make_question(QuestionType.MULTI_CHOICE, ['a', 'b', 'c'], ['a', 'c'], max_score=3)
+    text = make_question(QuestionType.TEXT)
+    key = AnswerKey([single, multi, text])
+    s, m, t = (str(q.id) for q in (single, multi, text))
+
+    scores, correct = GradingService.grade_batch(key, [
+        {s: 'b', m: ['c', 'a'], t: 'essay'},
+        {s: 'a', m: ['a', 'c', 'x'], t: ''},
+        {s: 'zzz', m: ['a']},
+        {},
+    ])
+
+    assert scores.tolist() == [[2, 3, 0], [0, 0, 0], [0, 0, 0], [0, 0, 0]]
+    assert correct[:, :2].tolist() == [[True, True], [False, False], [False, False], [False, False]]
+    assert not correct[:, 2].any()
+
+
+def test_grade_batch_matches_grade_question():
+    rng = random.Random(7)
+    options = ['a', 'b', 'c', 'd', 1, 2]
+    questions = [
+        make_question(QuestionType.SINGLE_CHOICE, options, rng.sample(options, 1))
+        for _ in range(10)
+    ] + [
+        make_question(QuestionType.MULTI_CHOICE, options, rng.sample(options, rng.randint(1, 3)))
+        for _ in range(10)
+    ]
+    answer_sets = []
+    for _ in range(200):
+        answers = {}
+        for question in questions:
+            roll = rng.random()
+            if roll < 0.1:
+                continue
+            if roll < 0.4:
+                answers[str(question.id)] = rng.choice(options + ['unknown'])
+            else:
+                answers[str(question.id)] = rng.sample(options + ['unknown'], rng.randint(0, 3))
+        answer_sets.append(answers)
+
+    scores, _ = GradingService.grade_batch(AnswerKey(questions), answer_sets)
+
+    expected = [
+        [
+            GradingService.grade_question(q.type, answers.get(str(q.id)), q.correct_answers, q.max_score)
+            for q in questions
+        ]
+        for answers in answer_sets
+    ]
+    assert np.array_equal(scores, np.array(expected))
+
+
+def test_questions_with_too_many_choices_fall_back():
+    options = [f'o{i}' for i in range(MAX_ENCODED_CHOICES + 5)]
+    question = make_question(QuestionType.MULTI_CHOICE, options, ['o1', 'o66'])
+    key = AnswerKey([question])
+
+    scores, _ = GradingService.grade_batch(key, [{str(question.id): ['o66', 'o1']}, {str(question.id): ['o1']}])
+
+    assert key.fallback.tolist() == [True]
+    assert scores.tolist() == [[1], [0]]
+
+
+class FakeSession:
+    def query(self, *columns):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return []
+
+    def close(self):
+        pass
+
+
+def test_grading_queue_batches_by_exam_and_retries(monkeypatch):
+    from app.services import grading_queue as module
+
+    calls = []
+    graded = []
+    failures = {'left': 1}
+    done = threading.Event()
+
+    def fake_grade(db, exam_id, attempt_ids):
+        calls.append((exam_id, sorted(attempt_ids)))
+        if failures['left']:
+            failures['left'] -= 1
+            raise RuntimeError('database went away')
+        graded.extend(attempt_ids)
+        if len(graded) == 3:
+            done.set()
+        return {'attempts': len(attempt_ids)}
+
+    monkeypatch.setattr(module, 'grade_exam_attempts', fake_grade)
+    grading = module.GradingQueue(FakeSession, workers=1, retry_delay=0.01)
+    exam_a, exam_b = uuid.uuid4(), uuid.uuid4()
+    attempts = sorted(uuid.uuid4() for _ in range(3))
+    # Queued before the worker starts, so they drain as one batch
+    grading.enqueue(attempts[0], exam_a)
+    grading.enqueue(attempts[1], exam_b)
+    grading.enqueue(attempts[2], exam_a)
+    grading.start()
+    try:
+        assert done.wait(5)
+    finally:
+        grading.stop()
+
+    assert calls[0] == (exam_a, sorted([attempts[0], attempts[2]]))
+    assert calls[1] == (exam_b, [attempts[1]])
+    # The failed exam_a attempts are retried, together or one by one, and succeed
+    assert all(exam_id == exam_a for exam_id, _ in calls[2:])
+    assert sorted(id for _, ids in calls[2:] for id in ids) == calls[0][1]
+    assert grading.stats()['graded'] == 3
+    assert grading.stats()['retries'] == 2
+    assert grading.depth() == 0
+
+
+def test_grading_leaves_attempts_in_progress_alone(db):
+    from datetime import datetime
+    from sqlalchemy import insert, select
+    from app.crud.attempt import grade_exam_attempts
+    from app.models.attempt import ExamAttempt
+    from app.models.exam import ExamQuestion
+    from app.models.question import Question
+
+    exam_id, question_id = uuid.uuid4(), uuid.uuid4()
+    db.execute(insert(Question).values(
+        id=question_id, title='Q', complexity='easy', type=QuestionType.SINGLE_CHOICE,
+        options=['a', 'b'], correct_answers=['a'], max_score=2, created_by=uuid.uuid4()
+    ))
+    db.execute(insert(ExamQuestion).values(id=uuid.uuid4(), exam_id=exam_id, question_id=question_id, order=1))
+    attempts = {}
+    for status in ('in_progress', 'submitted'):
+        attempts[status] = uuid.uuid4()
+        db.execute(insert(ExamAttempt).values(
+            id=attempts[status], exam_id=exam_id, student_id=uuid.uuid4(), start_time=datetime.utcnow(),
+            end_time=None if status == 'in_progress' else datetime.utcnow(), status=status,
+            auto_saved_answers={'answers': {str(question_id): 'a'}}
+        ))
+    db.commit()
+
+    report = grade_exam_attempts(db, exam_id)
+
+    assert report['attempts'] == 1
+    rows = dict(
+        (attempt_id, (status, end_time, total_score)) for attempt_id, status, end_time, total_score in db.execute(
+            select(ExamAttempt.id, ExamAttempt.status, ExamAttempt.end_time, ExamAttempt.total_score)
+        )
+    )
+    assert rows[attempts['in_progress']] == ('in_progress', None, 0)
+    assert rows[attempts['submitted']][0] == 'graded'
+    assert rows[attempts['submitted']][2] == 2
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from app.api.deps import get_current_user
+from app.api.endpoints import questions as questions_endpoints
+from app.models.question import Question
+from app.services import import_jobs as module
+from app.services.import_jobs import ImportJobRunner, ImportJobStore, JobStatus
+from app.tests.test_excel_parser import write_workbook
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ImportJobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def upload(tmp_path, name="upload.xlsx"):
+    path = tmp_path / name
+    path.write_bytes(b"not really a workbook")
+    return str(path)
+
+
+def wait_for(job_id, store, timeout=60):
+    deadline = time.monotonic() + timeout
+    while store.get(job_id)["status"] in (JobStatus.QUEUED, JobStatus.RUNNING):
+        assert time.monotonic() < deadline, "import job did not finish"
+        time.sleep(0.05)
+    return store.get(job_id)
+
+
+def test_store_round_trip(store):
+    owner = uuid.uuid4()
+    job_id = store.create("questions.xlsx", owner, "/tmp/upload.xlsx")
+    store.update(job_id, status=JobStatus.RUNNING, started_at=time.time() - 10, rows_total=100, rows_parsed=25)
+    store.update(job_id, errors=[{"row": 3, "error": "type: invalid"}])
+
+    job = store.get(job_id)
+
+    assert job["created_by"] == str(owner)
+    assert job["errors"] == [{"row": 3, "error": "type: invalid"}]
+    assert 25 <= job["eta_seconds"] <= 35
+    assert store.get(str(uuid.uuid4())) is None
+    with pytest.raises(ValueError):
+        store.update(job_id, not_a_column=1)
+
+
+def test_import_runs_in_the_background(tmp_path, store, db, monkeypatch):
+    monkeypatch.setattr(module, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    runner = ImportJobRunner(store, parse_workers=1, max_concurrent_jobs=1, chunk_size=2)
+    path = write_workbook(tmp_path / "q.xlsx", [
+        [f"Question {n}", None, "Class 1", "text", None, None, 1, "algebra"] for n in range(5)
+    ])
+    user = type("User", (), {"id": uuid.uuid4()})()
+    app = FastAPI()
+    app.include_router(questions_endpoints.router, prefix="/questions")
+    app.dependency_overrides[get_current_user] = lambda: user
+    monkeypatch.setattr(questions_endpoints, "get_import_job_runner", lambda: runner)
+    try:
+        job_id = runner.submit(path, "q.xlsx", user.id)
+        job = wait_for(job_id, store)
+        polled = TestClient(app).get(f"/questions/import/{job_id}")
+        foreign = store.create("other.xlsx", uuid.uuid4())
+    finally:
+        runner.shutdown()
+
+    assert job["status"] == JobStatus.SUCCEEDED, job["message"]
+    assert (job["rows_parsed"], job["rows_inserted"], job["rows_failed"]) == (5, 5, 0)
+    assert db.scalar(select(func.count()).select_from(Question)) == 5
+    assert not (tmp_path / "q.xlsx").exists()
+    assert polled.status_code == 200 and polled.json()["status"] == JobStatus.SUCCEEDED
+    assert TestClient(app).get(f"/questions/import/{foreign}").status_code == 404
+
+
+def test_shutdown_fails_queued_jobs_and_removes_their_uploads(tmp_path, store, monkeypatch):
+    runner = ImportJobRunner(store, parse_workers=1, max_concurrent_jobs=1, chunk_size=10)
+    release = threading.Event()
+    monkeypatch.setattr(runner, "_run", lambda job_id, file_path, created_by: release.wait(5))
+
+    running = runner.submit(upload(tmp_path, "a.xlsx"), "a.xlsx", uuid.uuid4())
+    queued = runner.submit(upload(tmp_path, "b.xlsx"), "b.xlsx", uuid.uuid4())
+    runner.shutdown()
+    release.set()
+
+    assert store.get(queued)["status"] == JobStatus.FAILED
+    assert store.get(queued)["message"] == module.INTERRUPTED_MESSAGE
+    assert not (tmp_path / "b.xlsx").exists()
+    assert store.get(running)["status"] == JobStatus.QUEUED  # still ours; _run was replaced
+
+
+def test_recover_fails_jobs_of_dead_workers(tmp_path, store):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    orphaned = store.create("a.xlsx", uuid.uuid4(), upload(tmp_path, "a.xlsx"))
+    store.update(orphaned, status=JobStatus.RUNNING, owner_pid=dead.pid)
+    live = store.create("b.xlsx", uuid.uuid4(), upload(tmp_path, "b.xlsx"))
+    store.update(live, owner_pid=os.getppid())
+    done = store.create("c.xlsx", uuid.uuid4())
+    store.update(done, status=JobStatus.SUCCEEDED, owner_pid=dead.pid)
+
+    runner = ImportJobRunner(store, parse_workers=1, max_concurrent_jobs=1, chunk_size=10)
+    assert runner.recover() == 1
+    runner.shutdown()
+
+    assert store.get(orphaned)["status"] == JobStatus.FAILED
+    assert not (tmp_path / "a.xlsx").exists()
+    assert store.get(live)["status"] == JobStatus.QUEUED
+    assert (tmp_path / "b.xlsx").exists()
+    assert store.get(done)["status"] == JobStatus.SUCCEEDED
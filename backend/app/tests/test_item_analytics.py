@@ -0,0 +1,117 @@
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from app.models.question import QuestionType
+from app.services import item_analytics as analytics_module
+from app.services.exam_cache import exam_paper_cache
+from app.services.item_analytics import ExamItemData, ItemAnalytics
+
+
+def make_question(type, options=None, correct_answers=None, max_score=1):
+    return SimpleNamespace(
+        id=uuid.uuid4(), title=f"{type.value} question", type=type,
+        options=options, correct_answers=correct_answers, max_score=max_score
+    )
+
+
+@pytest.fixture
+def paper():
+    single = make_question(QuestionType.SINGLE_CHOICE, ['a', 'b', 'c'], ['a'], max_score=2)
+    multi = make_question(QuestionType.MULTI_CHOICE, ['a', 'b', 'c'], ['a', 'b'])
+    text = make_question(QuestionType.TEXT)
+    return single, multi, text
+
+
+def rows_for(attempt_id, total, answers):
+    """Rows as graded_answer_rows returns them: one per answer, or one empty"""
+    if not answers:
+        return [(attempt_id, total, None, None, None)]
+    return [(attempt_id, total, question.id, answer, score) for question, answer, score in answers]
+
+
+def test_statistics(paper):
+    single, multi, text = paper
+    data = ExamItemData(0, paper)
+    data.merge(
+        rows_for(uuid.uuid4(), 3, [(single, 'a', 2), (multi, ['a', 'b'], 1), (text, 'essay', 0)])
+        + rows_for(uuid.uuid4(), 2, [(single, 'a', 2), (multi, ['a', 'zzz'], 0)])
+        + rows_for(uuid.uuid4(), 0, [(single, 'b', 0)])
+        + rows_for(uuid.uuid4(), 0, [])
+    )
+
+    stats = data.statistics()
+
+    assert stats["attempts"] == 4
+    assert stats["max_score"] == 4
+    assert stats["mean"] == pytest.approx(1.25)
+    assert stats["median"] == pytest.approx(1.0)
+    assert (stats["min"], stats["max"]) == (0, 3)
+    assert sum(b["count"] for b in stats["distribution"]) == 4
+    assert len(stats["distribution"]) == 4
+
+    by_id = {q["question_id"]: q for q in stats["questions"]}
+    first = by_id[str(single.id)]
+    assert first["answered"] == pytest.approx(0.75)
+    assert first["p_value"] == pytest.approx(0.5)
+    # The top attempt got it right and the bottom one didn't
+    assert first["discrimination"] == pytest.approx(1.0)
+    assert first["options"] == pytest.approx({'a': 0.5, 'b': 0.25, 'c': 0.0})
+    assert by_id[str(multi.id)]["options"] == pytest.approx({'a': 0.5, 'b': 0.25, 'c': 0.0, '(other)': 0.25})
+    assert by_id[str(text.id)]["options"] is None
+
+
+def test_statistics_without_attempts(paper):
+    stats = ExamItemData(0, paper).statistics()
+
+    assert stats["attempts"] == 0
+    assert stats["mean"] is None
+    assert all(q["p_value"] is None and q["discrimination"] is None for q in stats["questions"])
+
+
+def test_merge_replaces_regraded_attempts(paper):
+    single, multi, _ = paper
+    data = ExamItemData(0, paper)
+    first, second = uuid.uuid4(), uuid.uuid4()
+    data.merge(rows_for(first, 0, [(single, 'b', 0)]) + rows_for(second, 2, [(single, 'a', 2)]))
+
+    assert data.merge(rows_for(first, 3, [(single, 'a', 2), (multi, ['a', 'b'], 1)])) == 1
+
+    assert len(data.rows) == 2
+    assert data.totals[data.rows[first]] == 3
+    assert data.scores[data.rows[first]].tolist() == [2, 1, 0]
+    assert data.statistics()["questions"][0]["p_value"] == pytest.approx(1.0)
+
+
+def test_get_reads_only_newly_graded_attempts(monkeypatch, paper):
+    single = paper[0]
+    exam_id = uuid.uuid4()
+    graded = []  # (graded_at, rows)
+    reads = []
+
+    def marker(db, exam_id):
+        return len(graded), max((at for at, _ in graded), default=None)
+
+    def answer_rows(db, exam_id, graded_since=None):
+        reads.append(graded_since)
+        return [row for at, rows in graded if graded_since is None or at >= graded_since for row in rows]
+
+    monkeypatch.setattr(analytics_module, "graded_attempts_marker", marker)
+    monkeypatch.setattr(analytics_module, "graded_answer_rows", answer_rows)
+    analytics = ItemAnalytics()
+    analytics._cache.set(exam_id, ExamItemData(exam_paper_cache.version(exam_id), paper))
+
+    start = datetime(2026, 1, 1)
+    graded.append((start, rows_for(uuid.uuid4(), 2, [(single, 'a', 2)])))
+    assert analytics.get(None, exam_id)["attempts"] == 1
+    cached = analytics.get(None, exam_id)
+    assert reads == [None]
+
+    later = start + timedelta(hours=1)
+    graded.append((later, rows_for(uuid.uuid4(), 0, [(single, 'c', 0)])))
+    stats = analytics.get(None, exam_id)
+
+    assert stats is not cached
+    assert stats["attempts"] == 2
+    assert stats["graded_through"] == later
+    assert reads == [None, start - analytics_module.REGRADE_OVERLAP]
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+from app.core.metrics import MetricsMiddleware, MetricsSampler
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_latency_is_recorded_per_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/exams/{exam_id}")
+    def read_exam(exam_id: str):
+        return {"id": exam_id}
+
+    client = TestClient(app)
+    labels = {"method": "GET", "route": "/metrics-test/exams/{exam_id}", "status": "200"}
+    before = sample("http_request_duration_seconds_count", labels)
+
+    for exam_id in ("a", "b", "c"):
+        client.get(f"/metrics-test/exams/{exam_id}")
+
+    assert sample("http_request_duration_seconds_count", labels) == before + 3
+    assert sample("http_requests_in_progress", {"method": "GET", "route": "/metrics-test/exams/{exam_id}"}) == 0
+
+
+def test_sampler_turns_cache_totals_into_counter_increments():
+    stats = {"hits": 8, "misses": 2}
+    sampler = MetricsSampler()
+    sampler.queue("metrics-test", lambda: 42)
+    sampler.cache("metrics-test", lambda: stats)
+    before = sample("cache_lookups_total", {"cache": "metrics-test", "result": "hit"})
+
+    sampler.sample()
+    stats["hits"] = 11
+    sampler.sample()
+
+    assert sample("cache_lookups_total", {"cache": "metrics-test", "result": "hit"}) == before + 11
+    assert sample("queue_depth", {"queue": "metrics-test"}) == 42
+
+
+def test_workers_are_aggregated_through_the_multiprocess_directory(tmp_path):
+    worker = (
+        "from app.core.metrics import QUEUE_DEPTH, REQUEST_SECONDS\n"
+        "REQUEST_SECONDS.labels('GET', '/exams/', '200').observe(0.01)\n"
+        "QUEUE_DEPTH.labels('grading').set(5)\n"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], cwd=BACKEND_DIR, env=env, check=True)
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=str(tmp_path))
+    output = generate_latest(registry).decode()
+
+    assert 'http_request_duration_seconds_count{method="GET",route="/exams/",status="200"} 2.0' in output
+    # Neither process is alive any more, but nobody marked them dead
+    assert 'queue_depth{queue="grading"} 10.0' in output
@@ -0,0 +1,59 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from app.crud.pagination import decode_cursor, encode_cursor, keyset_page, next_cursor
+from app.models.question import Question, QuestionType
+from app.models.user import User, UserRole
+
+
+def test_cursor_round_trip():
+    created_at, id = datetime(2026, 5, 1, 12, 30, 15, 123456), uuid.uuid4()
+
+    cursor = encode_cursor(created_at, id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime(2026, 1, 1), uuid.uuid4())[:-3]])
+def test_bad_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_keyset_pages_cover_every_row_once(db):
+    admin = User(email="admin@example.com", hashed_password="x", full_name="Admin", role=UserRole.ADMIN)
+    db.add(admin)
+    db.flush()
+    start = datetime(2026, 1, 1)
+    # Pairs share a created_at, so pages must break ties on id
+    # Core insert: the ORM would read back search_vector, which SQLite lacks
+    db.execute(insert(Question), [
+        {
+            "id": uuid.uuid4(), "title": f"Question {n}", "complexity": "Class 1", "type": QuestionType.TEXT,
+            "created_at": start + timedelta(minutes=n // 2), "created_by": admin.id
+        }
+        for n in range(7)
+    ])
+    db.commit()
+
+    pages, cursor = [], None
+    while True:
+        page = keyset_page(db.query(Question), Question, limit=3, cursor=cursor).all()
+        pages.append(page)
+        cursor = next_cursor(page, limit=3)
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    rows = [question for page in pages for question in page]
+    assert len({question.id for question in rows}) == 7
+    assert [(q.created_at, q.id) for q in rows] == sorted(((q.created_at, q.id) for q in rows), reverse=True)
+
+
+def test_next_cursor_only_for_full_pages():
+    row = type("Row", (), {"created_at": datetime(2026, 1, 1), "id": uuid.uuid4()})
+
+    assert next_cursor([row], limit=2) is None
+    assert decode_cursor(next_cursor([row, row], limit=2)) == (row.created_at, row.id)
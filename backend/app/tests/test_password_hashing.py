@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.services.password_hashing import PasswordHasherBusy, PasswordHashPool
+
+
+def saturated(pool: PasswordHashPool) -> PasswordHashPool:
+    # Every worker and queue slot taken
+    while pool._slots.acquire(blocking=False):
+        pool.pending += 1
+    return pool
+
+
+def test_full_pool_rejects_with_retry_after():
+    pool = saturated(PasswordHashPool(workers=0, max_queue=2, timeout=1))
+    pool._latencies.extend([2.0, 2.0])
+
+    with pytest.raises(PasswordHasherBusy) as error:
+        asyncio.run(pool.hash_async("secret"))
+
+    # Three pending hashes at two seconds each on one worker
+    assert error.value.retry_after == 6
+    assert pool.stats()["rejected"] == 1
+
+
+def test_blocking_callers_are_capped():
+    pool = PasswordHashPool(workers=0, max_queue=10, timeout=1, max_sync_waiters=1)
+    entered, release = threading.Event(), threading.Event()
+
+    def slow(password):
+        entered.set()
+        release.wait(5)
+        return password
+
+    waiter = threading.Thread(target=pool._run, args=(slow, "first"))
+    waiter.start()
+    try:
+        assert entered.wait(5)
+        with pytest.raises(PasswordHasherBusy):
+            pool._run(slow, "second")
+    finally:
+        release.set()
+        waiter.join()
+    assert pool._run(str.upper, "third") == "THIRD"
+
+
+def test_register_answers_503_when_hashing_is_saturated(monkeypatch):
+    from app.api.endpoints import auth
+    from app.core.database import get_async_db
+    from app.crud import user as user_crud
+
+    async def no_user(db, email):
+        return None
+
+    pool = saturated(PasswordHashPool(workers=0, max_queue=0, timeout=1))
+    monkeypatch.setattr(user_crud, "password_hasher", pool)
+    monkeypatch.setattr(auth, "get_user_by_email_async", no_user)
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.dependency_overrides[get_async_db] = lambda: None
+
+    response = TestClient(app).post("/auth/register", json={
+        "email": "new@example.com", "full_name": "New", "password": "secret", "role": "student"
+    })
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_hash_time_and_queue_wait_are_exported(workers):
+    from prometheus_client import REGISTRY
+
+    def count(name):
+        return REGISTRY.get_sample_value(f"{name}_count") or 0
+
+    def counts():
+        return count("password_hash_seconds"), count("password_hash_queue_wait_seconds")
+
+    expected = tuple(value + 2 for value in counts())
+    pool = PasswordHashPool(workers=workers, max_queue=2, timeout=30)
+    try:
+        assert pool._run(str.upper, "sync") == "SYNC"
+        assert asyncio.run(pool._run_async(str.upper, "async")) == "ASYNC"
+        # Recorded by the pool's done callback, which may trail the result
+        deadline = time.monotonic() + 5
+        while counts() != expected and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.shutdown()
+
+    assert counts() == expected
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import Counter
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.profiling import PROFILE_ID_HEADER, ProfileStore, ProfilingMiddleware
+
+
+def spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def build_app(store: ProfileStore) -> FastAPI:
+    async def is_admin(token: str) -> bool:
+        return token == "admin-token"
+
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, store=store, is_admin=is_admin)
+
+    @app.get("/sync")
+    def grade_in_threadpool():
+        spin(0.1)
+        return {}
+
+    @app.get("/async")
+    async def wait_on_database():
+        await asyncio.sleep(0.1)
+        spin(0.05)
+        return {}
+
+    return app
+
+
+def test_admin_header_profiles_sync_and_async_requests(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    client = TestClient(build_app(store))
+    headers = {"X-Profile": "1", "Authorization": "Bearer admin-token"}
+
+    sync_id = client.get("/sync", headers=headers).headers[PROFILE_ID_HEADER]
+    async_id = client.get("/async", headers=headers).headers[PROFILE_ID_HEADER]
+
+    assert {meta["id"] for meta in store.list()} == {sync_id, async_id}
+    with open(store.path(sync_id, "folded")) as f:
+        assert "grade_in_threadpool" in f.read()
+    with open(store.path(async_id, "folded")) as f:
+        folded = f.read()
+    assert "wait_on_database" in folded
+    assert "[await " in folded
+    with open(store.path(async_id, "tree")) as f:
+        assert f.readline().startswith("GET /async 200")
+
+
+def test_header_from_non_admin_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    store = ProfileStore(str(tmp_path))
+    client = TestClient(build_app(store))
+
+    response = client.get("/sync", headers={"X-Profile": "1", "Authorization": "Bearer student-token"})
+
+    assert PROFILE_ID_HEADER not in response.headers
+    assert store.list() == []
+
+
+def test_sample_rate_profiles_without_header_and_rotates(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+    store = ProfileStore(str(tmp_path), max_files=2)
+    client = TestClient(build_app(store))
+
+    ids = [client.get("/async").headers[PROFILE_ID_HEADER] for _ in range(3)]
+
+    assert [meta["id"] for meta in store.list()] == ids[:0:-1]
+    assert store.path(ids[0], "tree") is None
+
+
+def test_rotation_follows_creation_time_not_mtime(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=2)
+    # Written in a different order than they were created
+    created = ["2026-01-01T10:00:02", "2026-01-01T10:00:00", "2026-01-01T10:00:01"]
+    ids = [str(uuid.uuid4()) for _ in created]
+    for written, (profile_id, created_at) in enumerate(zip(ids, created)):
+        store._rotate = lambda: None
+        store.save({
+            "id": profile_id, "created_at": created_at, "method": "GET", "path": "/", "status": 200,
+            "duration_ms": 1.0, "samples": 1
+        }, Counter({("main",): 1}), 0.001)
+        os.utime(tmp_path / f"{profile_id}.json", (written, written))
+    del store._rotate
+
+    store._rotate()
+
+    assert [meta["id"] for meta in store.list()] == [ids[0], ids[2]]
+    assert store.path(ids[1], "tree") is None
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.database import create_async_db_engine, create_db_engine
+from app.core.query_stats import QUERY_COUNT_HEADER, QueryStatsMiddleware
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'exam.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE exams (id INTEGER PRIMARY KEY, title TEXT)"))
+        conn.execute(text("CREATE TABLE exam_questions (exam_id INTEGER, question TEXT)"))
+        for n in range(12):
+            conn.execute(text(f"INSERT INTO exams VALUES ({n}, 'Exam {n}')"))
+    return engine
+
+
+def build_app(engine) -> FastAPI:
+    SessionLocal = sessionmaker(bind=engine)
+
+    def get_db():
+        with SessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/exams/{exam_id}")
+    def read_exam(exam_id: int, db=Depends(get_db)):
+        return {"title": db.execute(text("SELECT title FROM exams WHERE id = :id"), {"id": exam_id}).scalar()}
+
+    @app.get("/exams")
+    def read_exams(db=Depends(get_db)):
+        # One question lookup per exam
+        exams = db.execute(text("SELECT id FROM exams")).scalars().all()
+        for exam_id in exams:
+            db.execute(text(f"SELECT question FROM exam_questions WHERE exam_id = {exam_id}")).all()
+        return {"count": len(exams)}
+
+    return app
+
+
+def test_debug_headers_count_queries(engine, monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", True)
+    client = TestClient(build_app(engine))
+
+    response = client.get("/exams/3")
+
+    assert response.json() == {"title": "Exam 3"}
+    assert response.headers[QUERY_COUNT_HEADER] == "1"
+
+
+def test_n_plus_one_and_budget_are_logged(engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_BUDGETS", {"GET /exams": 5})
+    client = TestClient(build_app(engine))
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        response = client.get("/exams")
+
+    assert QUERY_COUNT_HEADER not in response.headers
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("GET /exams ran 13 queries, over its budget of 5" in message for message in messages)
+    assert any("same statement 12 times (possible N+1)" in message for message in messages)
+
+
+def test_max_queries_counts_sync_and_async_engines(tmp_path, max_queries):
+    url = f"sqlite:///{tmp_path / 'exam.db'}"
+    engine = create_db_engine(url)
+    async_engine = create_async_db_engine(url)
+
+    async def read():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    with max_queries(2) as stats:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        asyncio.run(read())
+
+    assert stats.count == 2
+    with pytest.raises(AssertionError):
+        with max_queries(0):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
@@ -0,0 +1,126 @@
+import uuid
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import psycopg2
+from sqlalchemy.orm import Session
+from app.crud.question import _escape_html, _escape_like, _filter_questions, _search_predicate, bulk_create_questions, get_question_facets
+from app.models.question import Question, QuestionType
+
+
+def compile_pg(clause):
+    compiled = clause.compile(dialect=psycopg2.dialect())
+    return str(compiled), compiled.params
+
+
+def test_search_matches_words_within_titles_and_substrings():
+    sql, params = compile_pg(_search_predicate("photosynth"))
+
+    assert "questions.search_vector @@ websearch_to_tsquery(" in sql
+    # Word similarity against any part of the title, not the whole title
+    assert "(%(param_1)s <%% questions.title)" in sql
+    assert params["param_1"] == "photosynth"
+    assert "questions.title ILIKE %(title_1)s" in sql and params["title_1"] == "%photosynth%"
+    assert "questions.description ILIKE %(description_1)s" in sql
+
+
+def test_substring_search_escapes_wildcards(db):
+    pattern = f"%{_escape_like('50%_off')}%"
+    matches = lambda text: db.execute(select(literal(text).ilike(pattern, escape="\\"))).scalar()
+
+    assert matches("Get 50%_OFF today")
+    assert not matches("Get 500 off today")
+    assert not matches("Get 50%xoff today")
+
+
+def test_highlighted_text_is_escaped(db):
+    escaped = db.execute(select(_escape_html(literal('<img src=x onerror="alert(1)"> & more')))).scalar()
+
+    assert escaped == "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; &amp; more"
+
+
+class RecordingSession:
+    """Builds queries like a Session and answers execute() with canned rows"""
+
+    def __init__(self, rows):
+        self._session = Session()
+        self.rows = rows
+        self.statement = None
+
+    def query(self, *entities):
+        return self._session.query(*entities)
+
+    def execute(self, statement):
+        self.statement = statement
+        return self.rows
+
+
+def test_tags_filter_requires_every_tag():
+    query = _filter_questions(Session().query(Question.id), tags=" algebra, ,geometry ")
+
+    sql, params = compile_pg(query.statement)
+
+    assert "questions.tags @> %(tags_1)s" in sql
+    assert params["tags_1"] == ["algebra", "geometry"]
+
+
+def test_facets_are_counted_in_one_statement():
+    db = RecordingSession([
+        ("total", None, 5),
+        ("type", "SINGLE_CHOICE", 3),
+        ("type", "TEXT", 2),
+        ("complexity", "Class 1", 5),
+        ("tag", "algebra", 4),
+    ])
+
+    facets = get_question_facets(db, type="single_choice", tags="algebra")
+
+    assert facets == {
+        "total": 5,
+        "types": {"single_choice": 3, "text": 2},
+        "complexities": {"Class 1": 5},
+        "tags": {"algebra": 4},
+    }
+    sql, params = compile_pg(db.statement)
+    assert sql.startswith("WITH filtered AS")
+    assert sql.count("UNION ALL") == 3
+    assert "jsonb_array_elements_text(filtered.tags)" in sql
+    assert "jsonb_typeof(filtered.tags)" in sql
+    # The filters apply to the shared CTE, once
+    assert sql.count("questions.tags @>") == 1
+    assert QuestionType.SINGLE_CHOICE in params.values()
+
+
+def question_row(n, **overrides):
+    return {"title": f"Question {n}", "complexity": "Class 1", "type": "text", "tags": ["algebra"], **overrides}
+
+
+def test_bulk_create_inserts_in_batches(db):
+    batches = []
+
+    report = bulk_create_questions(
+        db, ((n + 2, question_row(n)) for n in range(7)), created_by=uuid.uuid4(),
+        batch_size=3, on_batch=batches.append
+    )
+
+    assert batches == [3, 6, 7]
+    assert report["rows"] == report["imported"] == 7
+    assert report["failed"] == 0 and report["errors"] == []
+    assert db.scalar(select(func.count()).select_from(Question)) == 7
+
+
+def test_bulk_create_reports_every_error_and_writes_nothing(db):
+    upstream = [{"row": 3, "error": "options: not valid JSON"}]
+    rows = [
+        (2, question_row(0)),
+        (4, question_row(1, type="essay")),
+        (5, question_row(2)),
+        (6, question_row(3, title=None)),
+    ]
+
+    report = bulk_create_questions(db, iter(rows), created_by=uuid.uuid4(), errors=upstream, batch_size=1)
+
+    assert report["rows"] == 5
+    assert report["imported"] == 0
+    assert report["failed"] == 3
+    assert [error["row"] for error in report["errors"]] == [3, 4, 6]
+    assert report["errors"][1]["error"].startswith("type:")
+    assert db.scalar(select(func.count()).select_from(Question)) == 0
@@ -0,0 +1,90 @@
+import csv
+import io
+import uuid
+from datetime import datetime
+from openpyxl import load_workbook
+from app.services import results_export
+from app.services.results_export import csv_chunks, export_header, result_records, xlsx_chunks
+
+QUESTIONS = [uuid.uuid4(), uuid.uuid4()]
+STARTED = datetime(2026, 3, 1, 9, 0)
+
+
+def result_rows(attempts):
+    """Rows shaped like exam_result_rows: one per answer, grouped by attempt"""
+    for n in range(attempts):
+        attempt = (uuid.uuid4(), f"Student {n}", f"s{n}@example.com", "graded", STARTED, STARTED, STARTED, n)
+        if n % 3 == 2:
+            yield attempt + (None, None)  # no answers
+            continue
+        yield attempt + (QUESTIONS[1], 1)
+        if n % 3 == 0:
+            yield attempt + (QUESTIONS[0], 2)
+
+
+def test_result_records_one_per_attempt():
+    records = list(result_records(result_rows(3), QUESTIONS))
+
+    assert [record[1] for record in records] == ["Student 0", "Student 1", "Student 2"]
+    assert [record[-2:] for record in records] == [[2, 1], [None, 1], [None, None]]
+    assert all(len(record) == len(export_header(len(QUESTIONS))) for record in records)
+
+
+def formula_rows():
+    attempt = (uuid.uuid4(), "=HYPERLINK(\"http://x\")", "@evil.example.com", "graded", STARTED, None, None, -1)
+    return [
+        attempt + (QUESTIONS[0], -1),
+        (uuid.uuid4(), "Ann-Marie", "\t+1@example.com") + attempt[3:] + (None, None),
+    ]
+
+
+def test_csv_fields_are_never_formulas():
+    data = b"".join(csv_chunks(export_header(len(QUESTIONS)), result_records(formula_rows(), QUESTIONS)))
+
+    rows = list(csv.reader(io.StringIO(data.decode())))
+    assert rows[1][1:3] == ["'=HYPERLINK(\"http://x\")", "'@evil.example.com"]
+    assert rows[2][1:3] == ["Ann-Marie", "'\t+1@example.com"]
+    # Numbers are left alone
+    assert rows[1][7] == "-1" and rows[1][-2:] == ["-1", ""]
+
+
+def test_xlsx_cells_are_never_formulas():
+    data = b"".join(xlsx_chunks(export_header(len(QUESTIONS)), result_records(formula_rows(), QUESTIONS)))
+
+    sheet = load_workbook(io.BytesIO(data))["Results"]
+    names = [sheet.cell(row, 2) for row in (2, 3)]
+    # Plain text cells, without the CSV quote
+    assert [(cell.value, cell.data_type) for cell in names] == [
+        ("=HYPERLINK(\"http://x\")", "s"), ("Ann-Marie", "s")
+    ]
+    assert sheet.cell(2, 3).value == "@evil.example.com"
+    assert sheet.cell(2, 8).value == -1
+
+
+def test_csv_is_streamed_in_chunks(monkeypatch):
+    monkeypatch.setattr(results_export, "CSV_ROWS_PER_CHUNK", 10)
+    header = export_header(len(QUESTIONS))
+
+    chunks = list(csv_chunks(header, result_records(result_rows(25), QUESTIONS)))
+
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == header == results_export.ATTEMPT_COLUMNS + ["Q1 score", "Q2 score"]
+    assert len(rows) == 26
+    assert rows[1][1:4] == ["Student 0", "s0@example.com", "graded"]
+    assert rows[1][-2:] == ["2", "1"]
+    assert rows[3][-2:] == ["", ""]
+
+
+def test_xlsx_export():
+    header = export_header(len(QUESTIONS))
+
+    data = b"".join(xlsx_chunks(header, result_records(result_rows(1200), QUESTIONS)))
+
+    sheet = load_workbook(io.BytesIO(data), read_only=True)["Results"]
+    rows = list(sheet.iter_rows(values_only=True))
+    assert list(rows[0]) == header
+    assert len(rows) == 1201
+    assert rows[1][1] == "Student 0"
+    assert rows[1][4] == STARTED
+    assert rows[1][-2:] == (2, 1)
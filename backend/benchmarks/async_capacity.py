@@ -0,0 +1,112 @@
+"""Concurrent-request capacity of one worker: blocking Session vs AsyncSession.
+
+Serves the same endpoint twice in-process: once as a `def` on the blocking
+Session, which Starlette runs in its threadpool (40 threads by default),
+and once as an `async def` on AsyncSession. Each request makes one database
+round trip that holds a connection for --db-latency seconds, standing in
+for the I/O wait of an exam fetch or attempt lookup. Both engines get the
+same pool, so the threadpool is the only difference.
+
+Needs Postgres, configured the same way as the app (.env / POSTGRES_* or
+DATABASE_URI):
+
+    cd backend
+    python -m benchmarks.async_capacity --concurrency 20 50 100 200 --requests 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import create_async_db_engine, create_db_engine
+
+
+def build_app(pool_size: int, db_latency: float) -> FastAPI:
+    engine = create_db_engine(settings.DATABASE_URL, pool_size=pool_size, max_overflow=0)
+    async_engine = create_async_db_engine(settings.DATABASE_URL, pool_size=pool_size, max_overflow=0)
+    SessionLocal = sessionmaker(bind=engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine)
+    query = text("SELECT pg_sleep(:seconds)")
+
+    def get_db():
+        with SessionLocal() as db:
+            yield db
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_endpoint(db=Depends(get_db)):
+        db.execute(query, {"seconds": db_latency})
+        return {"ok": True}
+
+    @app.get("/async")
+    async def async_endpoint(db=Depends(get_async_db)):
+        await db.execute(query, {"seconds": db_latency})
+        return {"ok": True}
+
+    return app
+
+
+async def drive(client: httpx.AsyncClient, path: str, concurrency: int, requests: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    remaining = requests
+
+    async def client_loop():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    app = build_app(pool_size=args.pool_size, db_latency=args.db_latency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Open the pools' connections before measuring
+        await drive(client, "/sync", args.pool_size, args.pool_size)
+        await drive(client, "/async", args.pool_size, args.pool_size)
+
+        print(f"db latency {args.db_latency * 1000:.0f} ms, pool {args.pool_size}, {args.requests} requests per run")
+        print(f"{'concurrency':>11} {'path':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for concurrency in args.concurrency:
+            for path in ("/sync", "/async"):
+                result = await drive(client, path, concurrency, args.requests)
+                print(
+                    f"{concurrency:>11} {path:>6} {result['rps']:>8.0f} "
+                    f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 40, 100, 200])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--db-latency", type=float, default=0.02, help="seconds each request holds a connection")
+    parser.add_argument("--pool-size", type=int, default=200, help="connections per engine; keep it at or above the highest concurrency")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,318 @@
+"""Load test that runs a live exam against the real app.
+
+Seeds an admin, a question bank and an exam through the API, then runs
+--students simulated students through the whole exam lifecycle:
+
+    register -> login -> POST /attempts -> GET /exams/{id}
+             -> auto-save every --autosave-interval seconds -> submit
+
+Students arrive following --ramp: "spike" starts everyone at once (the
+exam-start herd), "linear" spreads arrivals evenly over --ramp-seconds, and
+"step" brings them in --ramp-steps equal waves. A 503 with Retry-After
+(admission control, login shedding) is waited out and retried, as the
+frontend does.
+
+By default the app runs in-process over ASGI, which also lets the harness
+count the SQL statements each endpoint issues. --base-url targets a
+running server instead, without query counts. Either way it needs a local
+Postgres with the schema applied (`alembic upgrade head`).
+
+The report gives per-endpoint p50/p95/p99 latency, throughput, error and
+shed rates and queries per request. Each run is saved as JSON under
+--output; --compare prints the change against an earlier run.
+
+    cd backend
+    python -m benchmarks.exam_load --students 500 --ramp spike
+    python -m benchmarks.exam_load --students 500 --ramp spike --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import re
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+API = "/api/v1"
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+# Endpoint label of the request being served, for attributing queries
+_route: contextvars.ContextVar[str] = contextvars.ContextVar("route", default="background")
+
+
+def endpoint_label(method: str, path: str) -> str:
+    path = _UUID.sub("{id}", path)
+    if path.startswith(API):
+        path = path[len(API):]
+    return f"{method} {path.rstrip('/') or '/'}"
+
+
+class QueryCounter:
+    """Counts SQL statements per endpoint label via engine events"""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    def attach(self) -> None:
+        from sqlalchemy import event
+        from app.core import database
+
+        engines = {
+            id(engine): engine for engine in (
+                database.engine,
+                database.read_engine,
+                database.async_engine.sync_engine,
+                database.async_read_engine.sync_engine,
+            )
+        }
+        for engine in engines.values():
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.counts[_route.get()] += 1
+
+
+def labelled(app):
+    """ASGI wrapper that tags everything a request does with its endpoint label"""
+    async def wrapper(scope, receive, send):
+        if scope["type"] != "http":
+            return await app(scope, receive, send)
+        token = _route.set(endpoint_label(scope["method"], scope["path"]))
+        try:
+            await app(scope, receive, send)
+        finally:
+            _route.reset(token)
+    return wrapper
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.exceptions: Counter = Counter()
+
+    async def request(self, client: httpx.AsyncClient, method: str, path: str, retries: int = 10, **kwargs) -> httpx.Response:
+        label = endpoint_label(method, path)
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+            except httpx.HTTPError:
+                self.exceptions[label] += 1
+                raise
+            self.latencies[label].append(time.perf_counter() - started)
+            self.statuses[label][response.status_code] += 1
+            if response.status_code != 503 or attempt == retries:
+                return response
+            await asyncio.sleep(float(response.headers.get("retry-after", 1)) + random.random())
+        return response
+
+
+def seed(client_factory, recorder: Recorder, args) -> Dict[str, Any]:
+    async def run():
+        async with client_factory() as client:
+            run_id = uuid.uuid4().hex[:8]
+            admin = {"email": f"admin-{run_id}@load.test", "password": "load-test", "full_name": "Load Admin", "role": "admin"}
+            response = await recorder.request(client, "POST", f"{API}/auth/register", json=admin)
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            questions = []
+            for n in range(args.questions):
+                single = n % 2 == 0
+                response = await recorder.request(client, "POST", f"{API}/questions/", headers=headers, json={
+                    "title": f"Load question {n}",
+                    "complexity": "Class 1",
+                    "type": "single_choice" if single else "multi_choice",
+                    "options": ["a", "b", "c", "d"],
+                    "correct_answers": ["a"] if single else ["a", "c"],
+                })
+                response.raise_for_status()
+                questions.append(response.json())
+
+            now = datetime.utcnow()
+            response = await recorder.request(client, "POST", f"{API}/exams/", headers=headers, json={
+                "title": f"Load exam {run_id}",
+                "start_time": now.isoformat(),
+                "end_time": (now + timedelta(hours=3)).isoformat(),
+                "duration_minutes": 180,
+                "is_published": True,
+                "question_ids": [question["id"] for question in questions],
+            })
+            response.raise_for_status()
+            return {"run_id": run_id, "exam_id": response.json()["id"], "questions": questions}
+    return run
+
+
+async def student(client: httpx.AsyncClient, recorder: Recorder, fixture: Dict[str, Any], n: int, args) -> None:
+    email = f"student-{fixture['run_id']}-{n}@load.test"
+    response = await recorder.request(client, "POST", f"{API}/auth/register", json={
+        "email": email, "password": "load-test", "full_name": f"Student {n}", "role": "student"
+    })
+    response.raise_for_status()
+    response = await recorder.request(client, "POST", f"{API}/auth/login", data={"username": email, "password": "load-test"})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await recorder.request(client, "POST", f"{API}/attempts/", headers=headers, json={"exam_id": fixture["exam_id"]})
+    response.raise_for_status()
+    attempt_id = response.json()["id"]
+    (await recorder.request(client, "GET", f"{API}/exams/{fixture['exam_id']}", headers=headers)).raise_for_status()
+
+    answers: Dict[str, Any] = {}
+    for _ in range(args.autosaves):
+        await asyncio.sleep(args.autosave_interval * random.uniform(0.8, 1.2))
+        for question in random.sample(fixture["questions"], k=min(5, len(fixture["questions"]))):
+            answers[question["id"]] = (
+                random.choice(question["options"]) if question["type"] == "single_choice"
+                else random.sample(question["options"], 2)
+            )
+        await recorder.request(client, "POST", f"{API}/attempts/{attempt_id}/auto-save", headers=headers, json={"answers": answers})
+
+    await recorder.request(client, "POST", f"{API}/attempts/{attempt_id}/submit", headers=headers)
+
+
+def arrival_delays(args) -> List[float]:
+    if args.ramp == "spike" or args.ramp_seconds <= 0:
+        return [0.0] * args.students
+    if args.ramp == "linear":
+        return [args.ramp_seconds * n / args.students for n in range(args.students)]
+    step = args.ramp_seconds / max(args.ramp_steps - 1, 1)
+    return [step * (n * args.ramp_steps // args.students) for n in range(args.students)]
+
+
+async def run_students(client_factory, recorder: Recorder, fixture: Dict[str, Any], args) -> float:
+    async def delayed(n: int, delay: float):
+        await asyncio.sleep(delay)
+        try:
+            await student(client, recorder, fixture, n, args)
+        except Exception:
+            pass  # already recorded; the student drops out like a real one would
+
+    async with client_factory() as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(delayed(n, delay) for n, delay in enumerate(arrival_delays(args))))
+        return time.perf_counter() - started
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, max(int(round(p * len(sorted_values))) - 1, 0))]
+
+
+def summarize(recorder: Recorder, queries: Optional[Counter], elapsed: float, args) -> Dict[str, Any]:
+    endpoints = {}
+    for label, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        statuses = recorder.statuses[label]
+        requests = sum(statuses.values())
+        shed = statuses.get(503, 0)
+        errors = sum(count for status, count in statuses.items() if status >= 400 and status != 503)
+        endpoints[label] = {
+            "requests": requests,
+            "rps": requests / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "error_rate": (errors + recorder.exceptions[label]) / requests,
+            "shed_rate": shed / requests,
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "queries_per_request": queries[label] / requests if queries is not None else None,
+        }
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare", "output")},
+        "elapsed_seconds": elapsed,
+        "requests": total,
+        "rps": total / elapsed,
+        "background_queries": queries["background"] if queries is not None else None,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    print(f"\n{result['requests']} requests in {result['elapsed_seconds']:.1f}s ({result['rps']:.0f} req/s)")
+    header = f"{'endpoint':<36} {'reqs':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err %':>6} {'shed %':>6} {'q/req':>6}"
+    print(header)
+    for label, row in result["endpoints"].items():
+        queries = f"{row['queries_per_request']:.1f}" if row["queries_per_request"] is not None else "-"
+        print(
+            f"{label:<36} {row['requests']:>6} {row['rps']:>7.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+            f"{row['p99_ms']:>8.1f} {row['error_rate'] * 100:>6.1f} {row['shed_rate'] * 100:>6.1f} {queries:>6}"
+        )
+        before = (baseline or {}).get("endpoints", {}).get(label)
+        if before:
+            print(
+                f"{'  vs baseline':<36} {'':>6} {row['rps'] - before['rps']:>+7.1f} "
+                f"{row['p50_ms'] - before['p50_ms']:>+8.1f} {row['p95_ms'] - before['p95_ms']:>+8.1f} "
+                f"{row['p99_ms'] - before['p99_ms']:>+8.1f}"
+            )
+    if result["background_queries"] is not None:
+        print(f"background queries (auto-save flushes, grading, pre-warm): {result['background_queries']}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    recorder = Recorder()
+    counter: Optional[QueryCounter] = None
+    app = None
+    if args.base_url:
+        def client_factory():
+            return httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        from app.main import app
+        counter = QueryCounter()
+        counter.attach()
+        transport = httpx.ASGITransport(app=labelled(app))
+
+        def client_factory():
+            return httpx.AsyncClient(transport=transport, base_url="http://load.test", timeout=args.timeout)
+        await app.router.startup()
+
+    try:
+        fixture = await seed(client_factory, recorder, args)()
+        # Seeding is not part of the measurement
+        recorder = Recorder()
+        if counter is not None:
+            counter.counts.clear()
+        elapsed = await run_students(client_factory, recorder, fixture, args)
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+
+    result = summarize(recorder, counter.counts if counter is not None else None, elapsed, args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"exam_load-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nsaved {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--ramp", choices=("spike", "linear", "step"), default="spike")
+    parser.add_argument("--ramp-seconds", type=float, default=30)
+    parser.add_argument("--ramp-steps", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--autosaves", type=int, default=5, help="auto-saves per student before submitting")
+    parser.add_argument("--autosave-interval", type=float, default=2.0, help="seconds between a student's auto-saves")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--base-url", help="run against this server instead of in-process")
+    parser.add_argument("--output", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="earlier result JSON to compare against")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,57 @@
+"""Micro-benchmarks for the crud, service and serialization hot paths.
+
+Runs on pytest-benchmark against a database seeded by benchmarks.seed_data.
+By default that is a throwaway SQLite file at BENCH_SCALE (0.1) of the
+full data set (100k questions, 1k exams, 50k attempts). Set BENCH_SCALE=1
+for the full size, or BENCH_DATABASE_URL to use a database you seeded
+yourself, e.g. local Postgres.
+
+Results are stored under benchmarks/baselines. Save a baseline on main and
+compare a branch against it:
+
+    cd backend
+    python -m pytest benchmarks/micro --benchmark-save=main
+    python -m pytest benchmarks/micro --benchmark-compare=main --benchmark-compare-fail=mean:15%
+"""
+import os
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.seed_data import create_schema, seed
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "baselines")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    if config.getoption("benchmark_storage", None) == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{BASELINES_DIR}"
+
+
+@pytest.fixture(scope="session")
+def bench_engine(tmp_path_factory):
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if url:
+        return create_engine(url)
+
+    scale = float(os.environ.get("BENCH_SCALE", "0.1"))
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('bench') / 'bench.db'}")
+    create_schema(engine)
+    seed(
+        engine,
+        questions=int(100_000 * scale),
+        exams=max(int(1_000 * scale), 1),
+        attempts=int(50_000 * scale),
+        students=max(int(5_000 * scale), 1)
+    )
+    return engine
+
+
+@pytest.fixture
+def db(bench_engine):
+    session = sessionmaker(bind=bench_engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select
+from app.crud.exam import create_exam, get_exam_with_questions, get_exams
+from app.crud.pagination import next_cursor
+from app.crud.question import get_questions
+from app.models.exam import Exam
+from app.models.question import Question
+from app.schemas.exam import ExamCreate
+
+
+@pytest.fixture
+def exam_id(db):
+    return db.scalars(select(Exam.id).order_by(Exam.created_at.desc()).limit(1)).one()
+
+
+def test_get_questions_first_page(benchmark, db):
+    questions = benchmark(get_questions, db, limit=100)
+    assert len(questions) == 100
+
+
+def test_get_questions_deep_page(benchmark, db):
+    # Keyset pagination should cost the same a thousand rows in
+    cursor = None
+    for _ in range(10):
+        cursor = next_cursor(get_questions(db, limit=100, cursor=cursor), 100)
+    questions = benchmark(get_questions, db, limit=100, cursor=cursor)
+    assert len(questions) == 100
+
+
+def test_get_questions_filtered(benchmark, db):
+    questions = benchmark(get_questions, db, limit=100, type="multi_choice", complexity="Class 3")
+    assert questions
+
+
+def test_get_exams(benchmark, db):
+    exams = benchmark(get_exams, db, limit=100)
+    assert exams and all(exam.question_count for exam in exams)
+
+
+def test_get_exam_with_questions(benchmark, db, exam_id):
+    exam = benchmark(get_exam_with_questions, db, exam_id)
+    assert exam["questions"]
+
+
+def test_create_exam(benchmark, db):
+    question_ids = db.scalars(select(Question.id).limit(50)).all()
+    admin_id = uuid.uuid4()
+    start = datetime.utcnow() + timedelta(days=1)
+
+    def create():
+        exam = ExamCreate(
+            title="Benchmark exam", start_time=start, end_time=start + timedelta(hours=2),
+            duration_minutes=90, question_ids=question_ids
+        )
+        return create_exam(db, exam, created_by=admin_id)
+
+    # Every round commits a new exam; keep the count modest
+    exam = benchmark.pedantic(create, rounds=50, warmup_rounds=2)
+    assert exam.question_count == 50
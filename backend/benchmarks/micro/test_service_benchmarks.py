@@ -0,0 +1,83 @@
+import random
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.crud.exam import get_exam_with_questions
+from app.models.attempt import ExamAttempt
+from app.models.exam import Exam
+from app.schemas.exam import ExamWithQuestions
+from app.services.excel_parser import ExcelParser
+from app.services.grading import AnswerKey, GradingService
+
+
+@pytest.fixture
+def exam_with_attempts(db):
+    """A seeded exam, its questions and saved answers for 1000 attempts"""
+    exam_id = db.scalars(select(ExamAttempt.exam_id).limit(1)).one()
+    exam = get_exam_with_questions(db, exam_id)
+    saved = db.scalars(select(ExamAttempt.auto_saved_answers).where(ExamAttempt.exam_id == exam_id)).all()
+    answer_sets = [answers["answers"] for answers in saved]
+    # A full sitting of 1000 attempts, built from the seeded ones
+    return exam, (answer_sets * (1000 // len(answer_sets) + 1))[:1000]
+
+
+def test_grade_batch(benchmark, exam_with_attempts):
+    exam, answer_sets = exam_with_attempts
+    key = AnswerKey(exam["questions"])
+
+    scores, _ = benchmark(GradingService.grade_batch, key, answer_sets)
+    assert scores.shape == (1000, len(exam["questions"]))
+
+
+def test_answer_key(benchmark, exam_with_attempts):
+    exam, _ = exam_with_attempts
+    key = benchmark(AnswerKey, exam["questions"])
+    assert len(key) == len(exam["questions"])
+
+
+def test_grade_question_per_answer(benchmark, exam_with_attempts):
+    # The per-answer path the batch grader replaces, for comparison
+    exam, answer_sets = exam_with_attempts
+    questions = exam["questions"]
+
+    def grade_all():
+        return sum(
+            GradingService.grade_question(q.type, answers.get(str(q.id)), q.correct_answers or [], q.max_score or 1)
+            for answers in answer_sets
+            for q in questions
+        )
+
+    assert benchmark.pedantic(grade_all, rounds=5) >= 0
+
+
+@pytest.fixture(scope="module")
+def question_workbook(tmp_path_factory):
+    rng = random.Random(0)
+    path = tmp_path_factory.mktemp("excel") / "questions.xlsx"
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Questions")
+    sheet.append(["title", "description", "complexity", "type", "options", "correct_answers", "max_score", "tags"])
+    for n in range(5000):
+        if n % 3:
+            sheet.append([f"Question {n}", "Imported", f"Class {n % 10 + 1}", "single_choice",
+                          '["A", "B", "C", "D"]', f'["{rng.choice("ABCD")}"]', 1, "algebra, basic"])
+        else:
+            sheet.append([f"Question {n}", None, "Class 1", "text", None, None, 2, None])
+    workbook.save(path)
+    return str(path)
+
+
+def test_parse_excel(benchmark, question_workbook):
+    questions = benchmark.pedantic(ExcelParser().parse_excel, args=(question_workbook,), rounds=5)
+    assert len(questions) == 5000
+
+
+def test_serialize_exam_with_questions(benchmark, db):
+    exam_id = db.scalars(select(Exam.id).limit(1)).one()
+    exam = get_exam_with_questions(db, exam_id)
+
+    def serialize():
+        return ExamWithQuestions.model_validate(exam).model_dump_json()
+
+    assert benchmark(serialize).startswith("{")
@@ -0,0 +1,73 @@
+"""How long a fresh worker takes to import the app.
+
+Imports app.main in a new interpreter --runs times, the way each uvicorn
+worker does on a rolling restart or scale-out, and reports the import
+time. It also checks that no heavy optional modules (pandas, openpyxl)
+were loaded. --top lists the slowest imports from `python -X importtime`.
+
+Importing the app does not connect to the database, so this runs without
+one; only the settings need to be configured:
+
+    cd backend
+    python -m benchmarks.startup_time --runs 10 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pandas", "openpyxl")
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_once() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> list:
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, check=True, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(args: argparse.Namespace) -> None:
+    runs = [measure_once() for _ in range(args.runs)]
+    seconds = sorted(run["seconds"] for run in runs)
+    print(f"import app.main over {args.runs} fresh interpreters")
+    print(f"  median {statistics.median(seconds) * 1000:.0f} ms, min {seconds[0] * 1000:.0f} ms, max {seconds[-1] * 1000:.0f} ms")
+    heavy = sorted({module for run in runs for module in run["heavy"]})
+    print(f"  heavy modules loaded at startup: {', '.join(heavy) if heavy else 'none'}")
+
+    if args.top:
+        print("\nslowest imports (cumulative):")
+        for micros, name in slowest_imports(args.top):
+            print(f"  {micros / 1000:>8.1f} ms {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports")
+    main(parser.parse_args())
@@ -3,10 +3,27 @@ import { Upload, FileText, CheckCircle, XCircle } from 'lucide-react';
 import { questionsAPI } from '../../services/api';
 import { LoadingSpinner } from '../common/LoadingSpinner';
 
+const JOB_POLL_INTERVAL_MS = 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 export function QuestionImport({ onImportComplete }) {
   const [isDragging, setIsDragging] = useState(false);
   const [isUploading, setIsUploading] = useState(false);
   const [importResult, setImportResult] = useState(null);
+  const [progress, setProgress] = useState(null);
+
+  // Imports run as background jobs; poll until the job finishes
+  const waitForJob = async (jobId) => {
+    while (true) {
+      const { data: job } = await questionsAPI.getImportJob(jobId);
+      setProgress(job);
+      if (job.status === 'succeeded' || job.status === 'failed') {
+        return job;
+      }
+      await sleep(JOB_POLL_INTERVAL_MS);
+    }
+  };
 
   const handleFileSelect = async (file) => {
     if (!file || !file.name.endsWith('.xlsx')) {
@@ -16,11 +33,19 @@ export function QuestionImport({ onImportComplete }) {
 
     setIsUploading(true);
     setImportResult(null);
+    setProgress(null);
 
     try {
       const response = await questionsAPI.importQuestions(file);
-      setImportResult({ success: true, message: response.data.message });
-      onImportComplete?.();
+      const job = await waitForJob(response.data.job_id);
+      const rowErrors = job.errors.slice(0, 5).map((e) => `row ${e.row}: ${e.error}`);
+      setImportResult({
+        success: job.status === 'succeeded',
+        message: [job.message, ...rowErrors].join('\n')
+      });
+      if (job.status === 'succeeded') {
+        onImportComplete?.();
+      }
     } catch (error) {
       setImportResult({ 
         success: false, 
@@ -28,6 +53,7 @@ export function QuestionImport({ onImportComplete }) {
       });
     } finally {
       setIsUploading(false);
+      setProgress(null);
     }
   };
 
@@ -68,7 +94,12 @@ export function QuestionImport({ onImportComplete }) {
         {isUploading ? (
           <div className="flex flex-col items-center">
             <LoadingSpinner size="large" />
-            <p className="mt-4 text-sm text-gray-600">Uploading and processing file...</p>
+            <p className="mt-4 text-sm text-gray-600">
+              {progress && progress.status === 'running'
+                ? `Processed ${progress.rows_parsed}${progress.rows_total ? ` of ${progress.rows_total}` : ''} rows` +
+                  (progress.eta_seconds != null ? ` (about ${Math.ceil(progress.eta_seconds)}s left)` : '')
+                : 'Uploading and processing file...'}
+            </p>
           </div>
         ) : (
           <>
@@ -109,7 +140,7 @@ export function QuestionImport({ onImportComplete }) {
               <XCircle className="h-5 w-5 text-red-400" />
             )}
             <p
-              className={`ml-2 text-sm ${
+              className={`ml-2 text-sm whitespace-pre-line ${
                 importResult.success ? 'text-green-700' : 'text-red-700'
               }`}
             >
@@ -7,14 +7,77 @@ export function useAutoSave(attemptId, initialAnswers = {}) {
   const [saveStatus, setSaveStatus] = useState('idle'); // 'idle', 'saving', 'saved', 'error'
   const saveTimeoutRef = useRef(null);
   const periodicSaveRef = useRef(null);
+  // Answers the server has acknowledged, and the highest sequence number used so far.
+  // Sequence numbers only go up. Until the first full save succeeds there is no
+  // baseline to diff against.
+  const savedRef = useRef(null);
+  const seqRef = useRef(0);
+  const savingRef = useRef(false);
 
-  // Debounced auto-save on answer changes
+  // Answers changed since the last acknowledged save; null clears an answer
+  const diffSinceSave = (current) => {
+    const saved = savedRef.current;
+    const changes = {};
+    Object.keys(current).forEach((questionId) => {
+      if (JSON.stringify(current[questionId]) !== JSON.stringify(saved[questionId])) {
+        changes[questionId] = current[questionId];
+      }
+    });
+    Object.keys(saved).forEach((questionId) => {
+      if (!(questionId in current)) changes[questionId] = null;
+    });
+    return changes;
+  };
+
+  // Taken before sending and never reused: a save whose response was lost may
+  // still have been applied
+  const nextSeq = () => {
+    seqRef.current += 1;
+    return seqRef.current;
+  };
+
+  // A 409 means the server has seen a later number (e.g. after a reload):
+  // continue past both it and everything sent before. A closed attempt
+  // accepts no more saves, so that one is an error.
+  const skipPast = (error) => {
+    if (error.response?.status !== 409 || error.response.data.closed) throw error;
+    seqRef.current = Math.max(seqRef.current, error.response.data.acked_seq);
+  };
+
+  const fullSave = async (answersToSave) => {
+    let response;
+    try {
+      response = await attemptsAPI.autoSaveAnswers(attemptId, answersToSave, nextSeq());
+    } catch (error) {
+      skipPast(error);
+      response = await attemptsAPI.autoSaveAnswers(attemptId, answersToSave, nextSeq());
+    }
+    savedRef.current = answersToSave;
+    seqRef.current = Math.max(seqRef.current, response.data.acked_seq);
+  };
+
+  // Debounced auto-save on answer changes; sends only what changed since the last ack
   const autoSave = useCallback(async (answersToSave) => {
-    if (!attemptId || Object.keys(answersToSave).length === 0) return;
-    
+    if (!attemptId || Object.keys(answersToSave).length === 0 || savingRef.current) return;
+
+    savingRef.current = true;
     setSaveStatus('saving');
     try {
-      await attemptsAPI.autoSaveAnswers(attemptId, answersToSave);
+      if (savedRef.current === null) {
+        await fullSave(answersToSave);
+      } else {
+        const changes = diffSinceSave(answersToSave);
+        if (Object.keys(changes).length > 0) {
+          try {
+            await attemptsAPI.autoSavePatch(attemptId, nextSeq(), changes);
+            savedRef.current = answersToSave;
+          } catch (error) {
+            // The server missed a patch: resync with everything
+            skipPast(error);
+            await fullSave(answersToSave);
+          }
+        }
+      }
       setSaveStatus('saved');
       setLastSaveTime(Date.now());
       
@@ -23,6 +86,8 @@ export function useAutoSave(attemptId, initialAnswers = {}) {
     } catch (error) {
       console.error('Auto-save failed:', error);
       setSaveStatus('error');
+    } finally {
+      savingRef.current = false;
     }
   }, [attemptId]);
 
@@ -48,7 +113,8 @@ export function useAutoSave(attemptId, initialAnswers = {}) {
   // Periodic auto-save (every 30 seconds)
   useEffect(() => {
     periodicSaveRef.current = setInterval(() => {
-      if (Object.keys(answers).length > 0) {
+      // Nothing to send unless something changed since the last ack
+      if (Object.keys(answers).length > 0 && (savedRef.current === null || Object.keys(diffSinceSave(answers)).length > 0)) {
         autoSave(answers);
       }
     }, 30000);
@@ -65,7 +131,7 @@ export function useAutoSave(attemptId, initialAnswers = {}) {
     const handleBeforeUnload = (event) => {
       if (Object.keys(answers).length > 0) {
         // Try to sync save (may not complete)
-        attemptsAPI.autoSaveAnswers(attemptId, answers).catch(console.error);
+        attemptsAPI.autoSaveAnswers(attemptId, answers, nextSeq()).catch(console.error);
         
         // Show confirmation message
         event.preventDefault();
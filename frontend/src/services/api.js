@@ -185,21 +185,35 @@ api.interceptors.response.use(
   }
 );
 
+// Retry when the server is shedding load (503), waiting as long as its Retry-After asks
+const retryWhenBusy = async (request, attempts = 4) => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await request();
+    } catch (error) {
+      if (error.response?.status !== 503 || attempt >= attempts) throw error;
+      const retryAfter = Number(error.response.headers?.['retry-after']) || attempt;
+      // Jitter so a crowd of clients does not come back in lockstep
+      await new Promise((resolve) => setTimeout(resolve, (retryAfter + Math.random()) * 1000));
+    }
+  }
+};
+
 export const authAPI = {
   login: (email, password) => {
     const formData = new URLSearchParams();
     formData.append('username', email);
     formData.append('password', password);
     
-    return api.post('/auth/login/', formData, {  // Add trailing slash
+    return retryWhenBusy(() => api.post('/auth/login/', formData, {  // Add trailing slash
       headers: {
         'Content-Type': 'application/x-www-form-urlencoded'
       }
-    });
+    }));
   },
   
   register: (userData) => 
-    api.post('/auth/register/', userData),  // Add trailing slash
+    retryWhenBusy(() => api.post('/auth/register/', userData)),  // Add trailing slash
   
   getProfile: () => 
     api.get('/users/me/'),  // Add trailing slash
@@ -250,7 +264,10 @@ export const questionsAPI = {
     return api.post('/questions/import/', formData, {  // Add trailing slash
       headers: { 'Content-Type': 'multipart/form-data' }
     });
-  }
+  },
+
+  getImportJob: (jobId) =>
+    api.get(`/questions/import/${jobId}/`)
 };
 
 export const examsAPI = {
@@ -273,9 +290,11 @@ export const examsAPI = {
 };
 
 export const attemptsAPI = {
-  startAttempt: (data) => api.post('/attempts/', data),  // Fixed: Add trailing slash
+  // At an exam's start the server may queue us; keep waiting rather than failing
+  startAttempt: (data) => retryWhenBusy(() => api.post('/attempts/', data), 10),  // Fixed: Add trailing slash
   getAttempt: (attemptId) => api.get(`/attempts/${attemptId}/`),
-  autoSaveAnswers: (attemptId, answers) => api.post(`/attempts/${attemptId}/auto-save/`, { answers }),
+  autoSaveAnswers: (attemptId, answers, seq) => api.post(`/attempts/${attemptId}/auto-save/`, { answers, seq }),
+  autoSavePatch: (attemptId, seq, answers) => api.post(`/attempts/${attemptId}/auto-save/patch`, { seq, answers }),
   submitAttempt: (attemptId) => api.post(`/attempts/${attemptId}/submit/`),
 };
 